@@ -1,4 +1,5 @@
 from .cwltool_wrapper import CWLToolWrapper
 from .cwltool_runner import CWLToolRunner
 from .cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
-from .loggingwrapper import LoggingWrapper
\ No newline at end of file
+from .loggingwrapper import LoggingWrapper
+from .api import benchmark, abenchmark, WorkflowResult, StepResult, MetricResult
@@ -0,0 +1,285 @@
+"""
+Python API of the benchmarker, to benchmark workflows from another application without going through the command
+line and `benchmarks.json`. The results are yielded as typed objects as soon as each workflow run completes:
+
+    from workflomics_benchmarker.api import benchmark
+
+    for result in benchmark("workflows/", jobs=4, no_history=True):
+        print(result.workflow, result.status, result.metric("time").value)
+
+`abenchmark` is the same as an async iterator, e.g., to stream the results from a web service.
+"""
+import asyncio
+import threading
+from argparse import Namespace
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List, Tuple
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.executors import Executor
+from workflomics_benchmarker.retention import DEFAULT_COMPRESS_PATTERNS
+
+# the key of each benchmark in the step results, by benchmark title
+METRIC_KEYS = {
+    "Status": "status",
+    "Execution time": "time",
+    "Memory usage": "memory",
+    "Warnings": "warnings",
+    "Errors": "errors",
+    "Proteins": "identified_proteins",
+    "GO-terms": "go_terms",
+    "CPU user time": "cpu_user",
+    "CPU system time": "cpu_system",
+    "I/O read": "io_read",
+    "I/O write": "io_write",
+    "CPU efficiency": "cpu_efficiency",
+    "Critical path": "critical_path",
+    "Parallelism": "parallelism",
+}
+
+
+def _number(value) -> float | None:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+@dataclass(slots=True, frozen=True)
+class MetricResult:
+    """The aggregate value of a benchmark over a workflow run, and its desirability. The execution time is also
+    given in milliseconds."""
+
+    key: str
+    title: str
+    unit: str
+    value: float | str | None
+    desirability: float
+    value_ms: float | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class StepResult:
+    """The benchmarks of a step of a workflow run. Values that were not measured are None."""
+
+    name: str
+    tool: str
+    status: str
+    time: float | None
+    time_ms: float | None
+    memory: float | None
+    warnings: Tuple[str, ...]
+    errors: Tuple[str, ...]
+    identified_proteins: float | None
+    go_terms: float | None
+    cpu_user: float | None
+    cpu_system: float | None
+    io_read: float | None
+    io_write: float | None
+    cpu_efficiency: float | None
+
+
+@dataclass(slots=True, frozen=True)
+class WorkflowResult:
+    """The benchmarks of the run of a workflow on an input."""
+
+    workflow: str
+    input: str
+    status: str
+    metrics: Tuple[MetricResult, ...]
+    steps: Tuple[StepResult, ...]
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == "✓"
+
+    def metric(self, key: str) -> MetricResult:
+        """Return the benchmark with the given key, e.g., "time" or "identified_proteins"."""
+        for metric in self.metrics:
+            if metric.key == key:
+                return metric
+        raise KeyError(key)
+
+
+def _step_result(step: dict) -> StepResult:
+    return StepResult(
+        name=step["step"],
+        tool=step["step"].rstrip("_0123456789"),
+        status=step["status"],
+        time=_number(step["time"]),
+        time_ms=_number(step["time_ms"]),
+        memory=_number(step["memory"]),
+        warnings=tuple(step["warnings"]) if isinstance(step["warnings"], list) else (),
+        errors=tuple(step["errors"]) if isinstance(step["errors"], list) else (),
+        identified_proteins=_number(step["identified_proteins"]),
+        go_terms=_number(step["go_terms"]),
+        cpu_user=_number(step["cpu_user"]),
+        cpu_system=_number(step["cpu_system"]),
+        io_read=_number(step["io_read"]),
+        io_write=_number(step["io_write"]),
+        cpu_efficiency=_number(step["cpu_efficiency"]),
+    )
+
+
+def workflow_result(workflow_name: str, input_name: str, workflow_execution_information: dict, workflow_benchmarks: dict) -> WorkflowResult:
+    """Convert the execution information and the benchmark results of a workflow run into a WorkflowResult."""
+    return WorkflowResult(
+        workflow=workflow_name,
+        input=input_name,
+        status=workflow_execution_information["status"],
+        metrics=tuple(
+            MetricResult(
+                key=METRIC_KEYS.get(benchmark["title"], benchmark["title"]),
+                title=benchmark["title"],
+                unit=benchmark["unit"],
+                value=benchmark["aggregate_value"]["value"],
+                desirability=benchmark["aggregate_value"]["desirability"],
+                value_ms=_number(benchmark["aggregate_value"].get("value_ms")),
+            )
+            for benchmark in workflow_benchmarks["benchmarks"]
+        ),
+        steps=tuple(_step_result(step) for step in workflow_execution_information["steps"]),
+    )
+
+
+def benchmark(
+    workflows: str,
+    *,
+    input: str | List[str] = None,
+    outdir: str = None,
+    singularity: bool = False,
+    executor: str | Executor = "cwltool",
+    interactive: bool = False,
+    jobs: int = 1,
+    parallel: bool = False,
+    order: str = "name",
+    previous_benchmarks: str = None,
+    preflight: str = None,
+    stage_inputs: str | bool = None,
+    retention: bool = False,
+    retention_keep_under: float = 1.0,
+    retention_compress: List[str] = DEFAULT_COMPRESS_PATTERNS,
+    dedupe_messages: bool = False,
+    log_rules: str = None,
+    log_rules_report: bool = False,
+    rank_by: List[str] = None,
+    isolate: bool = False,
+    cpus_per_run: int = None,
+    numa_node: int = None,
+    interference_threshold: float = 0.1,
+    interference_reruns: int = 0,
+    memory_limit: int = None,
+    workflow_memory_limit: int = None,
+    warm_workers: bool = False,
+    dedupe_workflows: bool = False,
+    history_db: str = None,
+    no_history: bool = False,
+    profile: bool = False,
+    profile_output: str = None,
+    verbose: bool = False,
+    store_results: bool = True,
+    stop: threading.Event = None,
+) -> Iterator[WorkflowResult]:
+    """
+    Benchmark the workflows in a directory on each input, yielding the results of each run as soon as it completes.
+
+    The options are the same as those of `workflomics benchmark` (`stage_inputs=True` stages the inputs into
+    the default cache directory and `stage_inputs=False` does not stage them, and `executor` may also be an
+    `Executor` instance). Unless `store_results` is False, the results are also ranked and stored in
+    `benchmarks.json` (and the run recorded in the history) once all the runs completed, as the command line does. If the iteration is stopped early, or `stop` is set from
+    another thread, the runs that did not start yet are cancelled and nothing is stored.
+
+    Raises
+    ------
+    NotADirectoryError
+        If the workflows directory does not exist.
+    FileNotFoundError
+        If the executor is not installed.
+    ValueError
+        If the executor is unknown, an input directory has no input yaml files, the log rules cannot be loaded, the
+        runs cannot be isolated, the warm workers cannot be used, or some workflow runs are invalid and
+        `preflight="fail"`.
+    """
+    args = Namespace(
+        workflows=workflows,
+        input=[input] if isinstance(input, str) else input,
+        outdir=outdir,
+        singularity=singularity,
+        executors=[executor],
+        interactive=interactive,
+        jobs=jobs,
+        parallel=parallel,
+        order=order,
+        previous_benchmarks=previous_benchmarks,
+        preflight=preflight,
+        # True stages into the default cache directory, like the option without a directory; False does not stage
+        stage_inputs="" if stage_inputs is True else (stage_inputs or None),
+        retention=retention,
+        retention_keep_under=retention_keep_under,
+        retention_compress=retention_compress,
+        dedupe_messages=dedupe_messages,
+        log_rules=log_rules,
+        log_rules_report=log_rules_report,
+        rank_by=rank_by,
+        isolate=isolate,
+        cpus_per_run=cpus_per_run,
+        numa_node=numa_node,
+        interference_threshold=interference_threshold,
+        interference_reruns=interference_reruns,
+        memory_limit=memory_limit,
+        workflow_memory_limit=workflow_memory_limit,
+        warm_workers=warm_workers,
+        dedupe_workflows=dedupe_workflows,
+        history_db=history_db,
+        no_history=no_history,
+        profile=profile,
+        profile_output=profile_output,
+        verbose=verbose,
+    )
+    yield from run_benchmark(CWLToolRuntimeBenchmark(args), store_results, stop)
+
+
+def run_benchmark(
+    benchmarker: CWLToolRuntimeBenchmark, store_results: bool = True, stop: threading.Event = None
+) -> Iterator[WorkflowResult]:
+    """Run a configured benchmarker, yielding the result of each run as soon as it completes."""
+    for workflow_name, input_name, workflow_execution_information, workflow_benchmarks in benchmarker.iter_workflow_benchmarks(stop):
+        yield workflow_result(workflow_name, input_name, workflow_execution_information, workflow_benchmarks)
+    if store_results and not (stop is not None and stop.is_set()):
+        benchmarker.store_results()
+
+
+async def abenchmark(workflows: str, **options) -> AsyncIterator[WorkflowResult]:
+    """
+    Benchmark the workflows in a directory, as `benchmark`, asynchronously yielding the result of each run as
+    soon as it completes. The workflows are run in a background thread, so the event loop is not blocked. When
+    the iteration is stopped early, the runs that did not start yet are cancelled right away.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    stop = options.pop("stop", None) or threading.Event()
+
+    def put(item):
+        if loop.is_closed():  # nobody waits for the results anymore
+            return
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:  # the event loop was closed in the meantime
+            pass
+
+    def produce():
+        try:
+            for result in benchmark(workflows, stop=stop, **options):
+                put(result)
+        except BaseException as e:
+            put(e)
+        finally:
+            put(done)
+
+    thread = threading.Thread(target=produce, name="abenchmark", daemon=True)
+    thread.start()
+    try:
+        while (item := await queue.get()) is not done:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
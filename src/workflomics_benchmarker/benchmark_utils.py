@@ -5,7 +5,14 @@ import re
 import datetime
 from typing import List
 
-from workflomics_benchmarker.scientific_benchmarks import benchmark_gProfiler, benchmark_proteinprophet
+from workflomics_benchmarker.scientific_benchmarks import (
+    benchmark_goenrichment,
+    benchmark_gProfiler,
+    benchmark_proteinprophet,
+    is_goenrichment_table,
+)
+from workflomics_benchmarker.resource_accounting import map_containers_to_steps
+from workflomics_benchmarker.log_rules import LogClassifier, default_log_classifier
 
 
 def create_output_dir(dir_path: str, workflow_name: str) -> str:
@@ -32,14 +39,6 @@ def create_output_dir(dir_path: str, workflow_name: str) -> str:
     return workflow_outdir
 
 
-KNOWN_USELESS_WARNINGS_ERRORS = [
-    "WARNING: The requested image's platform",
-    " 0 errors",
-    "Calculating sensitivity...and error tables...",
-    " 0 warnings",
-]
-
-
 def is_line_useless(line):
     """Check if a line is useless for the benchmarking.
 
@@ -54,10 +53,7 @@ def is_line_useless(line):
         True if the line is useless, False otherwise.
 
     """
-    for useless in KNOWN_USELESS_WARNINGS_ERRORS:
-        if useless in line:
-            return True
-    return False
+    return default_log_classifier.classify(line) == "noise"
 
 
 def setup_empty_benchmark_for_step(step_name: str) -> dict:
@@ -65,15 +61,32 @@ def setup_empty_benchmark_for_step(step_name: str) -> dict:
         "step": step_name,
         "status": "-",
         "time": "-",
+        "time_ms": "-",
         "memory": "-",
         "warnings": "",
         "errors": "",
         "identified_proteins": "-",
         "go_terms": "-",
-
+        "cpu_user": "-",
+        "cpu_system": "-",
+        "io_read": "-",
+        "io_write": "-",
+        "cpu_efficiency": "-",
+        "image_digest": "-",
+        "started_at": "-",
+        "finished_at": "-",
+        "critical_path": "-",
+        "parallelism": "-",
+        "interference": "-",
+        "oom_kill": "-",
     }
 
 
+# the status of the steps killed for exceeding a memory ceiling, or by the OOM killer
+OOM_STATUS = "OOM"
+FAILED_STATUSES = ["✗", OOM_STATUS]
+
+
 success_pattern = re.compile(r"\[job (.+)\] completed success")
 
 
@@ -100,7 +113,82 @@ def set_step_status_to_failed(step_results, failed_tool_name):
             break
 
 
-def benchmark_successful_step_execution(successfully_executed_steps: List[str], cwltool_output_lines: List[str], step_results: List[dict], workflow_outdir:str) -> List[dict]:
+def line_time(cwltool_output_lines: List[str], line_times: List[float] | None, index: int) -> float:
+    """Return the time (in seconds since the epoch) of a line of the cwltool output: the time at which it arrived if
+    it was measured, or else the cwltool timestamp of the line, which only has a resolution of one second."""
+    if line_times is not None and index < len(line_times):
+        return line_times[index]
+    return datetime.datetime.strptime(cwltool_output_lines[index][:21], "[%Y-%m-%d %H:%M:%S]").timestamp()
+
+
+def store_step_time(entry: dict, started_at: float, finished_at: float):
+    """Store the execution time of a step in milliseconds, and in whole seconds (at least 1) as it used to be."""
+    entry["started_at"] = started_at
+    entry["finished_at"] = finished_at
+    entry["time_ms"] = round((finished_at - started_at) * 1000, 1)
+    entry["time"] = max(1, int(finished_at - started_at))
+
+
+def step_seconds(entry: dict) -> float:
+    """Return the execution time of a step in seconds, in milliseconds resolution if it was measured."""
+    if isinstance(entry.get("time_ms"), float) and entry["time_ms"] > 0:
+        return entry["time_ms"] / 1000
+    return entry["time"]
+
+
+def benchmark_steps(steps: List[str], cwltool_output_lines: List[str], workflow_outdir: str, classifier: LogClassifier = None, line_times: List[float] = None, output_files: dict = None) -> List[dict]:
+    """Benchmark each step of a workflow based on the output of its cwltool execution.
+
+    Parameters
+    ----------
+    steps : List[str]
+        The names of the steps of the workflow, in the order they are defined.
+    cwltool_output_lines : List[str]
+        The list of lines from the cwltool output.
+    workflow_outdir : str
+        The path to the output directory for the workflow.
+    classifier : LogClassifier, optional
+        The rules classifying the lines as noise, warnings and errors (default: the default rules).
+    line_times : List[float], optional
+        The time at which each line of the cwltool output arrived (default: the timestamps in the output).
+    output_files : dict, optional
+        The paths to the final output files of each step, to extract the scientific metrics from (default: the
+        conventional file names in the output directory).
+
+    Returns
+    -------
+    List[dict]
+        The list of benchmark results for each step.
+    """
+    if classifier is None:
+        classifier = default_log_classifier
+    # Set of step names that were executed successfully.
+    successfully_executed_steps = set()
+    failed_steps = set()
+
+    step_results = [setup_empty_benchmark_for_step(tool) for tool in steps]
+    # iterate over the output of the workflow and find which steps were executed successfully
+    for line in cwltool_output_lines:
+        successful_match = step_success_pattern(line)
+        if successful_match:
+            successfully_executed_steps.add(successful_match.group(1))
+        else:
+            failed_match = step_fail_pattern(line)
+            if failed_match:
+                failed_tool_name = (
+                    failed_match.group(1)
+                    if failed_match.group(1) is not None
+                    else failed_match.group(2)
+                )
+                failed_steps.add(failed_tool_name)
+
+    # iterate over the output of the workflow and find the benchmark values for each step
+    step_results = benchmark_successful_step_execution(successfully_executed_steps, cwltool_output_lines, step_results, workflow_outdir, classifier, line_times, output_files)
+    step_results = benchmark_failed_step_execution(failed_steps, cwltool_output_lines, step_results, classifier, line_times)
+    return step_results
+
+
+def benchmark_successful_step_execution(successfully_executed_steps: List[str], cwltool_output_lines: List[str], step_results: List[dict], workflow_outdir:str, classifier: LogClassifier = None, line_times: List[float] = None, output_files: dict = None) -> List[dict]:
     """Benchmark the successful execution of a step and update then
 
     Parameters
@@ -113,22 +201,28 @@ def benchmark_successful_step_execution(successfully_executed_steps: List[str],
         The list of benchmark results for each step.
     workflow_outdir : str
         The path to the output directory for the workflow.
+    classifier : LogClassifier, optional
+        The rules classifying the lines as noise, warnings and errors (default: the default rules).
+    line_times : List[float], optional
+        The time at which each line of the cwltool output arrived (default: the timestamps in the output).
+    output_files : dict, optional
+        The paths to the final output files of each step (default: the conventional file names in the output
+        directory).
     """
+    if classifier is None:
+        classifier = default_log_classifier
     for step in successfully_executed_steps:
+        tool = step.rstrip("_0123456789")
         max_memory_step = "-"
         step_start = False
         warnings_step = []
         errors_step = []
-        for line in cwltool_output_lines:
+        for index, line in enumerate(cwltool_output_lines):
             if f"[step {step}] start" in line:
-                start_time_step = datetime.datetime.strptime(
-                    line[:21], "[%Y-%m-%d %H:%M:%S]"
-                )
+                start_time_step = line_time(cwltool_output_lines, line_times, index)
                 step_start = True
             elif f"[job {step}] completed success" in line:
-                end_time_step = datetime.datetime.strptime(
-                    line[:21], "[%Y-%m-%d %H:%M:%S]"
-                )
+                end_time_step = line_time(cwltool_output_lines, line_times, index)
                 break
             elif step_start:
                 if f"[job {step}] Max memory used" in line:
@@ -137,15 +231,30 @@ def benchmark_successful_step_execution(successfully_executed_steps: List[str],
                     )
                     if line.split()[-1].endswith("GiB"):
                         max_memory_step = max_memory_step * 1024
-                elif "warning" in line.lower():
-                    if not is_line_useless(line):
+                else:
+                    line_class = classifier.classify(line, tool)
+                    if line_class == "warning":
                         warnings_step.append(line)
-                elif "error" in line.lower():
-                    if not is_line_useless(line):
+                    elif line_class == "error":
                         errors_step.append(line)
         count_goterms = "-"  
+        step_output_files = (output_files or {}).get(step, [])
         if "gprofiler" in step.lower():
-            count_goterms = benchmark_gProfiler(workflow_outdir + "/output.json")
+            json_files = [path for path in step_output_files if path.endswith(".json")]
+            count_goterms = benchmark_gProfiler(json_files[0] if json_files else workflow_outdir + "/output.json")
+        elif "goenrichment" in step.lower():
+            # the other tables the step outputs are told apart by their header
+            tables = [path for path in step_output_files if path.endswith((".txt", ".tsv"))] or [
+                path
+                for path in (os.path.join(workflow_outdir, f"{ontology}_result.txt") for ontology in ["BP", "CC", "MF"])
+                if os.path.exists(path)
+            ]
+            tables = [path for path in tables if is_goenrichment_table(path)]
+            if tables:
+                try:
+                    count_goterms = benchmark_goenrichment(tables)
+                except ValueError as e:  # e.g., a p-value that is not a number
+                    print(f"Warning: {e}")
 
         count_identified_proteins = "-"
         files_with_extension = list(Path(workflow_outdir).glob('*.prot.xml'))
@@ -153,14 +262,11 @@ def benchmark_successful_step_execution(successfully_executed_steps: List[str],
         if "proteinprophet" in step.lower() and first_file:
             count_identified_proteins = benchmark_proteinprophet(workflow_outdir + "/" + first_file.name)
 
-        # set the minimum execution time to 1 second. Decimal values cannot be retrieved from the cwltool output, so the number of seconds is rounded up.
-        execution_time_step = int((end_time_step - start_time_step).total_seconds())
-
         # store the benchmark values for each successfully executed step
         for entry in step_results:
             if entry["step"] == step:
                 entry["status"] = "✓"
-                entry["time"] = max(1, execution_time_step)
+                store_step_time(entry, start_time_step, end_time_step)
                 entry["memory"] = max(1, max_memory_step) if max_memory_step != "-" else "-"
                 entry["warnings"] = warnings_step
                 entry["errors"] = errors_step
@@ -168,7 +274,7 @@ def benchmark_successful_step_execution(successfully_executed_steps: List[str],
                 entry["go_terms"] = count_goterms
     return step_results
 
-def benchmark_failed_step_execution(failed_steps: List[str], cwltool_output_lines: List[str], step_results: List[dict]) -> List[dict]:
+def benchmark_failed_step_execution(failed_steps: List[str], cwltool_output_lines: List[str], step_results: List[dict], classifier: LogClassifier = None, line_times: List[float] = None) -> List[dict]:
     """Benchmark the failed execution of a step.
 
     Parameters
@@ -179,19 +285,24 @@ def benchmark_failed_step_execution(failed_steps: List[str], cwltool_output_line
         The list of lines from the cwltool output.
     step_results : List[dict]
         The list of benchmark results for each step.
+    classifier : LogClassifier, optional
+        The rules classifying the lines as noise, warnings and errors (default: the default rules).
+    line_times : List[float], optional
+        The time at which each line of the cwltool output arrived (default: the timestamps in the output).
     """
+    if classifier is None:
+        classifier = default_log_classifier
     all_errors = []
     all_warnings = []
     for step in failed_steps:
+        tool = step.rstrip("_0123456789")
         max_memory_step = "N/A"
         step_start = False
         warnings_step = []
         errors_step = []
-        for line in cwltool_output_lines:
+        for index, line in enumerate(cwltool_output_lines):
             if not step_start and f"[step {step}] start" in line:
-                start_time_step = datetime.datetime.strptime(
-                    line[:21], "[%Y-%m-%d %H:%M:%S]"
-                )
+                start_time_step = line_time(cwltool_output_lines, line_times, index)
                 step_start = True
             elif step_start:
                 if f"[job {step}] Max memory used" in line:
@@ -201,30 +312,225 @@ def benchmark_failed_step_execution(failed_steps: List[str], cwltool_output_line
                     if line.split()[-1].endswith("GiB"):
                         max_memory_step = max_memory_step * 1024
                     max_memory_step = max(1, max_memory_step)
-                elif "warning" in line.lower():
-                    if not is_line_useless(line):
+                else:
+                    line_class = classifier.classify(line, tool)
+                    if line_class == "warning":
                         warnings_step.append(line)
-                elif "error" in line.lower():
-                    if not is_line_useless(line):
+                    elif line_class == "error":
                         errors_step.append(line)
                 if f"[job {step}] completed permanentFail" in line or f"ERROR [step {step}]" in line:
-                    end_time_step = datetime.datetime.strptime(
-                        line[:21], "[%Y-%m-%d %H:%M:%S]"
-                    )
+                    end_time_step = line_time(cwltool_output_lines, line_times, index)
                     break
 
         all_errors.extend(errors_step)
         all_warnings.extend(warnings_step)
 
-        # set the minimum execution time to 1 second. Decimal values cannot be retrieved from the cwltool output, so the number of seconds is rounded up.
-        execution_time_step = int((end_time_step - start_time_step).total_seconds())
-
-        # store the benchmark values for each successfully executed step
+        # store the benchmark values for each failed step
         for entry in step_results:
             if entry["step"] == step:
                 entry["status"] = "✗"
-                entry["time"] = max(1, execution_time_step)
+                store_step_time(entry, start_time_step, end_time_step)
                 entry["memory"] = max_memory_step
                 entry["warnings"] = warnings_step
                 entry["errors"] = errors_step
-    return step_results
\ No newline at end of file
+    return step_results
+
+killed_pattern = re.compile(r"\[job (.+?)\] (?:exited with status: 137|was terminated by signal: SIGKILL)")
+
+
+def killed_steps(cwltool_output_lines: List[str]) -> set:
+    """Return the names of the steps whose process (or container) was killed with SIGKILL, as the OOM killer and
+    the container runtimes do when a memory limit is exceeded."""
+    steps = set()
+    for line in cwltool_output_lines:
+        match = killed_pattern.search(line)
+        if match:
+            steps.add(match.group(1))
+    return steps
+
+
+def classify_oom_steps(
+    step_results: List[dict],
+    cwltool_output_lines: List[str],
+    container_memory: dict,
+    killed_containers: set = frozenset(),
+    memory_limit: int = None,
+    unlimited_containers: set = frozenset(),
+) -> List[dict]:
+    """Give the failed steps that were killed for using too much memory the OOM status, with their peak memory at
+    the kill and the reason of the kill (`oom_kill`):
+
+    - `workflow_limit`: the container was killed because the workflow exceeded its memory ceiling,
+    - `step_limit`: the container exceeded the memory ceiling of the steps,
+    - `kernel`: the OOM killer killed a process of a container without a ceiling (e.g., the host ran out of memory).
+
+    A step whose container cgroup could not be read is classified by its SIGKILL exit status if its container
+    has a memory ceiling.
+
+    Parameters
+    ----------
+    step_results : List[dict]
+        The list of benchmark results for each step.
+    cwltool_output_lines : List[str]
+        The list of lines from the cwltool output.
+    container_memory : dict
+        The peak memory (in bytes) and the number of OOM kills of each container, keyed by its cidfile (see
+        `CgroupMonitor`).
+    killed_containers : set, optional
+        The cidfiles of the containers killed for exceeding the memory ceiling of the workflow.
+    memory_limit : int, optional
+        The memory ceiling of each step in MiB, if any.
+    unlimited_containers : set, optional
+        The cidfiles of the containers that could not be given the memory ceiling of the steps.
+    """
+    containers = map_containers_to_steps(cwltool_output_lines)
+    killed = killed_steps(cwltool_output_lines)
+    for entry in step_results:
+        if entry["status"] != "✗":
+            continue
+        cidfiles = [cidfile for cidfile, step in containers.items() if step == entry["step"]]
+        memory = [container_memory[cidfile] for cidfile in cidfiles if cidfile in container_memory]
+        limited = memory_limit is not None and not any(cidfile in unlimited_containers for cidfile in cidfiles)
+        if any(cidfile in killed_containers for cidfile in cidfiles):
+            reason = "workflow_limit"
+        elif any(usage["oom_kills"] > 0 for usage in memory):
+            reason = "step_limit" if limited else "kernel"
+        elif not memory and limited and entry["step"] in killed:
+            reason = "step_limit"
+        else:
+            continue
+        entry["status"] = OOM_STATUS
+        entry["oom_kill"] = reason
+        if memory:
+            entry["memory"] = max(1, round(max(usage["peak"] for usage in memory) / 2**20))
+    return step_results
+
+
+def benchmark_workflow_timing(step_results: List[dict], dependencies: dict) -> dict:
+    """Compute the wall-clock time of a workflow, its critical path through the step DAG and the achieved parallelism.
+
+    The critical path is the longest chain of dependent executed steps, weighted by their execution time: the
+    shortest time the workflow can take with unlimited parallelism. Each step on the critical path gets its time as
+    `critical_path` (and "-" otherwise), and each executed step gets as `parallelism` the number of executed steps
+    (including itself) whose execution overlapped with it.
+
+    Parameters
+    ----------
+    step_results : List[dict]
+        The list of benchmark results for each step.
+    dependencies : dict
+        The names of the upstream steps of each step (see `extract_step_dependencies_from_cwl`).
+
+    Returns
+    -------
+    dict
+        The wall-clock time and the critical path in seconds and in milliseconds, and the parallelism, i.e., the
+        sum of the step times over the wall-clock time. "N/A" if no step was executed.
+    """
+    executed = {entry["step"]: entry for entry in step_results if isinstance(entry["started_at"], float)}
+    if not executed:
+        return {
+            "wall_clock": "N/A",
+            "critical_path": "N/A",
+            "parallelism": "N/A",
+            "wall_clock_ms": "N/A",
+            "critical_path_ms": "N/A",
+        }
+    started_at = min(entry["started_at"] for entry in executed.values())
+    finished_at = max(entry["finished_at"] for entry in executed.values())
+
+    # the step times are rounded up to 1 second, so the wall-clock time is at least the longest step
+    wall_clock = max(int(finished_at - started_at), max(entry["time"] for entry in executed.values()))
+
+    # longest path ending at each executed step, the steps of the DAG are visited depth-first
+    path_lengths, predecessors = {}, {}
+
+    def longest_path_to(step):
+        if step not in path_lengths:
+            upstream = [dependency for dependency in dependencies.get(step, []) if dependency in executed]
+            previous = max(upstream, key=longest_path_to, default=None)
+            predecessors[step] = previous
+            path_lengths[step] = executed[step]["time"] + (longest_path_to(previous) if previous else 0)
+        return path_lengths[step]
+
+    last_step = max(executed, key=longest_path_to)
+    critical_steps = []
+    step = last_step
+    while step is not None:
+        critical_steps.append(step)
+        step = predecessors[step]
+
+    for name, entry in executed.items():
+        entry["critical_path"] = entry["time"] if name in critical_steps else "-"
+        entry["parallelism"] = sum(
+            1
+            for other in executed.values()
+            if (other["started_at"] < entry["finished_at"] and entry["started_at"] < other["finished_at"])
+            or other is entry
+        )
+
+    return {
+        "wall_clock": wall_clock,
+        "critical_path": path_lengths[last_step],
+        "parallelism": round(sum(entry["time"] for entry in executed.values()) / wall_clock, 2),
+        "wall_clock_ms": round((finished_at - started_at) * 1000, 1),
+        "critical_path_ms": round(
+            sum(
+                executed[step]["time_ms"] if isinstance(executed[step]["time_ms"], float) else executed[step]["time"] * 1000
+                for step in critical_steps
+            ),
+            1,
+        ),
+    }
+
+
+def benchmark_step_resource_usage(step_results: List[dict], cwltool_output_lines: List[str], container_usage: dict, container_images: dict = None) -> List[dict]:
+    """Store the CPU time, block I/O and CPU efficiency of each executed step, measured from the cgroups of its containers,
+    and the digest of the image of its container.
+
+    Parameters
+    ----------
+    step_results : List[dict]
+        The list of benchmark results for each step.
+    cwltool_output_lines : List[str]
+        The list of lines from the cwltool output.
+    container_usage : dict
+        The CPU and I/O usage of each container, keyed by its cidfile (see `CgroupMonitor`).
+    container_images : dict, optional
+        The image digest of each container, keyed by its cidfile.
+    """
+    containers = map_containers_to_steps(cwltool_output_lines)
+    step_images = {
+        containers[cidfile]: image
+        for cidfile, image in (container_images or {}).items()
+        if cidfile in containers and image is not None
+    }
+    step_usage = {}
+    for cidfile, usage in container_usage.items():
+        step = containers.get(cidfile)
+        if step is None:
+            continue
+        if step not in step_usage:
+            step_usage[step] = dict(usage)
+        else:  # e.g., scattered steps run several containers
+            for key in ["cpu_user", "cpu_system", "io_read", "io_write"]:
+                step_usage[step][key] += usage[key]
+
+    for entry in step_results:
+        if entry["status"] == "-":
+            continue
+        entry["image_digest"] = step_images.get(entry["step"], "N/A")
+        usage = step_usage.get(entry["step"])
+        if usage is None:
+            for key in ["cpu_user", "cpu_system", "io_read", "io_write", "cpu_efficiency"]:
+                entry[key] = "N/A"
+            continue
+        entry["cpu_user"] = round(usage["cpu_user"], 2)
+        entry["cpu_system"] = round(usage["cpu_system"], 2)
+        entry["io_read"] = round(usage["io_read"] / 2**20, 2)
+        entry["io_write"] = round(usage["io_write"] / 2**20, 2)
+        # CPU efficiency is the CPU time over the CPU time available to the step, in percent
+        entry["cpu_efficiency"] = round(
+            100 * (usage["cpu_user"] + usage["cpu_system"]) / (step_seconds(entry) * usage["cores"]), 1
+        )
+    return step_results
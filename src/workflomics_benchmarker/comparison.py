@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+import time
+from argparse import Namespace
+from pathlib import Path
+from typing import List
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.executors import get_executor
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+
+COMPARISON_FILE = "executor_comparison.json"
+
+
+def _aggregate_value(workflow_benchmarks: dict, title: str, key: str = "value"):
+    for benchmark in workflow_benchmarks["benchmarks"]:
+        if benchmark["title"] == title:
+            value = benchmark["aggregate_value"].get(key)
+            return value if isinstance(value, (int, float)) else None
+    return None
+
+
+def name_executors(executors: List) -> List[str]:
+    """Name each executor after its name, adding a number in case two executors have the same name."""
+    names = []
+    for executor in executors:
+        candidate, index = str(executor), 2
+        while candidate in names:
+            candidate, index = f"{executor}_{index}", index + 1
+        names.append(candidate)
+    return names
+
+
+def build_executor_comparison(executor_runs: dict) -> dict:
+    """
+    Put the results of the runs of the same workflows under several executors side by side.
+
+    Parameters
+    ----------
+    executor_runs : dict
+        For each executor, by name: its label (`executor`, e.g., "cwltool 3.1.20240112164112"), its output
+        directory (`outdir`), the wall-clock time of all its runs in seconds (`elapsed`), and its runs (`runs`),
+        as the name of the workflow, the name of the input, the execution information and the benchmark results.
+
+    Returns
+    -------
+    dict
+        The summary of each executor, and for each workflow run the status, wall-clock time (s), execution time
+        (ms), memory usage (MB) and CPU time (s) under each executor, with the speedup of each executor over the
+        first one.
+    """
+    names = list(executor_runs)
+    executors = []
+    workflows = {}
+    for name, executor_run in executor_runs.items():
+        statuses = [workflow_execution_information["status"] for _, _, workflow_execution_information, _ in executor_run["runs"]]
+        executors.append(
+            {
+                "name": name,
+                "executor": executor_run["executor"],
+                "outdir": executor_run["outdir"],
+                "elapsed": round(executor_run["elapsed"], 3),
+                "succeeded": statuses.count("✓"),
+                "failed": len(statuses) - statuses.count("✓"),
+            }
+        )
+        for workflow_name, input_name, workflow_execution_information, workflow_benchmarks in executor_run["runs"]:
+            rusage = workflow_execution_information["rusage"]
+            workflow = workflows.setdefault(
+                (workflow_name, input_name), {"workflowName": workflow_name, "input": input_name, "results": {}}
+            )
+            workflow["results"][name] = {
+                "status": workflow_execution_information["status"],
+                "wall_clock": round(rusage["elapsed"], 3),
+                "time_ms": _aggregate_value(workflow_benchmarks, "Execution time", "value_ms"),
+                "memory": _aggregate_value(workflow_benchmarks, "Memory usage"),
+                "cpu": round(rusage["cpu_user"] + rusage["cpu_system"], 3),
+            }
+    for workflow in workflows.values():
+        baseline = workflow["results"].get(names[0])
+        workflow["speedup"] = {
+            name: round(baseline["wall_clock"] / result["wall_clock"], 2)
+            if baseline is not None and baseline["wall_clock"] and result["wall_clock"]
+            else None
+            for name, result in workflow["results"].items()
+        }
+    return {"executors": executors, "workflows": list(workflows.values())}
+
+
+def write_executor_comparison(comparison: dict, outdir: str) -> str:
+    """Store the comparison of the executors in `executor_comparison.json`, replacing it atomically, and return its path."""
+    path = os.path.join(outdir, COMPARISON_FILE)
+    with tempfile.NamedTemporaryFile("w", dir=outdir, delete=False, suffix=".json") as file:
+        json.dump(comparison, file, indent=3)
+    os.replace(file.name, path)
+    return path
+
+
+def show_executor_comparison(comparison: dict):
+    """Log the results of each workflow run under each executor on one line."""
+    for executor in comparison["executors"]:
+        LoggingWrapper.info(
+            f"{executor['executor']}: {executor['succeeded']} succeeded, {executor['failed']} failed "
+            f"in {executor['elapsed']:.1f} s (results in {executor['outdir']})"
+        )
+    for workflow in comparison["workflows"]:
+        results = ", ".join(
+            f"{name} {result['status']} {result['wall_clock']:.1f} s"
+            + (f" ({workflow['speedup'][name]}x)" if workflow["speedup"][name] is not None else "")
+            for name, result in workflow["results"].items()
+        )
+        LoggingWrapper.info(f"{workflow['workflowName']} [{workflow['input']}]: {results}")
+
+
+def compare_executors(args) -> dict:
+    """
+    Benchmark the workflows with each of the executors in `args.executors`, one after the other, each in a
+    subdirectory of the output directory named after the executor, and store their results side by side in
+    `executor_comparison.json` in the output directory.
+
+    Returns
+    -------
+    dict
+        The comparison of the executors, see `build_executor_comparison`.
+
+    Raises
+    ------
+    ValueError
+        If an executor is unknown.
+    """
+    executors = [get_executor(spec) for spec in args.executors]
+    outdir = args.outdir if hasattr(args, 'outdir') and args.outdir is not None else args.workflows
+    executor_runs = {}
+    for index, (name, executor) in enumerate(zip(name_executors(executors), executors)):
+        executor_outdir = str(Path(outdir).joinpath(name))
+        Path(executor_outdir).mkdir(parents=True, exist_ok=True)
+        # the paths to the input files are only edited once, if requested
+        run_args = Namespace(**dict(vars(args), executors=[executor], outdir=executor_outdir))
+        if index > 0:
+            run_args.interactive = False
+        LoggingWrapper.info(f"Benchmarking the workflows with {executor}...", color="green", bold=True)
+        benchmarker = CWLToolRuntimeBenchmark(run_args)
+        start = time.monotonic()
+        benchmarker.run_workflows()
+        executor_runs[name] = {
+            "executor": f"{executor} {benchmarker.version}",
+            "outdir": executor_outdir,
+            "elapsed": time.monotonic() - start,
+            "runs": [
+                (workflow_name, benchmarker.input_names[input_yaml_path]) + result
+                for (workflow_name, _, _, input_yaml_path), result in zip(benchmarker.runs, benchmarker.results)
+            ],
+        }
+    comparison = build_executor_comparison(executor_runs)
+    show_executor_comparison(comparison)
+    LoggingWrapper.info("Executor comparison stored in " + write_executor_comparison(comparison, outdir), color="green")
+    return comparison
@@ -1,7 +1,10 @@
 from typing import List
 import yaml
 
+from workflomics_benchmarker.profiler import profiled_phase
 
+
+@profiled_phase("yaml_parsing")
 def extract_steps_from_cwl(workflow_file) -> List[str]:
     """Extract the step (tool) names from the cwl workflow file in the order they are defined.
 
@@ -18,3 +21,133 @@ def extract_steps_from_cwl(workflow_file) -> List[str]:
     with open(workflow_file, "r") as file:
         data = yaml.safe_load(file)
     return [step_name for step_name in data.get("steps", {})]
+
+
+def _step_sources(step_inputs) -> List[str]:
+    """Return the sources of the inputs of a step, given in any of the CWL input notations."""
+    if isinstance(step_inputs, dict):
+        step_inputs = [
+            value if isinstance(value, dict) else {"source": value} for value in step_inputs.values()
+        ]
+    sources = []
+    for step_input in step_inputs or []:
+        source = step_input.get("source") if isinstance(step_input, dict) else None
+        if isinstance(source, str):
+            sources.append(source)
+        elif isinstance(source, list):
+            sources.extend(source)
+    return sources
+
+
+@profiled_phase("yaml_parsing")
+def extract_step_dependencies_from_cwl(workflow_file) -> dict:
+    """Extract the steps each step of the cwl workflow file depends on, i.e., whose outputs it takes as input.
+
+    Parameters
+    ----------
+    workflow_file : str
+        The path to the cwl workflow file.
+
+    Returns
+    -------
+    dict
+        The names of the upstream steps of each step, with the steps in the order they are defined.
+    """
+    with open(workflow_file, "r") as file:
+        data = yaml.safe_load(file)
+    steps = data.get("steps", {})
+    dependencies = {}
+    for step_name, step in steps.items():
+        upstream = []
+        for source in _step_sources(step.get("in")):
+            source_step = source.lstrip("#").split("/")[0]
+            if "/" in source and source_step in steps and source_step not in upstream:
+                upstream.append(source_step)
+        dependencies[step_name] = upstream
+    return dependencies
+
+
+@profiled_phase("yaml_parsing")
+def extract_outputs_from_cwl(workflow_file) -> List[str]:
+    """Extract the output names of the cwl workflow file.
+
+    Parameters
+    ----------
+    workflow_file : str
+        The path to the cwl workflow file.
+
+    Returns
+    -------
+    List[str]
+        The list of output names.
+    """
+    with open(workflow_file, "r") as file:
+        data = yaml.safe_load(file)
+    outputs = data.get("outputs", {})
+    if isinstance(outputs, list):
+        return [output["id"].lstrip("#") for output in outputs]
+    return list(outputs)
+
+
+@profiled_phase("yaml_parsing")
+def extract_output_sources_from_cwl(workflow_file) -> dict:
+    """Extract the step producing each output of the cwl workflow file.
+
+    Parameters
+    ----------
+    workflow_file : str
+        The path to the cwl workflow file.
+
+    Returns
+    -------
+    dict
+        The name of the step producing each output, keyed by the output name. Outputs taken directly from a
+        workflow input are left out.
+    """
+    with open(workflow_file, "r") as file:
+        data = yaml.safe_load(file)
+    outputs = data.get("outputs", {})
+    if isinstance(outputs, list):
+        outputs = {output["id"].lstrip("#"): output for output in outputs}
+    sources = {}
+    for name, output in outputs.items():
+        source = output.get("outputSource") if isinstance(output, dict) else None
+        if isinstance(source, list):  # e.g., merged outputs, the first source is used
+            source = source[0] if source else None
+        if isinstance(source, str) and "/" in source:
+            sources[name] = source.lstrip("#").split("/")[0]
+    return sources
+
+
+@profiled_phase("yaml_parsing")
+def extract_inputs_from_cwl(workflow_file) -> dict:
+    """Extract the inputs of the cwl workflow file.
+
+    Parameters
+    ----------
+    workflow_file : str
+        The path to the cwl workflow file.
+
+    Returns
+    -------
+    dict
+        The type, format (None if not given) and whether it is optional (it has a default or may be null) of
+        each input, by input name.
+    """
+    with open(workflow_file, "r") as file:
+        data = yaml.safe_load(file)
+    inputs = data.get("inputs") or {}
+    if isinstance(inputs, list):
+        inputs = {input_["id"].lstrip("#"): input_ for input_ in inputs}
+    extracted = {}
+    for name, input_ in inputs.items():
+        if not isinstance(input_, dict):  # the shorthand `name: type`
+            input_ = {"type": input_}
+        input_type = input_.get("type")
+        optional = (
+            "default" in input_
+            or (isinstance(input_type, str) and input_type.endswith("?"))
+            or (isinstance(input_type, list) and "null" in input_type)
+        )
+        extracted[name] = {"type": input_type, "format": input_.get("format"), "optional": optional}
+    return extracted
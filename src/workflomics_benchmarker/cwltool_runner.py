@@ -1,7 +1,11 @@
 import os
+import shutil
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from workflomics_benchmarker.cwl_utils import extract_steps_from_cwl
 from workflomics_benchmarker.cwltool_wrapper import CWLToolWrapper
 from workflomics_benchmarker.loggingwrapper import LoggingWrapper
 
@@ -25,33 +29,40 @@ class CWLToolRunner(CWLToolWrapper):
         """
         super().__init__(args)
 
-    def _construct_command(self, workflow_path):
+    def _construct_command(self, workflow_path, input_yaml_path=None, scratch_dir=None):
         """
-        Constructs the command to run the workflow using cwltool.
+        Constructs the command to run the workflow using the executor (default: cwltool).
 
         Parameters
         ----------
         workflow_path : str
             Path to the CWL workflow file.
+        input_yaml_path : str, optional
+            Path to the input yaml file (default: the first input).
+        scratch_dir : str, optional
+            Empty directory for the files the executor needs during the run, removed once the run is over.
 
         Returns
         -------
         list
             A list of command segments to execute the workflow.
         """
-        base_command = ["cwltool"]
-        if self.container == "singularity":
-            base_command.append("--singularity")
-
+        if input_yaml_path is None:
+            input_yaml_path = self.input_yaml_path
         workflow_name = Path(workflow_path).stem
-        output_directory = os.path.join(self.outdir, f"{workflow_name}_output")
+        output_directory = os.path.join(self.input_outdir(input_yaml_path), f"{workflow_name}_output")
         Path(output_directory).mkdir(exist_ok=True)
 
-        base_command.extend(["--on-error", "continue"])
-
         return (
-            base_command
-            + ["--outdir", output_directory, workflow_path, self.input_yaml_path],
+            self.executor.command(
+                workflow_path,
+                self.run_input_yaml_paths[input_yaml_path],
+                output_directory,
+                self.container,
+                self.parallel,
+                benchmark=False,
+                scratch_dir=scratch_dir,
+            ),
             output_directory,
         )
 
@@ -85,7 +96,7 @@ class CWLToolRunner(CWLToolWrapper):
             LoggingWrapper.error(f"Workflow {workflow_name} failed.", color="red")
             return False
 
-    def execute_workflow(self, workflow_path):
+    def execute_workflow(self, workflow_path, input_yaml_path=None):
         """
         Execute a single workflow using specified parameters and log the result.
 
@@ -93,21 +104,42 @@ class CWLToolRunner(CWLToolWrapper):
         ----------
         workflow_path : str
             The path to the workflow file.
+        input_yaml_path : str, optional
+            The path to the input yaml file (default: the first input).
         """
-        command, output_directory = self._construct_command(workflow_path)
-        workflow_name = Path(workflow_path).stem
-        if self._execute_command(command, workflow_name):
-            self.success_workflows.append(workflow_name)
-        else:
-            self.failed_workflows.append(workflow_name)
+        if input_yaml_path is None:
+            input_yaml_path = self.input_yaml_path
+        scratch_dir = tempfile.mkdtemp(prefix="workflomics_run_")
+        try:
+            command, output_directory = self._construct_command(workflow_path, input_yaml_path, scratch_dir)
+            workflow_name = Path(workflow_path).stem
+            if len(self.input_yaml_paths) > 1:
+                workflow_name = f"{workflow_name} [{self.input_names[input_yaml_path]}]"
+            if self._execute_command(command, workflow_name):
+                self.success_workflows.append(workflow_name)
+            else:
+                self.failed_workflows.append(workflow_name)
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
         LoggingWrapper.info(f"Output is stored in {output_directory}.")
 
     def run_workflows(self):
         """
-        Execute all specified workflows and summarize the results.
+        Execute all specified workflows on each input and summarize the results.
         """
-        for workflow_path in self.workflows:
-            self.execute_workflow(workflow_path)
+        invalid_runs = self.preflight()
+        runs = [
+            (workflow_path, input_yaml_path)
+            for input_yaml_path in self.input_yaml_paths
+            for workflow_path in self.workflows
+            if (Path(workflow_path).name, input_yaml_path) not in invalid_runs
+        ]
+        if self.order == "name":
+            order = list(range(len(runs)))
+        else:
+            order = self.schedule([extract_steps_from_cwl(workflow_path) for workflow_path, _ in runs])
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            list(executor.map(lambda index: self.execute_workflow(*runs[index]), order))
         total_workflows = len(self.success_workflows) + len(self.failed_workflows)
         LoggingWrapper.info(
             f"Execution summary: {total_workflows} total, {len(self.success_workflows)} succeeded, {len(self.failed_workflows)} failed."
@@ -1,26 +1,58 @@
-import subprocess
+import shutil
 from pathlib import Path
 import os
 import json
+import platform
+import uuid
 import re
+import yaml
 from ruamel.yaml import YAML
 import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from typing import List, Literal, OrderedDict
+from typing import Iterator, List, Literal, OrderedDict
 
 from workflomics_benchmarker.loggingwrapper import LoggingWrapper
 from workflomics_benchmarker.cwltool_wrapper import CWLToolWrapper
 
-from workflomics_benchmarker.cwl_utils import extract_steps_from_cwl
+from workflomics_benchmarker.cwl_utils import (
+    extract_output_sources_from_cwl,
+    extract_outputs_from_cwl,
+    extract_step_dependencies_from_cwl,
+    extract_steps_from_cwl,
+)
+from workflomics_benchmarker.profiler import profiler, profiled_phase
+from workflomics_benchmarker.dedup import alias_benchmarks, alias_execution_information, deduplicate_workflows
+from workflomics_benchmarker.history import RunHistory
+from workflomics_benchmarker.isolation import (
+    CpuSetPool,
+    interference_report,
+    measure_cpu_load,
+    read_cpu_times,
+)
+from workflomics_benchmarker.log_rules import LogClassifier, load_log_rules
+from workflomics_benchmarker.messages import MessageTable
+from workflomics_benchmarker.retention import (
+    DEFAULT_COMPRESS_PATTERNS,
+    RetentionPolicy,
+    format_bytes,
+    output_paths,
+    parse_cwltool_outputs,
+)
+from workflomics_benchmarker.ranking import DEFAULT_RANKING_METRICS, rank_workflows
+from workflomics_benchmarker.resource_accounting import CgroupMonitor, map_containers_to_steps, run_with_rusage
+from workflomics_benchmarker.tool_profiles import build_tool_profiles, write_tool_profiles
+from workflomics_benchmarker.warm_pool import WarmWorkerPool, find_python_executable
 from workflomics_benchmarker.benchmark_utils import (
-    is_line_useless,
+    FAILED_STATUSES,
+    OOM_STATUS,
     create_output_dir,
-    setup_empty_benchmark_for_step,
-    step_success_pattern,
-    step_fail_pattern,
-    set_step_status_to_failed,
-    benchmark_successful_step_execution,
-    benchmark_failed_step_execution
+    benchmark_steps,
+    benchmark_step_resource_usage,
+    benchmark_workflow_timing,
+    classify_oom_steps,
+    step_seconds,
 )
 
 
@@ -48,11 +80,98 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
         "6-7": -0.75,
         "8+": -1,
     }
+    CPU_TIME_DESIRABILITY_BINS = {
+        "0-300": 1,
+        "301-900": 0.75,
+        "901-1800": 0.5,
+        "1801-3600": 0.25,
+        "3601+": 0,
+    }
+    IO_DESIRABILITY_BINS = {
+        "0-1000": 1,
+        "1001-5000": 0.75,
+        "5001-10000": 0.5,
+        "10001-50000": 0.25,
+        "50001+": 0,
+    }
+    CPU_EFFICIENCY_DESIRABILITY_BINS = {
+        "0-24": 0,
+        "25-49": 0.25,
+        "50-74": 0.5,
+        "75-89": 0.75,
+        "90+": 1,
+    }
+    RESOURCE_USAGE_BENCHMARKS = ["cpu_user", "cpu_system", "io_read", "io_write"]
+    # how often (in seconds) a stop requested from another thread is checked while the runs are waited for
+    STOP_CHECK_INTERVAL = 0.25
 
     def __init__(self, args):
+        """
+        Raises
+        ------
+        ValueError
+            If the log rules cannot be loaded, the runs cannot be isolated or the warm workers cannot be used, in
+            addition to the errors of `CWLToolWrapper`.
+        """
+        # the log rules are checked before the inputs are edited or staged
+        if hasattr(args, 'log_rules') and args.log_rules is not None:
+            try:
+                self.log_classifier = LogClassifier(load_log_rules(args.log_rules))
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                raise ValueError(f"Could not load the log rules: {e}") from e
+        else:
+            self.log_classifier = LogClassifier()
         super().__init__(args)
+        self.profile = hasattr(args, 'profile') and args.profile
+        self.profile_output = args.profile_output if hasattr(args, 'profile_output') else None
+        self.record_history = not (hasattr(args, 'no_history') and args.no_history)
+        self.history_db = args.history_db if hasattr(args, 'history_db') else None
+        self.run_id = uuid.uuid4().hex
+        if hasattr(args, 'retention') and args.retention:
+            self.retention = RetentionPolicy(
+                int(args.retention_keep_under * 2**20) if hasattr(args, 'retention_keep_under') else 2**20,
+                args.retention_compress if hasattr(args, 'retention_compress') else DEFAULT_COMPRESS_PATTERNS,
+            )
+        else:
+            self.retention = None
+        self.log_rules_report = hasattr(args, 'log_rules_report') and args.log_rules_report
+        self.message_table = MessageTable() if hasattr(args, 'dedupe_messages') and args.dedupe_messages else None
+        self.rank_metrics = args.rank_by if hasattr(args, 'rank_by') and args.rank_by else DEFAULT_RANKING_METRICS
+        if hasattr(args, 'isolate') and args.isolate:
+            try:
+                self.cpu_pool = CpuSetPool(
+                    self.jobs,
+                    args.cpus_per_run if hasattr(args, 'cpus_per_run') else None,
+                    args.numa_node if hasattr(args, 'numa_node') else None,
+                )
+            except ValueError as e:
+                raise ValueError(f"Could not isolate the workflow runs: {e}") from e
+        else:
+            self.cpu_pool = None
+        self.interference_threshold = args.interference_threshold if hasattr(args, 'interference_threshold') else 0.1
+        self.interference_reruns = args.interference_reruns if hasattr(args, 'interference_reruns') and args.interference_reruns else 0
+        self.memory_limit = args.memory_limit if hasattr(args, 'memory_limit') else None
+        self.workflow_memory_limit = args.workflow_memory_limit if hasattr(args, 'workflow_memory_limit') else None
+        if self.container != "docker" and (self.memory_limit is not None or self.workflow_memory_limit is not None):
+            LoggingWrapper.warning("The memory ceilings are enforced through docker, they are not enforced with singularity.")
+        elif not self.executor.container_ids and (self.memory_limit is not None or self.workflow_memory_limit is not None):
+            LoggingWrapper.warning(f"The step containers of {self.executor} are not followed, the memory ceilings are not enforced.")
+        self.warm_workers = hasattr(args, 'warm_workers') and args.warm_workers
+        if self.warm_workers:
+            try:
+                if not self.executor.preloadable:
+                    raise ValueError(f"{self.executor} cannot be preloaded.")
+                find_python_executable(self.executor.executable)
+            except (OSError, ValueError) as e:
+                raise ValueError(f"Could not use warm cwltool workers: {e}") from e
+        if self.warm_workers and self.cpu_pool is not None and self.cpu_pool.numactl is not None:
+            LoggingWrapper.warning("The warm cwltool workers are not started with numactl, only their containers use the memory of the NUMA node.")
+        self.warm_pool = None
+        self._warm_pool_lock = threading.Lock()
+        self.dedupe_workflows = hasattr(args, 'dedupe_workflows') and args.dedupe_workflows
+        self.aliases = {}
 
-    def execute_and_benchmark_workflow(self, workflow, workflow_name) -> dict:
+    def execute_and_benchmark_workflow(self, workflow, workflow_name, input_yaml_path=None, steps=None) -> dict:
         """
         Execute a single workflow, save the outputs and benchmark each step, i.e., tool, of the workflow.
         TODO: Split into execute and benchmark functions.
@@ -62,6 +181,10 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
             The path to the workflow file.
         workflow_name: str
             The original name of the workflow file.
+        input_yaml_path: str, optional
+            The path to the input yaml file to run the workflow on (default: the first input).
+        steps: List[str], optional
+            The names of the steps of the workflow, if they were already extracted from the workflow file.
 
         Returns
         -------
@@ -69,75 +192,119 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
             A dictionary containing the benchmark results of the workflow.
         """
         workflow_execution_information = {}
+        if input_yaml_path is None:
+            input_yaml_path = self.input_yaml_path
 
-        command = ["cwltool"]
-
-        if self.container == "singularity":  # use singularity if the flag is set
+        if self.container == "singularity":
             LoggingWrapper.warning(
                 "Using singularity container, memory usage will not be calculated."
             )
-            command.append("--singularity")
 
-        workflow_outdir = create_output_dir(self.outdir, workflow_name)
+        workflow_outdir = create_output_dir(self.input_outdir(input_yaml_path), workflow_name)
 
-        command.extend(
-            [
-                "--on-error",
-                "continue",
-                "--disable-color",
-                "--timestamps",
-                "--outdir",
-                workflow_outdir,
-                workflow,
-                self.input_yaml_path,
-            ]
-        )  # add the required option in cwltool to disable color and timestamps to enable benchmarking
-        steps = extract_steps_from_cwl(workflow)
-
-        result = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            encoding="utf-8",
-        )  # run the workflow
+        # the executor records the id of each step container, to account the CPU and I/O usage of its cgroup
+        cidfile_dir = tempfile.mkdtemp(prefix="workflomics_cid_")
+        scratch_dir = tempfile.mkdtemp(prefix="workflomics_run_")
+        executor_command = self.executor.command(
+            workflow,
+            self.run_input_yaml_paths[input_yaml_path],
+            workflow_outdir,
+            self.container,
+            self.parallel,
+            cidfile_dir if self.executor.container_ids else None,
+            scratch_dir=scratch_dir,
+            memory_limit=self.memory_limit,
+        )
+        if steps is None:
+            steps = extract_steps_from_cwl(workflow)
+        dependencies = extract_step_dependencies_from_cwl(workflow)
+
+        # in isolation mode, the run and its containers only use a dedicated set of CPUs
+        cpus = self.cpu_pool.acquire() if self.cpu_pool is not None else None
+        command = executor_command
+        if cpus is not None:  # pin the run, and bind its memory to the NUMA node, if any
+            command = self.cpu_pool.command_prefix(cpus) + command
+        try:
+            monitor = CgroupMonitor(
+                cidfile_dir,
+                cpus=cpus,
+                numa_node=self.cpu_pool.numa_node if cpus else None,
+                memory_limit=self.memory_limit,
+                workflow_memory_limit=self.workflow_memory_limit,
+            )
+            with profiler.phase("cwltool_execution"):
+                if cpus is not None:
+                    load_before = measure_cpu_load(cpus)
+                    cpu_times_before = read_cpu_times()
+                monitor.start()
+                line_times = []  # the step boundaries are timed when the log lines arrive
+                if self.warm_workers:  # run the workflow in a preloaded cwltool
+                    cwltool_output, returncode, rusage = self.get_warm_pool().run(executor_command[1:], cpus, line_times)
+                else:
+                    cwltool_output, returncode, rusage = run_with_rusage(command, line_times)  # run the workflow
+                container_usage = monitor.stop()
+                if cpus is not None:
+                    rusage["cores"] = len(cpus)  # the run could only use its CPU set
+                    cpu_times_after = read_cpu_times()
+        finally:
+            if cpus is not None:
+                self.cpu_pool.release(cpus)
+            shutil.rmtree(cidfile_dir, ignore_errors=True)
+            shutil.rmtree(scratch_dir, ignore_errors=True)
         if self.verbose:
-            print(result.stdout)
-        cwltool_output_lines = result.stdout.split("\n")
-
-        # Set of step names that were executed successfully.
-        successfully_executed_steps = set()
-        failed_steps = set()
-
-        step_results = [setup_empty_benchmark_for_step(tool) for tool in steps]
-        # iterate over the output of the workflow and find which steps were executed successfully
-        for line in cwltool_output_lines:
-            successful_match = step_success_pattern(line)
-            if successful_match:
-                successfully_executed_steps.add(successful_match.group(1))
-            else:
-                failed_match = step_fail_pattern(line)
-                if failed_match:
-                    failed_tool_name = (
-                        failed_match.group(1)
-                        if failed_match.group(1) is not None
-                        else failed_match.group(2)
-                    )
-                    failed_steps.add(failed_tool_name)
+            print(cwltool_output)
 
-        # iterate over the output of the workflow and find the benchmark values for each step
-        step_results = benchmark_successful_step_execution(successfully_executed_steps, cwltool_output_lines, step_results, workflow_outdir)
-        step_results = benchmark_failed_step_execution(failed_steps, cwltool_output_lines, step_results)
+        with profiler.phase("log_parsing"):
+            cwltool_output_lines = cwltool_output.split("\n")
+            step_results = benchmark_steps(
+                steps, cwltool_output_lines, workflow_outdir, self.log_classifier, line_times, self.step_output_files(workflow, cwltool_output)
+            )
+            step_results = benchmark_step_resource_usage(step_results, cwltool_output_lines, container_usage, monitor.images)
+            step_results = classify_oom_steps(
+                step_results, cwltool_output_lines, monitor.memory, monitor.killed, self.memory_limit, monitor.unlimited
+            )
+            containers = map_containers_to_steps(cwltool_output_lines)
+            unlimited_steps = sorted({containers[cidfile] for cidfile in monitor.unlimited if cidfile in containers})
+            timing = benchmark_workflow_timing(step_results, dependencies)
+        isolation = None
+        if cpus is not None:
+            own_cpu_seconds = rusage["cpu_user"] + rusage["cpu_system"] + sum(
+                usage["cpu_user"] + usage["cpu_system"] for usage in container_usage.values()
+            )
+            isolation = interference_report(
+                cpus, load_before, cpu_times_before, cpu_times_after, rusage["elapsed"], own_cpu_seconds, self.interference_threshold
+            )
+            for entry in step_results:
+                if entry["status"] != "-":
+                    entry["interference"] = isolation["load_during"]
+        retention = None
+        if self.retention is not None:  # all the metrics are extracted, the outputs are not needed anymore
+            with profiler.phase("output_retention"):
+                retention = self.apply_retention(workflow_name, cwltool_output, workflow_outdir)
+        for entry in step_results:
+            if entry["status"] == OOM_STATUS:
+                LoggingWrapper.warning(
+                    f"{entry['step']} of {workflow_name} was killed after using {entry['memory']} MiB of memory ({entry['oom_kill']})."
+                )
         workflow_status = "✓"
         for entry in step_results:  # check if the workflow was executed successfully
-            if entry["status"] == "✗" or entry["status"] == "-":
+            if entry["status"] in FAILED_STATUSES or entry["status"] == "-":
                 workflow_status = "✗"
                 break
+        if not self.executor.step_logs and all(entry["status"] == "-" for entry in step_results):
+            # the steps could not be followed in the log, only the outcome of the run is known
+            workflow_status = "✓" if returncode == 0 else "✗"
 
         workflow_execution_information = {
+            "workflow": self.run_name(workflow_name, input_yaml_path),
             "n_steps": len(steps),
             "status": workflow_status,
             "steps": step_results,
+            "rusage": rusage,
+            "timing": timing,
+            "retention": retention,
+            "isolation": isolation,
+            "unlimited_steps": unlimited_steps,
         }
 
         LoggingWrapper.info(
@@ -146,6 +313,68 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
 
         return workflow_execution_information
 
+    def step_output_files(self, workflow, cwltool_output) -> dict:
+        """
+        Find the final output files of each step of an executed workflow, from the output object cwltool printed.
+
+        Returns
+        -------
+        dict
+            The paths to the output files of each step that produces final outputs of the workflow.
+        """
+        outputs = parse_cwltool_outputs(cwltool_output)
+        if outputs is None:
+            return {}
+        output_files = {}
+        for output, step in extract_output_sources_from_cwl(workflow).items():
+            output_files.setdefault(step, []).extend(sorted(output_paths(outputs, [output])))
+        return output_files
+
+    def get_warm_pool(self) -> WarmWorkerPool:
+        """Return the pool of warm cwltool workers, starting one worker per job on first use."""
+        with self._warm_pool_lock:
+            if self.warm_pool is None:
+                self.warm_pool = WarmWorkerPool(self.jobs, self.executor.executable)
+            return self.warm_pool
+
+    def close_warm_pool(self):
+        """Stop the warm cwltool workers, if they were started."""
+        with self._warm_pool_lock:
+            if self.warm_pool is not None:
+                self.warm_pool.close()
+                self.warm_pool = None
+
+    def apply_retention(self, workflow_name, cwltool_output, workflow_outdir) -> dict | None:
+        """
+        Delete or compress the outputs of a workflow according to the retention policy, keeping its final outputs.
+
+        Parameters
+        ----------
+        workflow_name: str
+            The original name of the workflow file.
+        cwltool_output: str
+            The output of the cwltool execution of the workflow.
+        workflow_outdir: str
+            The output directory of the workflow.
+
+        Returns
+        -------
+        dict | None
+            The number of bytes reclaimed and of files deleted and compressed, None if the final outputs of the
+            workflow could not be determined and all its outputs were kept.
+        """
+        outputs = parse_cwltool_outputs(cwltool_output)
+        if outputs is None:
+            LoggingWrapper.warning(f"Could not find the final outputs of {workflow_name}, keeping all its outputs.")
+            return None
+        final_outputs = output_paths(outputs, extract_outputs_from_cwl(Path(self.workflows_dir).joinpath(workflow_name)))
+        retention = self.retention.apply(workflow_outdir, final_outputs)
+        LoggingWrapper.info(
+            f"Reclaimed {format_bytes(retention['reclaimed'])} from the outputs of {workflow_name} "
+            f"({retention['deleted']} files deleted, {retention['compressed']} compressed)."
+        )
+        return retention
+
     def count_successful_steps(self, all_tools_exe) -> int:
         """Count the number of steps that were executed successfully.
 
@@ -177,11 +406,23 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
         value: int | Literal["✗", "N/A"]
             The value of the benchmark.
         """
+        if benchmark_name in self.RESOURCE_USAGE_BENCHMARKS or benchmark_name == "cpu_efficiency":
+            return self.aggregate_resource_usage(benchmark_name, workflow_execution_information)
+        timing = workflow_execution_information.get("timing")
+        if benchmark_name in ["critical_path", "parallelism"]:
+            return timing[benchmark_name] if timing else "N/A"
+        if benchmark_name == "time" and self.parallel and timing and timing["wall_clock"] != "N/A":
+            # with parallel steps, the sum of the step times overstates what users wait for
+            return timing["wall_clock"]
+        if benchmark_name == "status" and not self.executor.step_logs and all(
+            tool_execution["status"] == "-" for tool_execution in workflow_execution_information["steps"]
+        ):  # the steps could not be followed in the log, the status is that of the run
+            return workflow_execution_information["status"]
         value: int = 0
         for tool_execution in workflow_execution_information["steps"]:
             match benchmark_name:
                 case "status":
-                    if tool_execution[benchmark_name] != "✗" and tool_execution[benchmark_name] != "-":
+                    if tool_execution[benchmark_name] not in FAILED_STATUSES and tool_execution[benchmark_name] != "-":
                         value = "✓"
                     else:
                         return f"({self.count_successful_steps(workflow_execution_information['steps'])}/{len(workflow_execution_information['steps'])}) ✗"
@@ -204,6 +445,45 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
                         value = value + tool_execution[benchmark_name]
         return value
 
+    def aggregate_resource_usage(
+        self, benchmark_name, workflow_execution_information
+    ) -> float | Literal["N/A"]:
+        """Calculate the total CPU time or block I/O, or the overall CPU efficiency, of the given workflow.
+
+        When no step was accounted through its container cgroup and the steps run as descendants of cwltool
+        (i.e., not in docker containers), the usage of the whole cwltool process tree, collected with wait4, is
+        used instead. It includes the CPU time and I/O of cwltool itself.
+
+        Parameters
+        ----------
+        benchmark_name: str
+            The name of the benchmark to calculate.
+
+        Returns
+        -------
+        value: float | Literal["N/A"]
+            The value of the benchmark.
+        """
+        steps = [
+            tool_execution
+            for tool_execution in workflow_execution_information["steps"]
+            if isinstance(tool_execution.get(benchmark_name), (int, float))
+        ]
+        rusage = workflow_execution_information.get("rusage")
+        if not steps and (rusage is None or self.container == "docker"):
+            return "N/A"
+        if benchmark_name == "cpu_efficiency":
+            if steps:
+                # the efficiency of the steps, weighted by their execution time
+                total_time = sum(step_seconds(tool_execution) for tool_execution in steps)
+                return round(sum(tool_execution["cpu_efficiency"] * step_seconds(tool_execution) for tool_execution in steps) / total_time, 1)
+            return round(100 * (rusage["cpu_user"] + rusage["cpu_system"]) / (rusage["elapsed"] * rusage["cores"]), 1)
+        if steps:
+            return round(sum(tool_execution[benchmark_name] for tool_execution in steps), 2)
+        if benchmark_name in ["io_read", "io_write"]:
+            return round(rusage[benchmark_name] / 2**20, 2)
+        return round(rusage[benchmark_name], 2)
+
     def calc_desirability(self, benchmark_name, value, status="✓"):
         """Calculate the desirability for the given benchmark value.
 
@@ -259,13 +539,42 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
                 if value == 0 or value > 1000:
                     return -1
                 return 1
+            case "cpu_user" | "cpu_system":
+                if value in ["-", "N/A"]:
+                    return 0
+                elif status == "✗":
+                    return -1
+                bins = self.CPU_TIME_DESIRABILITY_BINS
+            case "io_read" | "io_write":
+                if value in ["-", "N/A"]:
+                    return 0
+                elif status == "✗":
+                    return -1
+                bins = self.IO_DESIRABILITY_BINS
+            case "cpu_efficiency":
+                if value in ["-", "N/A"]:
+                    return 0
+                elif status == "✗":
+                    return -1
+                bins = self.CPU_EFFICIENCY_DESIRABILITY_BINS
+            case "critical_path":
+                if value in ["-", "N/A"]:
+                    return 0
+                elif status == "✗":
+                    return -1
+                bins = self.EXECUTION_TIME_DESIRABILITY_BINS
+            case "parallelism":
+                # informative only, a linear workflow cannot run any step in parallel
+                return 0
 
-        for key, value in bins.items():
-            if "-" in key:
-                if value <= int(key.split("-")[1]):
-                    return bins[key]
+        if not isinstance(value, (int, float)):
+            return 0
+        for bin_range, desirability in bins.items():
+            if "-" in bin_range:
+                if value <= int(bin_range.split("-")[1]):
+                    return desirability
             else:
-                return bins[key]
+                return desirability
         return 0
 
     def get_step_benchmarks(self, name, workflow_execution_information) -> List[dict]:
@@ -284,12 +593,20 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
         benchmark = []
         # iterate over the steps and store the benchmark values for each step
         for entry in workflow_execution_information["steps"]:
-            # each step 'entry' is either having a numeric value, or is "N/A" in case it was not executed. Special case are the status entries, which are either "✓", "✗" or "-" (when not reached).
+            # each step 'entry' is either having a numeric value, or is "N/A" in case it was not executed. Special case are the status entries, which are either "✓", "✗", "OOM" (when killed for its memory usage) or "-" (when not reached).
             val = entry[name]
             tooltip = {}
             if name == "errors" or name == "warnings":
                 if (val) != "N/A" and len(entry[name]) > 0:
-                    tooltip = {"tooltip": entry[name]}
+                    if self.message_table is None:
+                        tooltip = {"tooltip": entry[name]}
+                    else:  # refer to the interned messages instead of repeating them
+                        tooltip = {"messages": self.message_table.intern_step_messages(
+                            entry[name],
+                            name.rstrip("s"),
+                            workflow_execution_information.get("workflow", "-"),
+                            entry["step"].rstrip("_0123456789"),
+                        )}
                     val = len(entry[name])
                 else:
                     val = 0
@@ -300,10 +617,17 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
                 ),  # Label the step without the number at the end
                 "value": val,
                 "desirability": (
-                    -1 if entry["status"] == "✗" else self.calc_desirability(name, val)
+                    -1 if entry["status"] in FAILED_STATUSES else self.calc_desirability(name, val)
                 ),
             }
             step_benchmark.update(tooltip)
+            if name == "time" and isinstance(entry["time_ms"], float):
+                step_benchmark["value_ms"] = entry["time_ms"]
+            if name == "memory" and entry["status"] == OOM_STATUS:  # the value is the peak memory at the kill
+                step_benchmark["oom_kill"] = entry["oom_kill"]
+            isolation = workflow_execution_information.get("isolation")
+            if isolation is not None and isolation["interfered"] and entry["status"] != "-":
+                step_benchmark["interfered"] = True  # measured under interference, less reliable
             benchmark.append(step_benchmark)
         return benchmark
 
@@ -330,7 +654,7 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
             A dictionary containing the benchmark data.
 
         """
-        return {
+        benchmark = {
                 "description": description,
                 "title": title,
                 "unit": unit,
@@ -342,8 +666,20 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
                 },
                 "steps": self.get_step_benchmarks(key, workflow_execution_information),
             }
+        if key == "time":  # the value in seconds is kept for compatibility, the steps are timed to the millisecond
+            benchmark["aggregate_value"]["value_ms"] = self.aggregate_time_ms(workflow_execution_information)
+        return benchmark
+
+    def aggregate_time_ms(self, workflow_execution_information) -> float | Literal["N/A"]:
+        """Return the execution time of the workflow in milliseconds, see `aggregate_workflow_benchmark_value`."""
+        timing = workflow_execution_information.get("timing")
+        if self.parallel and timing and timing.get("wall_clock_ms", "N/A") != "N/A":
+            return timing["wall_clock_ms"]
+        times = [step["time_ms"] for step in workflow_execution_information["steps"] if isinstance(step.get("time_ms"), float)]
+        return round(sum(times), 1) if times else "N/A"
         
 
+    @profiled_phase("scoring")
     def compute_technical_benchmarks(self,workflow_execution_information) -> List[dict]:
         """
         Compute the technical benchmarks for the workflow.
@@ -401,9 +737,59 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
             "go_terms",
         workflow_execution_information))
 
+        technical_benchmarks.append(self.create_benchmark(
+            "CPU time spent in user mode for each step in the workflow",
+            "CPU user time",
+            "seconds",
+            "cpu_user",
+        workflow_execution_information))
+
+        technical_benchmarks.append(self.create_benchmark(
+            "CPU time spent in kernel mode for each step in the workflow",
+            "CPU system time",
+            "seconds",
+            "cpu_system",
+        workflow_execution_information))
+
+        technical_benchmarks.append(self.create_benchmark(
+            "Data read from block devices for each step in the workflow",
+            "I/O read",
+            "MB",
+            "io_read",
+        workflow_execution_information))
+
+        technical_benchmarks.append(self.create_benchmark(
+            "Data written to block devices for each step in the workflow",
+            "I/O write",
+            "MB",
+            "io_write",
+        workflow_execution_information))
+
+        technical_benchmarks.append(self.create_benchmark(
+            "CPU time over the execution time multiplied by the available cores, for each step in the workflow",
+            "CPU efficiency",
+            "%",
+            "cpu_efficiency",
+        workflow_execution_information))
+
+        technical_benchmarks.append(self.create_benchmark(
+            "Execution time of the longest chain of dependent steps, i.e., the shortest possible time with unlimited parallelism",
+            "Critical path",
+            "seconds",
+            "critical_path",
+        workflow_execution_information))
+
+        technical_benchmarks.append(self.create_benchmark(
+            "Sum of the step execution times over the wall-clock time of the workflow, and the number of steps running concurrently with each step",
+            "Parallelism",
+            "steps",
+            "parallelism",
+        workflow_execution_information))
+
         return technical_benchmarks
 
     
+    @profiled_phase("yaml_parsing")
     def append_to_yaml_file(self, original_file_path):
         yaml = YAML()
         yaml.indent(mapping=3)
@@ -455,56 +841,352 @@ class CWLToolRuntimeBenchmark(CWLToolWrapper):
 
 
 
-    def run_workflows(self) -> None:
-        """Run the workflows in the given directory and store the results in a json file."""
-        success_workflows = []
-        failed_workflows = []
-        workflows_benchmarks = []
+    def prepare_workflows(self, workflows: List[str] = None) -> List[tuple]:
+        """
+        Parse each workflow once, so that it can be run on any number of inputs.
 
-        for (
-            workflow_path
-        ) in self.workflows:  # iterate over the workflows and execute them
+        Parameters
+        ----------
+        workflows : List[str], optional
+            The paths to the workflow files (default: all the workflows in the workflows directory).
+
+        Returns
+        -------
+        List[tuple]
+            The name of each workflow, the path to the workflow file to execute and the names of its steps.
+        """
+        prepared_workflows = []
+        for workflow_path in self.workflows if workflows is None else workflows:
             workflow_name = Path(workflow_path).name
-            LoggingWrapper.info("Benchmarking " + workflow_name + "...", color="green")
-            workflow_path= self.append_to_yaml_file(workflow_path)
-            workflow_execution_information = self.execute_and_benchmark_workflow(workflow_path, workflow_name)
-            
-            if (workflow_execution_information["status"] == "✗"): 
-                LoggingWrapper.error(workflow_name + " failed")
-                failed_workflows.append(workflow_name)
+            with profiler.workflow(workflow_name):
+                prepared_workflows.append(
+                    (workflow_name, self.append_to_yaml_file(workflow_path), extract_steps_from_cwl(workflow_path))
+                )
+        return prepared_workflows
+
+    def run_name(self, workflow_name, input_yaml_path) -> str:
+        """Return the name identifying the run of a workflow on an input in the logs."""
+        if len(self.input_yaml_paths) == 1:
+            return workflow_name
+        return f"{workflow_name} [{self.input_names[input_yaml_path]}]"
+
+    def benchmark_workflow(self, workflow_name, workflow_path, steps, input_yaml_path) -> tuple:
+        """
+        Execute and benchmark a parsed workflow on the given input.
+
+        Parameters
+        ----------
+        workflow_name: str
+            The original name of the workflow file.
+        workflow_path: str
+            The path to the workflow file to execute.
+        steps: List[str]
+            The names of the steps of the workflow.
+        input_yaml_path: str
+            The path to the input yaml file.
+
+        Returns
+        -------
+        tuple
+            The execution information of the workflow and its benchmark results, as stored in the json file.
+        """
+        run_name = self.run_name(workflow_name, input_yaml_path)
+        LoggingWrapper.info("Benchmarking " + run_name + "...", color="green")
+        with profiler.workflow(run_name):
+            for attempt in range(1 + self.interference_reruns):
+                workflow_execution_information = self.execute_and_benchmark_workflow(
+                    workflow_path, workflow_name, input_yaml_path, steps
+                )
+                isolation = workflow_execution_information["isolation"]
+                if isolation is None or not isolation["interfered"]:
+                    break
+                LoggingWrapper.warning(
+                    f"{run_name} ran under interference (CPU load {isolation['load_before']:.0%} before, "
+                    f"{isolation['load_during']:.0%} during the run)"
+                    + (", running it again." if attempt < self.interference_reruns else ".")
+                )
+            if isolation is not None:
+                isolation["attempts"] = attempt + 1
+
+            if (workflow_execution_information["status"] == "✗"):
+                LoggingWrapper.error(run_name + " failed")
             else:
                 LoggingWrapper.info(
-                    workflow_name + " finished successfully.", color="green"
+                    run_name + " finished successfully.", color="green"
                 )
-                success_workflows.append(workflow_name)
-            
-            # store the benchmark results for each workflow in a json file
-            all_workflow_data = {
+
+            inputs = self.inputs[input_yaml_path]
+            workflow_benchmarks = {
                 "workflowName": workflow_name,
-                "executor": "cwltool " + self.version,
-                "runID": "39eddf71ea1700672984653",
+                "executor": f"{self.executor} {self.version}",
+                "runID": self.run_id,
                 "inputs": {
-                    key: {"filename": self.input[key]["filename"]} for key in self.input
+                    key: {"filename": inputs[key]["filename"]} for key in inputs
                 },
                 "benchmarks": self.compute_technical_benchmarks(workflow_execution_information),
             }
+            if isolation is not None:
+                workflow_benchmarks["isolation"] = isolation
+            if self.memory_limit is not None or self.workflow_memory_limit is not None:
+                workflow_benchmarks["memory_limits"] = {"step": self.memory_limit, "workflow": self.workflow_memory_limit}
+                if workflow_execution_information.get("unlimited_steps"):
+                    workflow_benchmarks["memory_limits"]["unlimited_steps"] = workflow_execution_information["unlimited_steps"]
+            return workflow_execution_information, workflow_benchmarks
 
-            workflows_benchmarks.append(all_workflow_data)
+    def aggregate_across_inputs(self, benchmarks_by_input: dict) -> List[dict]:
+        """
+        Aggregate the benchmarks of each workflow over all the inputs it was run on.
+        The aggregate desirability of each benchmark is the mean of its desirability over the inputs.
 
-        with open(os.path.join(self.outdir, "benchmarks.json"), "w") as f:
-            json.dump(workflows_benchmarks, f, indent=3)
-            LoggingWrapper.info(
-                "Benchmark results stored in "
-                + os.path.join(self.outdir, "benchmarks.json"),
-                color="green",
+        Parameters
+        ----------
+        benchmarks_by_input: dict
+            The benchmark results of the workflows, keyed by the name of the input.
+
+        Returns
+        -------
+        List[dict]
+            The aggregated benchmarks for each workflow.
+        """
+        aggregated = {}
+        for input_name, workflows_benchmarks in benchmarks_by_input.items():
+            for workflow_benchmarks in workflows_benchmarks:
+                workflow = aggregated.setdefault(
+                    workflow_benchmarks["workflowName"],
+                    {
+                        "workflowName": workflow_benchmarks["workflowName"],
+                        "executor": workflow_benchmarks["executor"],
+                        "runID": workflow_benchmarks["runID"],
+                        "benchmarks": {},
+                    },
+                )
+                for benchmark in workflow_benchmarks["benchmarks"]:
+                    aggregated_benchmark = workflow["benchmarks"].setdefault(
+                        benchmark["title"],
+                        {
+                            "description": benchmark["description"],
+                            "title": benchmark["title"],
+                            "unit": benchmark["unit"],
+                            "per_input": {},
+                        },
+                    )
+                    aggregated_benchmark["per_input"][input_name] = benchmark["aggregate_value"]
+
+        for workflow in aggregated.values():
+            for benchmark in workflow["benchmarks"].values():
+                desirabilities = [value["desirability"] for value in benchmark["per_input"].values()]
+                benchmark["aggregate_value"] = {"desirability": sum(desirabilities) / len(desirabilities)}
+            workflow["benchmarks"] = list(workflow["benchmarks"].values())
+        return list(aggregated.values())
+
+    def iter_workflow_benchmarks(self, stop: threading.Event = None) -> Iterator[tuple]:
+        """
+        Run the workflows in the given directory on each input, yielding the results of each run as soon as it
+        completes. The results are also kept, in the matrix order, to be stored by `store_results`.
+
+        Parameters
+        ----------
+        stop : threading.Event, optional
+            When it is set, e.g., from another thread, the runs that did not start yet are cancelled and the
+            iteration ends once the running ones completed, without yielding their results.
+
+        Yields
+        ------
+        tuple
+            The name of the workflow, the name of the input, the execution information of the run and its
+            benchmark results, as stored in the json file.
+        """
+        if self.profile:
+            profiler.enable(self.profile_output)
+
+        invalid_runs = self.preflight()
+        workflow_paths = [
+            workflow_path
+            for workflow_path in self.workflows
+            if any((Path(workflow_path).name, input_yaml_path) not in invalid_runs for input_yaml_path in self.input_yaml_paths)
+        ]
+        if self.dedupe_workflows:  # the structurally equivalent workflows are only executed once
+            _, self.aliases = deduplicate_workflows(workflow_paths)
+        prepared_workflows = self.prepare_workflows(workflow_paths)
+        self.runs = [
+            (workflow_name, workflow_path, steps, input_yaml_path)
+            for input_yaml_path in self.input_yaml_paths
+            for (workflow_name, workflow_path, steps) in prepared_workflows
+            if (workflow_name, input_yaml_path) not in invalid_runs
+        ]
+        self.results = [None] * len(self.runs)
+        # the runs of the aliases of each run, which get its results instead of being executed
+        run_indices = {(workflow_name, input_yaml_path): index for index, (workflow_name, _, _, input_yaml_path) in enumerate(self.runs)}
+        alias_runs = {}
+        for index, (workflow_name, _, _, input_yaml_path) in enumerate(self.runs):
+            if workflow_name in self.aliases and (self.aliases[workflow_name][0], input_yaml_path) in run_indices:
+                alias_runs.setdefault(run_indices[(self.aliases[workflow_name][0], input_yaml_path)], []).append(index)
+        deduplicated = {index for indices in alias_runs.values() for index in indices}
+        # run the workflows x inputs matrix, at most `jobs` runs at a time
+        executor = ThreadPoolExecutor(max_workers=self.jobs)
+        try:
+            futures = {
+                executor.submit(self.benchmark_workflow, *self.runs[index]): index
+                for index in self.schedule([steps for _, _, steps, _ in self.runs])
+                if index not in deduplicated
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=self.STOP_CHECK_INTERVAL, return_when=FIRST_COMPLETED)
+                if stop is not None and stop.is_set():
+                    return
+                for future in done:
+                    index = futures[future]
+                    self.results[index] = future.result()
+                    for run_index in [index] + alias_runs.get(index, []):
+                        if run_index != index:
+                            self.results[run_index] = self.alias_results(index, run_index)
+                        workflow_name, _, _, input_yaml_path = self.runs[run_index]
+                        yield (workflow_name, self.input_names[input_yaml_path]) + self.results[run_index]
+        finally:  # the runs that did not start yet are cancelled if the iteration is stopped early
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.close_warm_pool()
+
+    def alias_results(self, index: int, alias_index: int) -> tuple:
+        """
+        Return the results of a run for the run of a structurally equivalent workflow on the same input, which
+        is not executed, with the names and the order of the steps of that workflow.
+
+        Parameters
+        ----------
+        index : int
+            The index of the executed run in `self.runs`.
+        alias_index : int
+            The index of the run of the equivalent workflow in `self.runs`.
+
+        Returns
+        -------
+        tuple
+            The execution information and the benchmark results of the run of the equivalent workflow.
+        """
+        _, _, steps, input_yaml_path = self.runs[index]
+        alias_name, _, alias_steps, _ = self.runs[alias_index]
+        step_mapping = self.aliases[alias_name][1]
+        workflow_execution_information, workflow_benchmarks = self.results[index]
+        return (
+            alias_execution_information(
+                workflow_execution_information, alias_steps, step_mapping, self.run_name(alias_name, input_yaml_path)
+            ),
+            alias_benchmarks(workflow_benchmarks, alias_name, alias_steps, step_mapping, steps),
+        )
+
+    def run_workflows(self) -> None:
+        """Run the workflows in the given directory on each input and store the results in a json file."""
+        for _ in self.iter_workflow_benchmarks():
+            pass
+        self.store_results()
+
+    def write_results(self, benchmarks_by_input: dict) -> None:
+        """
+        Rank the benchmarked workflows and store them in `benchmarks.json`, with the profiles of the tools over
+        all the workflows in `tool_profiles.json`, and the log rule report and the message table if requested.
+        The files are replaced atomically, so that they can be read at any time.
+
+        Parameters
+        ----------
+        benchmarks_by_input : dict
+            The benchmark results of the workflows run on each input, by input name.
+        """
+        if len(self.input_yaml_paths) == 1:
+            [benchmarks_json] = benchmarks_by_input.values()
+        else:
+            benchmarks_json = {
+                "inputs": benchmarks_by_input,
+                "aggregate": self.aggregate_across_inputs(benchmarks_by_input),
+            }
+
+        with profiler.phase("scoring"):
+            for ranked_workflows in benchmarks_by_input.values():
+                rank_workflows(ranked_workflows, self.rank_metrics)
+            if len(self.input_yaml_paths) > 1:
+                rank_workflows(benchmarks_json["aggregate"], self.rank_metrics)
+
+        benchmarks_path = os.path.join(self.outdir, "benchmarks.json")
+        with profiler.phase("json_writing"):
+            with tempfile.NamedTemporaryFile("w", dir=self.outdir, delete=False, suffix=".json") as f:
+                json.dump(benchmarks_json, f, indent=3)
+            os.replace(f.name, benchmarks_path)
+            LoggingWrapper.info("Benchmark results stored in " + benchmarks_path, color="green")
+            tool_profiles_path = write_tool_profiles(build_tool_profiles(benchmarks_by_input), self.outdir)
+            LoggingWrapper.info("Tool profiles stored in " + tool_profiles_path)
+        if self.log_rules_report:
+            with profiler.phase("json_writing"), open(os.path.join(self.outdir, "log_rules_report.json"), "w") as f:
+                json.dump(self.log_classifier.report(), f, indent=3)
+            LoggingWrapper.info("Log rule matches stored in " + os.path.join(self.outdir, "log_rules_report.json"))
+        if self.message_table is not None:
+            with profiler.phase("json_writing"):
+                self.message_table.write(self.outdir)
+
+    def record_runs(self, runs: List[tuple]) -> None:
+        """
+        Record workflow runs in the history database, as part of the benchmarking run `self.run_id`.
+
+        Parameters
+        ----------
+        runs : List[tuple]
+            The name of the workflow, the input yaml path and the execution information of each workflow run.
+        """
+        history = RunHistory(self.history_db)
+        history.record_run(
+            self.run_id,
+            f"{self.executor} {self.version}",
+            self.version,
+            platform.node(),
+            str(Path(self.workflows_dir).resolve()),
+            [
+                (workflow_name, self.input_names[input_yaml_path], workflow_execution_information)
+                for workflow_name, input_yaml_path, workflow_execution_information in runs
+            ],
+        )
+        history.close()
+        LoggingWrapper.info("Run " + self.run_id + " recorded in " + history.db_path)
+
+    def store_results(self) -> None:
+        """Rank the benchmarked workflows, store the results in a json file and record the run in the history."""
+        success_workflows = []
+        failed_workflows = []
+        runs, results = self.runs, self.results
+
+        benchmarks_by_input = {name: [] for name in self.input_names.values()}
+        for (workflow_name, _, _, input_yaml_path), (workflow_execution_information, workflow_benchmarks) in zip(runs, results):
+            benchmarks_by_input[self.input_names[input_yaml_path]].append(workflow_benchmarks)
+            if workflow_execution_information["status"] == "✗":
+                failed_workflows.append(self.run_name(workflow_name, input_yaml_path))
+            else:
+                success_workflows.append(self.run_name(workflow_name, input_yaml_path))
+
+        self.write_results(benchmarks_by_input)
+        if self.record_history:  # only the executed runs are recorded
+            self.record_runs(
+                [
+                    (workflow_name, input_yaml_path, workflow_execution_information)
+                    for (workflow_name, _, _, input_yaml_path), (workflow_execution_information, _) in zip(runs, results)
+                    if "deduplicated_from" not in workflow_execution_information
+                ]
             )
+        if self.profile:
+            profiler.disable()
+            profiler.report(self.outdir)
         LoggingWrapper.info("Benchmarking completed.", color="green", bold=True)
         LoggingWrapper.info(
-            "Total number of workflows benchmarked: " + str(len(self.workflows))
+            "Total number of workflows benchmarked: " + str(len(runs))
         )
         LoggingWrapper.info("Number of workflows failed: " + str(len(failed_workflows)))
+        if self.retention is not None:
+            reclaimed = sum(info["retention"]["reclaimed"] for info, _ in results if info["retention"] is not None)
+            LoggingWrapper.info("Disk space reclaimed from the workflow outputs: " + format_bytes(reclaimed))
         LoggingWrapper.info(
             "Number of workflows finished successfully: " + str(len(success_workflows))
         )
         LoggingWrapper.info("Successful workflows: " + ", ".join(success_workflows))
         LoggingWrapper.info("Failed workflows: " + ", ".join(failed_workflows))
+        if self.aliases:
+            LoggingWrapper.info(
+                "Deduplicated workflows (not executed, same as): "
+                + ", ".join(f"{alias} ({representative})" for alias, (representative, _) in self.aliases.items())
+            )
@@ -1,19 +1,32 @@
 from pathlib import Path
 import yaml
-import subprocess
-import sys
+from typing import List
 
+from workflomics_benchmarker.executors import CWLToolExecutor, get_executor
 from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+from workflomics_benchmarker.preflight import Preflight, PreflightError
 from workflomics_benchmarker.utils import natural_keys
+from workflomics_benchmarker.scheduling import load_tool_times, longest_first
+from workflomics_benchmarker.staging import InputStager
 class CWLToolWrapper():
     """ The class contains the common methods for the benchmarking and running CWL workflows."""
 
 
     def __init__(self, args):
-        """Initialize the class"""
+        """
+        Initialize the class
+
+        Raises
+        ------
+        NotADirectoryError
+            If the workflows directory does not exist.
+        FileNotFoundError
+            If the executor is not installed.
+        ValueError
+            If the executor is unknown, several executors are given, or an input directory has no input yaml files.
+        """
         if not Path(args.workflows).is_dir():
-            LoggingWrapper.error(f"The path {args.workflows} is not a directory.")
-            sys.exit(1)
+            raise NotADirectoryError(f"The path {args.workflows} is not a directory.")
         if hasattr(args, 'singularity') and args.singularity:
             self.container = "singularity"
         else:
@@ -25,31 +38,217 @@ class CWLToolWrapper():
             self.outdir = args.outdir
 
         if not hasattr(args, 'input') or args.input is None:
-            self.input_yaml_path = Path(args.workflows).joinpath('input.yml')
+            self.input_yaml_paths = [str(Path(args.workflows).joinpath('input.yml'))]
+        else:
+            self.input_yaml_paths = self.collect_input_yamls(args.input)
+        # the first input is used whenever a single input is expected
+        self.input_yaml_path = self.input_yaml_paths[0]
+        self.input_names = self.name_inputs(self.input_yaml_paths)
+        self.jobs = max(1, args.jobs) if hasattr(args, 'jobs') and args.jobs else 1
+        self.parallel = hasattr(args, 'parallel') and args.parallel
+        self.order = args.order if hasattr(args, 'order') and args.order else "name"
+        if hasattr(args, 'previous_benchmarks') and args.previous_benchmarks is not None:
+            self.previous_benchmarks = args.previous_benchmarks
         else:
-            self.input_yaml_path = args.input
+            self.previous_benchmarks = str(Path(self.outdir).joinpath('benchmarks.json'))
+
+        self.preflight_mode = args.preflight if hasattr(args, 'preflight') and args.preflight else None
 
         self.verbose = args.verbose if hasattr(args, 'verbose') else False
         
+        self.workflows_dir = args.workflows
         self.workflows = sorted([str(file) for file in Path(args.workflows).glob('*.cwl')], key=natural_keys)
-        self.version = self.check_cwltool()
+        executors = args.executors if hasattr(args, 'executors') and args.executors else ["cwltool"]
+        if len(executors) > 1:
+            raise ValueError("Only the benchmark command compares several executors.")
+        self.executor = get_executor(executors[0])
+        self.version = self.check_executor()
         if hasattr(args, 'interactive') and args.interactive:
             interactive = True
         else:
             interactive = False
 
-        self.input = self.update_input_yaml(self.input_yaml_path, interactive)
+        self.inputs = {input_yaml_path: self.update_input_yaml(input_yaml_path, interactive) for input_yaml_path in self.input_yaml_paths}
+        self.input = self.inputs[self.input_yaml_path]
+
+        # the input yaml file each workflow is run with, pointing to the staged input files if requested
+        if hasattr(args, 'stage_inputs') and args.stage_inputs is not None:
+            self.run_input_yaml_paths = self.stage_inputs(args.stage_inputs or None)
+        else:
+            self.run_input_yaml_paths = {input_yaml_path: input_yaml_path for input_yaml_path in self.input_yaml_paths}
+
+
+    def schedule(self, runs_steps: List[List[str]]) -> List[int]:
+        """
+        Determine the order in which the runs are started, according to the ordering policy.
+
+        Parameters
+        ----------
+        runs_steps : List[List[str]]
+            The names of the steps of the workflow of each run.
+
+        Returns
+        -------
+        List[int]
+            The indices of the runs, in the order they should be started.
+        """
+        if self.order == "longest-first":
+            tool_times = load_tool_times(self.previous_benchmarks)
+            LoggingWrapper.info(
+                f"Scheduling the longest workflows first, based on the step times of {len(tool_times)} tools"
+                + (f" in {self.previous_benchmarks}." if tool_times else " (no previous benchmarks found).")
+            )
+            return longest_first(runs_steps, tool_times)
+        return list(range(len(runs_steps)))
+
+    def preflight(self) -> set:
+        """
+        Validate every run of the workflows on the inputs before executing any of them, if requested.
+
+        Returns
+        -------
+        set
+            The (workflow file name, input yaml path) of the invalid runs, which are not executed.
+
+        Raises
+        ------
+        PreflightError
+            If some runs are invalid and the pre-flight validation is set to fail.
+        """
+        if self.preflight_mode is None:
+            return set()
+        LoggingWrapper.info(f"Validating {len(self.workflows)} workflows on {len(self.input_yaml_paths)} inputs...")
+        checker = self.preflight_checker()
+        problems = checker.check(self.workflows, self.input_yaml_paths)
+        invalid_runs = set()
+        for (workflow_path, input_yaml_path), run_problems in problems.items():
+            if not run_problems:
+                continue
+            workflow_name = Path(workflow_path).name
+            invalid_runs.add((workflow_name, input_yaml_path))
+            if len(self.input_yaml_paths) > 1:
+                workflow_name = f"{workflow_name} [{self.input_names[input_yaml_path]}]"
+            LoggingWrapper.warning(f"{workflow_name} is invalid: " + "; ".join(run_problems))
+        LoggingWrapper.info(
+            f"Pre-flight validation: {len(problems) - len(invalid_runs)} of {len(problems)} runs are valid "
+            f"({checker.cached_workflows} workflows known to be valid from previous runs)."
+        )
+        if invalid_runs and self.preflight_mode == "fail":
+            raise PreflightError(f"{len(invalid_runs)} workflow runs are invalid, see the pre-flight validation above.")
+        if invalid_runs:
+            LoggingWrapper.warning(f"The {len(invalid_runs)} invalid workflow runs are excluded.")
+        return invalid_runs
+
+    def preflight_checker(self) -> Preflight:
+        """
+        Return the pre-flight validator. The workflows are validated with cwltool whatever the executor: with the
+        executor itself if it is cwltool, otherwise with the cwltool on the PATH, whose version keys the cache.
+
+        Raises
+        ------
+        FileNotFoundError
+            If cwltool is not installed.
+        """
+        if isinstance(self.executor, CWLToolExecutor):
+            return Preflight(self.version, cwltool=self.executor.executable)
+        validator = CWLToolExecutor()
+        return Preflight(validator.version(), cwltool=validator.executable)
+
+    @staticmethod
+    def collect_input_yamls(inputs) -> List[str]:
+        """
+        Collect the input yaml files from the given paths. A directory stands for all the yaml files in it.
+
+        Parameters
+        ----------
+        inputs : str | List[str]
+            The path(s) to input yaml files or directories containing them.
+
+        Returns
+        -------
+        List[str]
+            The paths to the input yaml files.
+
+        Raises
+        ------
+        ValueError
+            If a directory does not contain any input yaml files.
+        """
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        input_yaml_paths = []
+        for input_path in inputs:
+            if Path(input_path).is_dir():
+                yamls = [str(file) for file in Path(input_path).iterdir() if file.suffix in (".yml", ".yaml")]
+                if not yamls:
+                    raise ValueError(f"The directory {input_path} does not contain any input yaml files.")
+                input_yaml_paths.extend(sorted(yamls, key=natural_keys))
+            else:
+                input_yaml_paths.append(str(input_path))
+        return input_yaml_paths
 
+    @staticmethod
+    def name_inputs(input_yaml_paths: List[str]) -> dict:
+        """Name each input yaml file after its file name, adding a number in case two inputs have the same name."""
+        names = {}
+        for input_yaml_path in input_yaml_paths:
+            name = Path(input_yaml_path).stem
+            candidate, index = name, 2
+            while candidate in names.values():
+                candidate, index = f"{name}_{index}", index + 1
+            names[input_yaml_path] = candidate
+        return names
 
-    def check_cwltool(self):
-        """Check if cwltool is installed and return the version"""
+    def stage_inputs(self, cache_dir: str = None) -> dict:
+        """
+        Stage the input files of all the inputs once into the local input cache.
+
+        Parameters
+        ----------
+        cache_dir : str, optional
+            The directory of the input cache (default: ~/.cache/workflomics/inputs).
+
+        Returns
+        -------
+        dict
+            The path to the staged input yaml file of each input yaml file.
+        """
+        stager = InputStager(cache_dir)
+        staged_input_yaml_paths = {}
+        for input_yaml_path in self.input_yaml_paths:
+            staged_yaml_path = str(Path(self.input_outdir(input_yaml_path)).joinpath(f"staged_{Path(input_yaml_path).stem}.yml"))
+            staged_input_yaml_paths[input_yaml_path] = stager.stage_input_yaml(input_yaml_path, staged_yaml_path)
+        LoggingWrapper.info(
+            f"Inputs staged in {stager.cache_dir}: {stager.staged_bytes / 2**20:.1f} MB copied, "
+            f"{stager.reused_bytes / 2**20:.1f} MB already cached."
+        )
+        return staged_input_yaml_paths
+
+    def input_outdir(self, input_yaml_path: str) -> str:
+        """
+        Return the directory in which the outputs of the workflows run on the given input are stored.
+        When several inputs are benchmarked, each input gets its own subdirectory of the output directory.
+        """
+        if len(self.input_yaml_paths) == 1:
+            return self.outdir
+        input_outdir = Path(self.outdir).joinpath(self.input_names[input_yaml_path])
+        input_outdir.mkdir(parents=True, exist_ok=True)
+        return str(input_outdir)
+
+    def check_executor(self) -> str:
+        """
+        Check if the executor, by default cwltool, is installed and return its version
+
+        Raises
+        ------
+        FileNotFoundError
+            If the executor is not installed.
+        """
         try:
-            result = subprocess.run(['cwltool', '--version'], capture_output=True, text=True)
-            print(result.stdout)
-            version = result.stdout.strip().split()[-1]
-            print(f"Using cwltool {version}")
-        except FileNotFoundError:
-            print("cwltool is not installed.")
+            version = self.executor.version()
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"{self.executor.executable} is not installed.") from e
+        print(f"Using {self.executor} {version}")
         return version
 
     def update_input_yaml(self, input_yaml_path:str, interactive: bool) -> dict:
@@ -0,0 +1,199 @@
+import copy
+import hashlib
+import json
+from pathlib import Path
+from typing import List
+
+import yaml
+
+from workflomics_benchmarker.profiler import profiled_phase
+from workflomics_benchmarker.utils import natural_keys
+
+# fields that document a workflow or a step without changing what it executes
+DOCUMENTATION_FIELDS = {"id", "label", "doc"}
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _step_inputs(step_inputs) -> dict:
+    """Normalize the inputs of a step, given in any of the CWL input notations, to a dict of dicts."""
+    if isinstance(step_inputs, list):
+        step_inputs = {step_input["id"]: step_input for step_input in step_inputs if isinstance(step_input, dict)}
+    return {
+        name: dict(value) if isinstance(value, dict) else {"source": value}
+        for name, value in (step_inputs or {}).items()
+    }
+
+
+def step_signatures(document: dict) -> dict:
+    """
+    Compute a structural signature of each step of a workflow: a hash of its tool (step label without number),
+    its parameters and, recursively, of where its inputs come from. The step names themselves are left out, so
+    the corresponding steps of two workflows that only differ in their step numbering get the same signature.
+
+    Returns
+    -------
+    dict
+        The signature of each step, keyed by step name.
+    """
+    steps = document.get("steps") or {}
+    signatures = {}
+
+    def canonical_source(source):
+        if isinstance(source, list):
+            return [canonical_source(item) for item in source]
+        if not isinstance(source, str):
+            return source
+        step_name, _, port = source.lstrip("#").partition("/")
+        if port and step_name in steps:
+            return {"step": signature(step_name), "port": port}
+        return {"input": source.lstrip("#")}
+
+    def signature(step_name):
+        if step_name not in signatures:
+            signatures[step_name] = None  # a cycle is not valid CWL, it is hashed as is
+            step = steps[step_name] or {}
+            inputs = _step_inputs(step.get("in"))
+            for step_input in inputs.values():
+                if "source" in step_input:
+                    step_input["source"] = canonical_source(step_input["source"])
+            outputs = sorted(output["id"] if isinstance(output, dict) else output for output in step.get("out") or [])
+            signatures[step_name] = _digest(
+                {
+                    "tool": step_name.rstrip("_0123456789"),
+                    "in": inputs,
+                    "out": outputs,
+                    "fields": {key: value for key, value in step.items() if key not in DOCUMENTATION_FIELDS | {"in", "out"}},
+                }
+            )
+        return signatures[step_name]
+
+    for step_name in steps:
+        signature(step_name)
+    return signatures
+
+
+def workflow_signature(document: dict) -> str:
+    """
+    Compute a canonical structural hash of a workflow: of its inputs, of the signatures of its steps (see
+    `step_signatures`) regardless of their order, and of the steps and ports its outputs come from. Workflows
+    that only differ in their step numbering, the order of their keys or their documentation get the same hash.
+    """
+    signatures = step_signatures(document)
+    outputs = {}
+    for name, output in (document.get("outputs") or {}).items():
+        output = dict(output) if isinstance(output, dict) else {"type": output}
+        source = output.pop("outputSource", None)
+        if isinstance(source, str):
+            step_name, _, port = source.lstrip("#").partition("/")
+            source = {"step": signatures[step_name], "port": port} if port and step_name in signatures else source
+        outputs[name] = {"source": source, "fields": output}
+    return _digest(
+        {
+            "workflow": {
+                key: value for key, value in document.items() if key not in DOCUMENTATION_FIELDS | {"steps", "outputs"}
+            },
+            "steps": sorted(signatures.values()),
+            "outputs": outputs,
+        }
+    )
+
+
+def _load(workflow_path: str) -> dict:
+    with open(workflow_path, "r") as file:
+        return yaml.safe_load(file)
+
+
+def map_steps(alias_document: dict, representative_document: dict) -> dict:
+    """Map each step of a workflow to the corresponding step of a structurally equivalent workflow."""
+    alias_steps, representative_steps = {}, {}
+    for steps, document in [(alias_steps, alias_document), (representative_steps, representative_document)]:
+        for step_name, signature in step_signatures(document).items():
+            steps.setdefault(signature, []).append(step_name)
+    mapping = {}
+    for signature, step_names in alias_steps.items():
+        # steps with the same signature are interchangeable, they are paired in their natural order
+        pairs = zip(sorted(step_names, key=natural_keys), sorted(representative_steps[signature], key=natural_keys))
+        mapping.update(pairs)
+    return mapping
+
+
+@profiled_phase("yaml_parsing")
+def deduplicate_workflows(workflow_paths: List[str]) -> tuple:
+    """
+    Group the structurally equivalent workflows, so that each group is only executed once.
+
+    Parameters
+    ----------
+    workflow_paths : List[str]
+        The paths to the workflow files, the first workflow of each group is executed.
+
+    Returns
+    -------
+    tuple
+        The paths to the workflows to execute, and the aliases: for each workflow that is not executed, the
+        name of the equivalent workflow that is, and the step of that workflow corresponding to each of its steps.
+    """
+    representatives = {}
+    unique_paths = []
+    aliases = {}
+    for workflow_path in workflow_paths:
+        document = _load(workflow_path)
+        signature = workflow_signature(document)
+        if signature not in representatives:
+            representatives[signature] = (workflow_path, document)
+            unique_paths.append(workflow_path)
+            continue
+        representative_path, representative_document = representatives[signature]
+        aliases[Path(workflow_path).name] = (Path(representative_path).name, map_steps(document, representative_document))
+    return unique_paths, aliases
+
+
+def alias_execution_information(workflow_execution_information: dict, alias_steps: List[str], step_mapping: dict, run_name: str) -> dict:
+    """
+    Return the execution information of a workflow for an equivalent workflow, with the step names and the step
+    order of the equivalent workflow. The equivalent workflow has no outputs of its own, so no disk space is
+    reclaimed from them.
+    """
+    steps = {entry["step"]: entry for entry in workflow_execution_information["steps"]}
+    alias_information = dict(
+        workflow_execution_information,
+        workflow=run_name,
+        steps=[],
+        deduplicated_from=workflow_execution_information["workflow"],
+        retention=None,
+    )
+    for step_name in alias_steps:
+        entry = copy.deepcopy(steps[step_mapping[step_name]])
+        entry["step"] = step_name
+        alias_information["steps"].append(entry)
+    return alias_information
+
+
+def alias_benchmarks(workflow_benchmarks: dict, alias_name: str, alias_steps: List[str], step_mapping: dict, steps: List[str]) -> dict:
+    """
+    Return the benchmark results of a workflow for an equivalent workflow, with the steps of each benchmark in
+    the order of the steps of the equivalent workflow.
+
+    Parameters
+    ----------
+    workflow_benchmarks : dict
+        The benchmark results of the executed workflow, as stored in the json file.
+    alias_name : str
+        The name of the equivalent workflow.
+    alias_steps : List[str]
+        The names of the steps of the equivalent workflow, in the order they are defined.
+    step_mapping : dict
+        The step of the executed workflow corresponding to each step of the equivalent workflow.
+    steps : List[str]
+        The names of the steps of the executed workflow, in the order they are defined.
+    """
+    order = [steps.index(step_mapping[step_name]) for step_name in alias_steps]
+    alias = copy.deepcopy(workflow_benchmarks)
+    alias["workflowName"] = alias_name
+    alias["deduplicatedFrom"] = workflow_benchmarks["workflowName"]
+    for benchmark in alias["benchmarks"]:
+        benchmark["steps"] = [benchmark["steps"][index] for index in order]
+    return alias
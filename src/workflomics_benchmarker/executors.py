@@ -0,0 +1,163 @@
+import os
+import subprocess
+from abc import ABC, abstractmethod
+from typing import List
+
+from workflomics_benchmarker.resource_accounting import write_memory_overrides
+
+
+class Executor(ABC):
+    """
+    A CWL engine the workflows are run with. The benchmarker and the runner only build the command of a run
+    through its executor, so that another engine can be plugged in by subclassing `Executor`.
+
+    The step benchmarks are extracted from the log of the run, which is expected in the format of cwltool
+    (`[step X] start`, `[job X] completed success`, ...). Engines that do not log their steps this way set
+    `step_logs` to False: the status of their runs is then taken from their exit code.
+    """
+
+    # the name of the executor in the command line and in the results, and its default executable
+    name = None
+    executable = None
+    # whether the steps are logged in the format of cwltool
+    step_logs = True
+    # whether the ids of the step containers can be recorded, to account their resource usage
+    container_ids = False
+    # whether the executable is a Python script that warm workers can preload
+    preloadable = False
+
+    def __init__(self, executable: str = None):
+        if executable is not None:
+            self.executable = executable
+
+    def version(self) -> str:
+        """
+        Return the version of the executor, the last word printed by `<executable> --version`.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the executable is not installed.
+        """
+        result = subprocess.run([self.executable, "--version"], capture_output=True, text=True)
+        words = result.stdout.split()
+        return words[-1] if words else "unknown"
+
+    @abstractmethod
+    def command(
+        self,
+        workflow_path: str,
+        input_yaml_path: str,
+        outdir: str,
+        container: str = "docker",
+        parallel: bool = False,
+        cidfile_dir: str = None,
+        benchmark: bool = True,
+        scratch_dir: str = None,
+        memory_limit: int = None,
+    ) -> List[str]:
+        """
+        Build the command running a workflow on an input.
+
+        Parameters
+        ----------
+        workflow_path : str
+            The path to the workflow file.
+        input_yaml_path : str
+            The path to the input yaml file.
+        outdir : str
+            The directory in which the outputs of the workflow are stored.
+        container : str, optional
+            The container engine, "docker" or "singularity" (default: docker).
+        parallel : bool, optional
+            Whether the independent steps of the workflow are executed concurrently (default: False).
+        cidfile_dir : str, optional
+            The directory in which the ids of the step containers are recorded, if `container_ids` is set.
+        benchmark : bool, optional
+            Whether the run is benchmarked, i.e., its log is parsed (default: True).
+        scratch_dir : str, optional
+            An empty directory of the run for the files the executor needs while it runs (e.g., the job store of
+            Toil), which the caller removes once the run is over.
+        memory_limit : int, optional
+            The memory ceiling of each step in MiB, applied when the step containers are created if the executor
+            can, otherwise the step containers are limited once they are discovered.
+
+        Returns
+        -------
+        List[str]
+            The command, starting with the executable.
+        """
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class CWLToolExecutor(Executor):
+    """The reference CWL engine, `cwltool`, which runs the steps of each workflow from a single process."""
+
+    name = "cwltool"
+    executable = "cwltool"
+    container_ids = True
+    preloadable = True
+
+    def command(self, workflow_path, input_yaml_path, outdir, container="docker", parallel=False, cidfile_dir=None, benchmark=True, scratch_dir=None, memory_limit=None) -> List[str]:
+        command = [self.executable]
+        if container == "singularity":
+            command.append("--singularity")
+        # let cwltool record the id of each step container, to account the CPU and I/O usage of its cgroup
+        if cidfile_dir is not None and container == "docker":
+            command.extend(["--record-container-id", "--cidfile-dir", cidfile_dir])
+        if memory_limit is not None and container == "docker":
+            if scratch_dir is None:
+                raise ValueError("cwltool needs a scratch directory for the memory ceiling of each run.")
+            # create the step containers with the ceiling, instead of limiting them once they run
+            overrides = write_memory_overrides(workflow_path, memory_limit, scratch_dir)
+            command.extend(["--strict-memory-limit", "--overrides", overrides])
+        if parallel:  # run the independent steps of the workflow concurrently
+            command.append("--parallel")
+        command.extend(["--on-error", "continue"])
+        if benchmark:  # disable color and add timestamps to enable benchmarking
+            command.extend(["--disable-color", "--timestamps"])
+        return command + ["--outdir", outdir, workflow_path, input_yaml_path]
+
+
+class ToilExecutor(Executor):
+    """
+    Toil in single machine mode, `toil-cwl-runner`, which runs the steps of each workflow in separate worker
+    processes, concurrently whenever they are independent. Toil does not log the steps like cwltool.
+    """
+
+    name = "toil"
+    executable = "toil-cwl-runner"
+    step_logs = False
+
+    def command(self, workflow_path, input_yaml_path, outdir, container="docker", parallel=False, cidfile_dir=None, benchmark=True, scratch_dir=None, memory_limit=None) -> List[str]:
+        command = [self.executable, "--batchSystem", "single_machine"]
+        if container == "singularity":
+            command.append("--singularity")
+        if scratch_dir is None:
+            raise ValueError("Toil needs a scratch directory for the job store of each run.")
+        # each run needs a job store of its own, which must not exist yet
+        command.extend(["--jobStore", os.path.join(scratch_dir, "jobstore"), "--clean", "always"])
+        return command + ["--outdir", outdir, workflow_path, input_yaml_path]
+
+
+EXECUTORS = {executor.name: executor for executor in [CWLToolExecutor, ToilExecutor]}
+
+
+def get_executor(spec) -> Executor:
+    """
+    Return the executor described by a specification: the name of an executor, optionally followed by the path
+    to its executable (e.g., `toil=/opt/toil/bin/toil-cwl-runner`), or an `Executor` instance.
+
+    Raises
+    ------
+    ValueError
+        If there is no executor with the given name.
+    """
+    if isinstance(spec, Executor):
+        return spec
+    name, _, executable = spec.partition("=")
+    if name not in EXECUTORS:
+        raise ValueError(f"Unknown executor {name}, choose from: {', '.join(EXECUTORS)}.")
+    return EXECUTORS[name](executable or None)
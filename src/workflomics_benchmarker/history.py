@@ -0,0 +1,255 @@
+import datetime
+import os
+import sqlite3
+import statistics
+from pathlib import Path
+from typing import List
+
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+
+
+def default_history_db() -> str:
+    """Return the path to the history database, `~/.workflomics/history.sqlite` unless WORKFLOMICS_HISTORY_DB is set."""
+    return os.environ.get("WORKFLOMICS_HISTORY_DB", str(Path.home().joinpath(".workflomics", "history.sqlite")))
+
+
+# step metrics stored for each run, all of them are numeric or NULL
+STEP_METRICS = [
+    "time",
+    "time_ms",
+    "memory",
+    "cpu_user",
+    "cpu_system",
+    "io_read",
+    "io_write",
+    "cpu_efficiency",
+    "identified_proteins",
+    "go_terms",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    host TEXT,
+    executor TEXT,
+    cwltool_version TEXT,
+    workflows_dir TEXT
+);
+CREATE TABLE IF NOT EXISTS step_runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    workflow TEXT NOT NULL,
+    input TEXT,
+    step TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    image_digest TEXT,
+    status TEXT,
+    warnings INTEGER,
+    errors INTEGER,
+    interfered INTEGER,
+    {metrics}
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_step_runs_tool ON step_runs(tool, run_id);
+CREATE INDEX IF NOT EXISTS idx_step_runs_workflow ON step_runs(workflow, run_id);
+""".format(metrics=",\n    ".join(f"{metric} REAL" for metric in STEP_METRICS))
+
+
+def _numeric(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class RunHistory:
+    """Local SQLite store of the step results of every benchmarking run."""
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            db_path = default_history_db()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+        # databases created before the interference flag or some of the metrics were recorded
+        columns = [row["name"] for row in self.connection.execute("PRAGMA table_info(step_runs)")]
+        if "interfered" not in columns:
+            self.connection.execute("ALTER TABLE step_runs ADD COLUMN interfered INTEGER")
+        for metric in STEP_METRICS:
+            if metric not in columns:
+                self.connection.execute(f"ALTER TABLE step_runs ADD COLUMN {metric} REAL")
+
+    def close(self):
+        self.connection.close()
+
+    def record_run(self, run_id: str, executor: str, cwltool_version: str, host: str, workflows_dir: str, results: List[tuple]):
+        """
+        Store the step results of a benchmarking run. The step results of a run can be stored in several parts,
+        e.g., as the workflows are benchmarked in watch mode.
+
+        Parameters
+        ----------
+        run_id : str
+            The unique id of the run.
+        executor : str
+            The executor the workflows were run with, e.g., "cwltool 3.1.20240112164112".
+        cwltool_version : str
+            The version of the executor.
+        host : str
+            The name of the host the run was executed on.
+        workflows_dir : str
+            The directory containing the workflows.
+        results : List[tuple]
+            The name of the workflow, the name of the input and the execution information of each workflow run.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO runs (run_id, started_at, host, executor, cwltool_version, workflows_dir) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, datetime.datetime.now().isoformat(timespec="seconds"), host, executor, cwltool_version, workflows_dir),
+            )
+            rows = []
+            for workflow_name, input_name, workflow_execution_information in results:
+                isolation = workflow_execution_information.get("isolation")
+                interfered = None if isolation is None else int(isolation["interfered"])
+                for step in workflow_execution_information["steps"]:
+                    rows.append(
+                        (
+                            run_id,
+                            workflow_name,
+                            input_name,
+                            step["step"],
+                            step["step"].rstrip("_0123456789"),
+                            step.get("image_digest") if step.get("image_digest") not in ["-", "N/A"] else None,
+                            step["status"],
+                            len(step["warnings"]) if isinstance(step["warnings"], list) else None,
+                            len(step["errors"]) if isinstance(step["errors"], list) else None,
+                            interfered,
+                        )
+                        + tuple(_numeric(step.get(metric)) for metric in STEP_METRICS)
+                    )
+            self.connection.executemany(
+                "INSERT INTO step_runs (run_id, workflow, input, step, tool, image_digest, status, warnings, errors, interfered, "
+                + ", ".join(STEP_METRICS)
+                + ") VALUES ("
+                + ", ".join("?" * (10 + len(STEP_METRICS)))
+                + ")",
+                rows,
+            )
+
+    def runs(self, limit: int = 20) -> List[sqlite3.Row]:
+        """Return the most recent runs, with the number of workflows and steps in each run."""
+        return self.connection.execute(
+            """
+            SELECT runs.*, COUNT(DISTINCT step_runs.workflow) AS n_workflows, COUNT(step_runs.id) AS n_steps
+            FROM runs LEFT JOIN step_runs ON step_runs.run_id = runs.run_id
+            GROUP BY runs.run_id ORDER BY runs.started_at DESC, runs.rowid DESC LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+
+    def tool_history(self, tool: str, metric: str, limit: int = 20) -> List[sqlite3.Row]:
+        """
+        Return the mean value of a metric of the successful steps of a tool, per run, most recent first. The steps
+        measured under interference are left out.
+        """
+        if metric not in STEP_METRICS:
+            raise ValueError(f"Unknown metric {metric}, expected one of {', '.join(STEP_METRICS)}.")
+        return self.connection.execute(
+            f"""
+            SELECT runs.run_id, runs.started_at, AVG(step_runs.{metric}) AS value, COUNT(step_runs.{metric}) AS n,
+                   GROUP_CONCAT(DISTINCT step_runs.image_digest) AS image_digests
+            FROM step_runs JOIN runs ON runs.run_id = step_runs.run_id
+            WHERE step_runs.tool = ? AND step_runs.status = '✓' AND step_runs.{metric} IS NOT NULL
+                  AND (step_runs.interfered IS NULL OR step_runs.interfered = 0)
+            GROUP BY runs.run_id ORDER BY runs.started_at DESC, runs.rowid DESC LIMIT ?
+            """,
+            (tool, limit),
+        ).fetchall()
+
+    def tools(self) -> List[str]:
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT tool FROM step_runs ORDER BY tool")]
+
+
+def detect_regressions(
+    history: RunHistory,
+    metrics: List[str] = ("time", "memory"),
+    baseline_runs: int = 10,
+    threshold: float = 0.2,
+    min_z_score: float = 3.0,
+) -> List[dict]:
+    """
+    Compare the latest run of each tool against a rolling baseline of its previous runs.
+
+    The baseline of a tool is the median of its per-run mean over the previous `baseline_runs` runs. A tool is
+    flagged when the latest value is at least `threshold` (relative) above the baseline and its robust z-score,
+    based on the median absolute deviation of the baseline, is at least `min_z_score`. This tolerates the usual
+    run-to-run noise while catching a container update that made a step 40% slower.
+
+    Returns
+    -------
+    List[dict]
+        The flagged tools and metrics, with the latest value, the baseline, the relative change and the z-score.
+    """
+    regressions = []
+    for tool in history.tools():
+        for metric in metrics:
+            rows = history.tool_history(tool, metric, limit=baseline_runs + 1)
+            if len(rows) < 4:  # the latest run and at least three baseline runs
+                continue
+            latest, baseline = rows[0], [row["value"] for row in rows[1:]]
+            median = statistics.median(baseline)
+            mad = statistics.median(abs(value - median) for value in baseline)
+            change = (latest["value"] - median) / median if median else float("inf")
+            if mad:
+                z_score = (latest["value"] - median) / (1.4826 * mad)
+            else:
+                z_score = float("inf") if latest["value"] > median else 0.0
+            if change >= threshold and z_score >= min_z_score:
+                previous_images = {row["image_digests"] for row in rows[1:]}
+                regressions.append(
+                    {
+                        "tool": tool,
+                        "metric": metric,
+                        "run_id": latest["run_id"],
+                        "value": latest["value"],
+                        "baseline": median,
+                        "change": change,
+                        "z_score": z_score,
+                        "image_changed": latest["image_digests"] is not None and latest["image_digests"] not in previous_images,
+                    }
+                )
+    return regressions
+
+
+def show_history(args):
+    """Log the most recent runs, or the history of a metric of one tool."""
+    history = RunHistory(args.history_db)
+    if args.tool is None:
+        for run in history.runs(args.limit):
+            LoggingWrapper.info(
+                f"{run['started_at']}  {run['run_id']}  {run['executor']} on {run['host']}: "
+                f"{run['n_workflows']} workflows, {run['n_steps']} steps ({run['workflows_dir']})"
+            )
+    else:
+        for row in history.tool_history(args.tool, args.metric, args.limit):
+            LoggingWrapper.info(
+                f"{row['started_at']}  {row['run_id']}  {args.tool} {args.metric}: {row['value']:.2f} "
+                f"(mean of {row['n']} steps, image {row['image_digests'] or 'unknown'})"
+            )
+    history.close()
+
+
+def show_regressions(args) -> List[dict]:
+    """Log the tools whose latest run regressed compared to their baseline."""
+    history = RunHistory(args.history_db)
+    regressions = detect_regressions(history, args.metric, args.baseline_runs, args.threshold, args.min_z_score)
+    history.close()
+    if not regressions:
+        LoggingWrapper.info("No performance regressions detected.", color="green")
+    for regression in regressions:
+        LoggingWrapper.warning(
+            f"{regression['tool']}: {regression['metric']} regressed by {100 * regression['change']:.0f}% "
+            f"({regression['value']:.2f} vs. baseline {regression['baseline']:.2f}, z-score {regression['z_score']:.1f})"
+            + (", the container image changed" if regression["image_changed"] else "")
+        )
+    return regressions
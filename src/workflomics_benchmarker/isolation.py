@@ -0,0 +1,182 @@
+import os
+import queue
+import shutil
+import subprocess
+import time
+from typing import List
+
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+
+# seconds the load of the CPUs of a run is sampled before the run starts
+LOAD_SAMPLE_SECONDS = 0.5
+
+
+def parse_cpu_list(cpu_list: str) -> List[int]:
+    """Parse a kernel CPU list, e.g., `0-3,8,10-11`."""
+    cpus = []
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+def format_cpu_list(cpus: List[int]) -> str:
+    """Format CPUs as a kernel CPU list, as accepted by `docker update --cpuset-cpus`."""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+
+
+def numa_node_cpus(node: int) -> List[int]:
+    """
+    Return the CPUs of a NUMA node.
+
+    Raises
+    ------
+    ValueError
+        If the host has no such NUMA node.
+    """
+    try:
+        with open(f"/sys/devices/system/node/node{node}/cpulist") as file:
+            return parse_cpu_list(file.read())
+    except OSError:
+        raise ValueError(f"The host has no NUMA node {node}.")
+
+
+def read_cpu_times() -> dict:
+    """
+    Read the cumulative busy and total time of each CPU from /proc/stat.
+
+    Returns
+    -------
+    dict
+        The busy and total time (in clock ticks) by CPU number.
+    """
+    times = {}
+    with open("/proc/stat") as file:
+        for line in file:
+            if not line.startswith("cpu") or line.startswith("cpu "):
+                continue
+            fields = line.split()
+            # user nice system idle iowait irq softirq steal, the guest times are included in user and nice
+            values = [int(value) for value in fields[1:9]]
+            idle = values[3] + values[4]
+            times[int(fields[0][3:])] = (sum(values) - idle, sum(values))
+    return times
+
+
+def busy_seconds(before: dict, after: dict, cpus: List[int]) -> float:
+    """Return the CPU seconds the given CPUs were busy between two `read_cpu_times` samples."""
+    ticks = sum(after[cpu][0] - before[cpu][0] for cpu in cpus if cpu in before and cpu in after)
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+
+def measure_cpu_load(cpus: List[int], seconds: float = LOAD_SAMPLE_SECONDS) -> float:
+    """Return the fraction of the time the given CPUs are busy, sampled over the given number of seconds."""
+    before = read_cpu_times()
+    time.sleep(seconds)
+    return min(1.0, busy_seconds(before, read_cpu_times(), cpus) / (seconds * len(cpus)))
+
+
+def pin_container(container_id: str, cpus: List[int], numa_node: int = None, runtime: str = "docker") -> bool:
+    """Restrict a running container to the given CPUs (and the memory of a NUMA node). Return whether it worked."""
+    command = [runtime, "update", "--cpuset-cpus", format_cpu_list(cpus)]
+    if numa_node is not None:
+        command.extend(["--cpuset-mems", str(numa_node)])
+    try:
+        result = subprocess.run(command + [container_id], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+class CpuSetPool:
+    """
+    Splits the CPUs available to the benchmarker into disjoint CPU sets, one per concurrent workflow run, so that
+    the runs (the cwltool process, its child processes and the step containers) do not compete for the same CPUs.
+    A run takes a CPU set from the pool before it starts and gives it back once it completed.
+    """
+
+    def __init__(self, jobs: int, cpus_per_run: int = None, numa_node: int = None):
+        available = sorted(os.sched_getaffinity(0))
+        if numa_node is not None:
+            available = [cpu for cpu in available if cpu in set(numa_node_cpus(numa_node))]
+        if cpus_per_run is None:
+            cpus_per_run = len(available) // jobs
+        if cpus_per_run < 1 or cpus_per_run * jobs > len(available):
+            raise ValueError(
+                f"{jobs} concurrent runs with {cpus_per_run or 1} CPUs each need more than the {len(available)} available CPUs."
+            )
+        self.numa_node = numa_node
+        self.cpu_sets = [available[index * cpus_per_run:(index + 1) * cpus_per_run] for index in range(jobs)]
+        self._free = queue.Queue()
+        for cpu_set in self.cpu_sets:
+            self._free.put(cpu_set)
+        # the runs are pinned with taskset from their start, the step containers once they are discovered
+        self.taskset = shutil.which("taskset")
+        if self.taskset is None:
+            raise ValueError("taskset is not installed, the workflow runs cannot be pinned to their CPUs.")
+        # without numactl, the memory of the cwltool process and its children is not bound to the NUMA node
+        self.numactl = shutil.which("numactl") if numa_node is not None else None
+        if numa_node is not None and self.numactl is None:
+            LoggingWrapper.warning("numactl is not installed, only the CPUs (and the memory of the containers) are bound to the NUMA node.")
+
+    def acquire(self) -> List[int]:
+        return self._free.get()
+
+    def release(self, cpus: List[int]):
+        self._free.put(cpus)
+
+    def command_prefix(self, cpus: List[int]) -> List[str]:
+        """Return the prefix pinning a command, and the processes it starts, to the given CPUs, and binding its
+        memory to the NUMA node, if any."""
+        prefix = [self.taskset, "-c", format_cpu_list(cpus)]
+        if self.numactl is None:
+            return prefix
+        return [self.numactl, f"--membind={self.numa_node}"] + prefix
+
+
+def interference_report(
+    cpus: List[int], load_before: float, cpu_times_before: dict, cpu_times_after: dict, elapsed: float, own_cpu_seconds: float, threshold: float
+) -> dict:
+    """
+    Summarize the interference of other processes with a pinned workflow run.
+
+    The load during the run is the time the CPUs of the run were busy with anything else than the run itself,
+    i.e., their busy time minus the CPU time of the run (its processes and its containers), over the capacity
+    of the CPUs during the run.
+
+    Parameters
+    ----------
+    cpus : List[int]
+        The CPUs the run was pinned to.
+    load_before : float
+        The fraction of the time the CPUs were busy right before the run.
+    cpu_times_before, cpu_times_after : dict
+        The CPU times at the start and at the end of the run, see `read_cpu_times`.
+    elapsed : float
+        The wall-clock time of the run in seconds.
+    own_cpu_seconds : float
+        The CPU time used by the run itself.
+    threshold : float
+        The load above which the run is flagged as measured under interference.
+
+    Returns
+    -------
+    dict
+        The CPUs, the load before and during the run and whether the run was interfered with.
+    """
+    foreign_seconds = max(0.0, busy_seconds(cpu_times_before, cpu_times_after, cpus) - own_cpu_seconds)
+    load_during = min(1.0, foreign_seconds / (elapsed * len(cpus))) if elapsed > 0 else 0.0
+    return {
+        "cpus": format_cpu_list(cpus),
+        "load_before": round(load_before, 3),
+        "load_during": round(load_during, 3),
+        "interfered": load_before > threshold or load_during > threshold,
+    }
@@ -0,0 +1,137 @@
+import re
+import threading
+from collections import Counter
+from typing import List
+
+import yaml
+
+LINE_CLASSES = ["noise", "warning", "error"]
+
+# The default rules: known noise is ignored, then any line mentioning a warning or an error is one.
+DEFAULT_LOG_RULES = [
+    {"name": "docker-platform-mismatch", "class": "noise", "contains": "WARNING: The requested image's platform"},
+    {"name": "zero-errors", "class": "noise", "contains": " 0 errors"},
+    {"name": "sensitivity-tables", "class": "noise", "contains": "Calculating sensitivity...and error tables..."},
+    {"name": "zero-warnings", "class": "noise", "contains": " 0 warnings"},
+    {"name": "warning", "class": "warning", "contains": "warning", "ignore_case": True},
+    {"name": "error", "class": "error", "contains": "error", "ignore_case": True},
+]
+
+
+def load_log_rules(rules_path: str) -> List[dict]:
+    """
+    Load log classification rules from a yaml file.
+
+    The file holds a `rules` list. Each rule has a `name`, a `class` (noise, warning or error) and either a literal
+    `contains` string or a `regex`, and optionally `ignore_case` and the `tools` (step labels without number) it
+    applies to. The first rule matching a line decides its class. With `extend_defaults: true`, the rules are
+    tried before the default rules instead of replacing them.
+
+    Raises
+    ------
+    ValueError
+        If the file does not hold valid rules.
+    """
+    with open(rules_path, "r") as file:
+        data = yaml.safe_load(file) or {}
+    rules = data.get("rules") if isinstance(data, dict) else None
+    if not isinstance(rules, list):
+        raise ValueError(f"{rules_path} does not contain a list of rules.")
+    for index, rule in enumerate(rules):
+        if not isinstance(rule, dict) or rule.get("class") not in LINE_CLASSES:
+            raise ValueError(f"Rule {index + 1} in {rules_path} must have a class among {', '.join(LINE_CLASSES)}.")
+        if ("contains" in rule) == ("regex" in rule):
+            raise ValueError(f"Rule {index + 1} in {rules_path} must have either a `contains` or a `regex` pattern.")
+        if "regex" in rule:
+            try:
+                re.compile(rule["regex"])
+            except re.error as e:
+                raise ValueError(f"Rule {index + 1} in {rules_path} has an invalid regex: {e}")
+        rule.setdefault("name", f"rule-{index + 1}")
+    if data.get("extend_defaults"):
+        rules = rules + DEFAULT_LOG_RULES
+    return rules
+
+
+class LogClassifier:
+    """
+    Classifies tool output lines as noise, warning or error with a set of rules. The rules applying to a tool
+    are compiled once into a single regular expression, in which each rule is a lookahead alternative, so that
+    a line is classified with a single match and the first matching rule, in the order of the rules, wins. Lines
+    matching no rule, the vast majority, are filtered out beforehand with substring checks of the literals of the
+    rules (or a single search over all the patterns if some rules are regular expressions).
+    The number of lines matched by each rule is counted, to help tuning the rules.
+    """
+
+    def __init__(self, rules: List[dict] = DEFAULT_LOG_RULES):
+        self.rules = rules
+        self.hits = Counter()
+        self.examples = {}
+        self._matchers = {}
+        self._lock = threading.Lock()
+
+    def _compile(self, tool: str):
+        rules = [rule for rule in self.rules if tool in rule.get("tools", [tool])]
+        if not rules:
+            return None, None, rules
+        patterns = []
+        for rule in rules:
+            pattern = rule["regex"] if "regex" in rule else re.escape(rule["contains"])
+            patterns.append(f"(?i:{pattern})" if rule.get("ignore_case") else f"(?:{pattern})")
+        matcher = re.compile("|".join(f"(?=.*?{pattern})(?P<r{index}>)" for index, pattern in enumerate(patterns)))
+        if any("regex" in rule for rule in rules):
+            return re.compile("|".join(patterns)).search, matcher, rules
+        # Most lines match no rule at all. Every line matching a rule contains the lower case literal of the rule,
+        # and only the shortest of the literals containing each other need to be looked for.
+        literals = sorted({rule["contains"].lower() for rule in rules}, key=len)
+        keys = []
+        for literal in literals:
+            if not any(key in literal for key in keys):
+                keys.append(literal)
+
+        def prefilter(line):
+            line = line.lower()
+            for key in keys:
+                if key in line:
+                    return True
+            return False
+
+        return prefilter, matcher, rules
+
+    def match(self, line: str, tool: str = None) -> dict | None:
+        """Return the first rule matching the line in the rules applying to the tool, or None."""
+        compiled = self._matchers.get(tool)
+        if compiled is None:
+            compiled = self._matchers[tool] = self._compile(tool)
+        prefilter, matcher, rules = compiled
+        if prefilter is None or not prefilter(line):
+            return None
+        match = matcher.match(line)
+        if match is None:  # the line only contains a literal in another case
+            return None
+        rule = rules[int(match.lastgroup[1:])]
+        with self._lock:
+            self.hits[rule["name"]] += 1
+            self.examples.setdefault(rule["name"], line)
+        return rule
+
+    def classify(self, line: str, tool: str = None) -> str | None:
+        """Return the class of the line (noise, warning or error), or None if it is a regular output line."""
+        rule = self.match(line, tool)
+        return rule["class"] if rule is not None else None
+
+    def report(self) -> List[dict]:
+        """Return each rule with the number of lines it matched and an example line, in the order of the rules."""
+        return [
+            {
+                "name": rule["name"],
+                "class": rule["class"],
+                "tools": rule.get("tools", "all"),
+                "matches": self.hits[rule["name"]],
+                "example": self.examples.get(rule["name"]),
+            }
+            for rule in self.rules
+        ]
+
+
+default_log_classifier = LogClassifier()
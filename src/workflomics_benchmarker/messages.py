@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import List
+
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+
+timestamp_pattern = re.compile(r"\[?\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\]?\s*")
+path_pattern = re.compile(r"(?:file://)?(?<![\w.])(?:/[\w.+@%-]+)+/?")
+
+
+def normalize_message(line: str) -> str:
+    """Strip the timestamps and file paths from a warning or error line, so that the same message of different
+    runs is identical."""
+    line = timestamp_pattern.sub("", line)
+    line = path_pattern.sub("<path>", line)
+    return " ".join(line.split())
+
+
+class MessageTable:
+    """
+    Interns the warnings and errors of all the benchmarked workflows. Each distinct normalized message is stored
+    once, with the number of times it occurred and the workflows and tools it occurred in. The steps of the
+    workflows refer to the messages by their id, a hash of the normalized message.
+    """
+
+    def __init__(self):
+        self.messages = {}
+        self._lock = threading.Lock()
+
+    def intern(self, line: str, level: str, workflow: str, tool: str) -> str:
+        """
+        Add an occurrence of a message to the table.
+
+        Parameters
+        ----------
+        line : str
+            The raw warning or error line.
+        level : str
+            "warning" or "error".
+        workflow : str
+            The name of the workflow run the message occurred in.
+        tool : str
+            The step label (without number) the message occurred in.
+
+        Returns
+        -------
+        str
+            The id of the message.
+        """
+        message = normalize_message(line)
+        message_id = hashlib.sha1(f"{level}:{message}".encode()).hexdigest()[:10]
+        with self._lock:
+            entry = self.messages.get(message_id)
+            if entry is None:
+                entry = self.messages[message_id] = {
+                    "id": message_id,
+                    "level": level,
+                    "message": message,
+                    "count": 0,
+                    "workflows": set(),
+                    "tools": set(),
+                }
+            entry["count"] += 1
+            entry["workflows"].add(workflow)
+            entry["tools"].add(tool)
+        return message_id
+
+    def intern_step_messages(self, lines: List[str], level: str, workflow: str, tool: str) -> dict:
+        """Intern the messages of a step and return the number of occurrences of each message id."""
+        counts = {}
+        for line in lines:
+            message_id = self.intern(line, level, workflow, tool)
+            counts[message_id] = counts.get(message_id, 0) + 1
+        return counts
+
+    def to_json(self) -> List[dict]:
+        """Return the table, the most frequent messages first."""
+        return [
+            dict(entry, workflows=sorted(entry["workflows"]), tools=sorted(entry["tools"]))
+            for entry in sorted(self.messages.values(), key=lambda entry: (-entry["count"], entry["id"]))
+        ]
+
+    def write(self, outdir: str) -> str:
+        path = os.path.join(outdir, "messages.json")
+        with open(path, "w") as file:
+            json.dump(self.to_json(), file, indent=3)
+        LoggingWrapper.info(f"{len(self.messages)} distinct warnings and errors stored in {path}", color="green")
+        return path
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+import yaml
+
+from workflomics_benchmarker.cwl_utils import extract_inputs_from_cwl
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+
+PREFLIGHT_MODES = ["exclude", "fail"]
+
+# number of lines of the cwltool output kept as the reason a workflow is invalid
+MAX_REASON_LINES = 5
+
+
+class PreflightError(ValueError):
+    """Raised when some workflow runs are invalid and the pre-flight validation is set to fail."""
+
+
+def default_preflight_cache() -> str:
+    """Return the default path of the pre-flight verdict cache, `~/.cache/workflomics/preflight.json`."""
+    cache_home = os.environ.get("XDG_CACHE_HOME", str(Path.home().joinpath(".cache")))
+    return str(Path(cache_home).joinpath("workflomics", "preflight.json"))
+
+
+def _format_id(format_iri: str) -> str:
+    """Return the identifier of a format, e.g., `format_3244` for both `edam:format_3244` and its full IRI."""
+    return format_iri.rstrip("/").split("/")[-1].split(":")[-1].split("#")[-1]
+
+
+def check_input_files(input_yaml_path: str) -> dict:
+    """
+    Check that the local files of an input yaml file exist.
+
+    Parameters
+    ----------
+    input_yaml_path : str
+        The path to the input yaml file.
+
+    Returns
+    -------
+    dict
+        The input values, by input name, and the list of problems found.
+    """
+    with open(input_yaml_path, "r") as file:
+        input_data = yaml.safe_load(file) or {}
+    base_dir = Path(input_yaml_path).resolve().parent
+    problems = []
+    for name, value in input_data.items():
+        if not isinstance(value, dict) or value.get("class") not in ["File", "Directory"]:
+            continue
+        location = value.get("path", value.get("location"))
+        if location is None or location.startswith(("http://", "https://", "ftp://")):
+            continue
+        if location.startswith("file://"):
+            location = location[len("file://"):]
+        if not base_dir.joinpath(location).exists():
+            problems.append(f"{name}: {location} does not exist")
+    return {"inputs": input_data, "problems": problems}
+
+
+def check_workflow_inputs(workflow_inputs: dict, input_data: dict) -> List[str]:
+    """
+    Check that an input yaml file provides every required input of a workflow, in the expected format.
+
+    Parameters
+    ----------
+    workflow_inputs : dict
+        The inputs of the workflow, see `extract_inputs_from_cwl`.
+    input_data : dict
+        The input values, by input name.
+
+    Returns
+    -------
+    List[str]
+        The problems found.
+    """
+    problems = []
+    for name, workflow_input in workflow_inputs.items():
+        value = input_data.get(name)
+        if value is None:
+            if not workflow_input["optional"]:
+                problems.append(f"{name}: missing in the input")
+            continue
+        expected, given = workflow_input["format"], value.get("format") if isinstance(value, dict) else None
+        if isinstance(expected, str) and given is not None and _format_id(expected) != _format_id(given):
+            problems.append(f"{name}: format {given} instead of {expected}")
+    return problems
+
+
+class Preflight:
+    """
+    Validates the workflow runs before any of them is executed, so that an invalid workflow or input is reported
+    right away instead of when its turn comes.
+
+    The workflows are validated against the CWL schema with `cwltool --validate`, all of them concurrently, and
+    the inputs of each run are checked against the inputs of its workflow. As the schema validation of a workflow
+    only depends on its content and on the cwltool version, the workflows found valid are remembered by the hash
+    of their content, so that unchanged workflows are not validated again by the next runs. Invalid workflows are
+    always validated again, since their validation may also fail because a tool description could not be fetched.
+    The input checks are cheap and depend on the file system, so they are never cached.
+    """
+
+    def __init__(self, cwltool_version: str, cache_path: str = None, jobs: int = None, cwltool: str = "cwltool"):
+        self.cwltool_version = cwltool_version
+        self.cwltool = cwltool
+        self.cache_path = Path(cache_path if cache_path is not None else default_preflight_cache())
+        self.jobs = jobs or os.cpu_count() or 1
+        self.cache = {}
+        if self.cache_path.is_file():
+            try:
+                with open(self.cache_path, "r") as file:
+                    self.cache = json.load(file)
+            except ValueError:
+                LoggingWrapper.warning(f"Ignoring the corrupt pre-flight cache {self.cache_path}.")
+        self.cached_workflows = 0
+
+    def _save_cache(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=self.cache_path.parent, delete=False, suffix=".json") as file:
+            json.dump(self.cache, file, indent=2)
+        os.replace(file.name, self.cache_path)
+
+    def _cache_key(self, workflow_path: str) -> str:
+        with open(workflow_path, "rb") as file:
+            return hashlib.sha1(file.read()).hexdigest() + ":" + self.cwltool_version
+
+    def validate_schema(self, workflow_path: str) -> List[str]:
+        """Validate a workflow with `cwltool --validate` and return the problems found."""
+        result = subprocess.run(
+            [self.cwltool, "--validate", workflow_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+        if result.returncode == 0:
+            return []
+        lines = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+        return lines[-MAX_REASON_LINES:] or [f"cwltool --validate exited with code {result.returncode}"]
+
+    def validate_workflows(self, workflow_paths: List[str]) -> dict:
+        """
+        Validate the workflows against the CWL schema, concurrently, skipping the ones known to be valid.
+
+        Returns
+        -------
+        dict
+            The problems found in each workflow, by workflow path.
+        """
+        keys = {workflow_path: self._cache_key(workflow_path) for workflow_path in workflow_paths}
+        to_validate = [workflow_path for workflow_path in workflow_paths if keys[workflow_path] not in self.cache]
+        self.cached_workflows = len(workflow_paths) - len(to_validate)
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            validated = dict(zip(to_validate, executor.map(self.validate_schema, to_validate)))
+        for workflow_path, problems in validated.items():
+            if not problems:
+                self.cache[keys[workflow_path]] = {"valid": True, "workflow": Path(workflow_path).name}
+        if any(not problems for problems in validated.values()):
+            self._save_cache()
+        return {workflow_path: validated.get(workflow_path, []) for workflow_path in workflow_paths}
+
+    def check(self, workflow_paths: List[str], input_yaml_paths: List[str]) -> dict:
+        """
+        Validate every run of the workflows on the inputs.
+
+        Parameters
+        ----------
+        workflow_paths : List[str]
+            The paths to the workflow files.
+        input_yaml_paths : List[str]
+            The paths to the input yaml files.
+
+        Returns
+        -------
+        dict
+            The problems found in each run, by (workflow path, input yaml path). Valid runs have no problems.
+        """
+        schema_problems = self.validate_workflows(workflow_paths)
+        inputs = {input_yaml_path: check_input_files(input_yaml_path) for input_yaml_path in input_yaml_paths}
+        problems = {}
+        for workflow_path in workflow_paths:
+            workflow_inputs = extract_inputs_from_cwl(workflow_path) if not schema_problems[workflow_path] else {}
+            for input_yaml_path in input_yaml_paths:
+                problems[(workflow_path, input_yaml_path)] = (
+                    schema_problems[workflow_path]
+                    + inputs[input_yaml_path]["problems"]
+                    + check_workflow_inputs(workflow_inputs, inputs[input_yaml_path]["inputs"])
+                )
+        return problems
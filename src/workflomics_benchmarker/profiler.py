@@ -0,0 +1,146 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+
+
+class PhaseProfiler:
+    """
+    Measures how much wall time the benchmarker spends in its own phases (YAML parsing, log parsing,
+    scientific metric extraction, scoring, JSON writing), separately from the time spent in cwltool.
+    Time spent in a nested phase is only attributed to the innermost phase.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.timings = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cprofile = None
+        self._cprofile_path = None
+
+    def enable(self, cprofile_path: str = None):
+        """
+        Start collecting phase timings.
+
+        Parameters
+        ----------
+        cprofile_path : str, optional
+            If given, the benchmarker is also profiled with cProfile and the statistics are dumped to this path.
+            The dump can be opened with `snakeviz` or turned into a flamegraph with `flameprof`.
+        """
+        self.enabled = True
+        self.timings = {}
+        if cprofile_path is not None:
+            self._cprofile_path = cprofile_path
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def disable(self):
+        """Stop collecting phase timings and write the cProfile dump, if requested."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self._cprofile_path)
+            LoggingWrapper.info("cProfile statistics stored in " + self._cprofile_path, color="green")
+            self._cprofile = None
+        self.enabled = False
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _add(self, workflow_name, phase_name, seconds):
+        with self._lock:
+            phases = self.timings.setdefault(workflow_name, {})
+            phases[phase_name] = phases.get(phase_name, 0.0) + seconds
+
+    @contextmanager
+    def workflow(self, workflow_name: str):
+        """Attribute all phases measured in the current thread to the given workflow."""
+        if not self.enabled:
+            yield
+            return
+        previous = getattr(self._local, "workflow", None)
+        self._local.workflow = workflow_name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(workflow_name, "total", time.perf_counter() - start)
+            self._local.workflow = previous
+
+    @contextmanager
+    def phase(self, phase_name: str):
+        """Measure the time spent in the given phase, excluding the time spent in nested phases."""
+        if not self.enabled:
+            yield
+            return
+        stack = self._stack()
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self._add(getattr(self._local, "workflow", None), phase_name, elapsed - nested)
+
+    def summary(self) -> dict:
+        """
+        Summarise the collected timings.
+
+        Returns
+        -------
+        dict
+            The per-workflow and total time (in seconds) spent in each phase. The `benchmarker_overhead` entry
+            is the workflow time that was not spent waiting for cwltool.
+        """
+        workflows = {}
+        total = {}
+        for workflow_name, phases in self.timings.items():
+            phases = dict(phases)
+            if workflow_name is not None:
+                phases["benchmarker_overhead"] = phases.get("total", 0.0) - phases.get("cwltool_execution", 0.0)
+                workflows[workflow_name] = phases
+            for phase_name, seconds in phases.items():
+                total[phase_name] = total.get(phase_name, 0.0) + seconds
+        return {"workflows": workflows, "total": total}
+
+    def report(self, outdir: str) -> dict:
+        """Log the timing breakdown and store it as `benchmarker_profile.json` in the output directory."""
+        summary = self.summary()
+        for workflow_name, phases in summary["workflows"].items():
+            LoggingWrapper.info("Profile of " + workflow_name + ": " + _format_phases(phases))
+        LoggingWrapper.info("Profile of the whole run: " + _format_phases(summary["total"]), bold=True)
+        with open(os.path.join(outdir, "benchmarker_profile.json"), "w") as f:
+            json.dump(summary, f, indent=3)
+        return summary
+
+
+def _format_phases(phases: dict) -> str:
+    return ", ".join(f"{phase_name} {seconds:.3f}s" for phase_name, seconds in sorted(phases.items()))
+
+
+profiler = PhaseProfiler()
+
+
+def profiled_phase(phase_name: str):
+    """Decorator attributing the time spent in the decorated function to the given profiler phase."""
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with profiler.phase(phase_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
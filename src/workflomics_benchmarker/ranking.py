@@ -0,0 +1,152 @@
+from typing import List
+
+import numpy as np
+
+# The metrics the workflows can be ranked on: the title of the benchmark and whether lower or higher values are better.
+RANKING_METRICS = {
+    "time": ("Execution time", "min"),
+    "memory": ("Memory usage", "min"),
+    "errors": ("Errors", "min"),
+    "identified_proteins": ("Proteins", "max"),
+    "go_terms": ("GO-terms", "max"),
+}
+
+DEFAULT_RANKING_METRICS = list(RANKING_METRICS)
+
+# number of rows of the dominance matrix computed at once: this bounds the (rows, points, objectives) comparison
+# temporaries, while the boolean (points, points) dominance matrix itself is allocated in full (1 byte per pair)
+DOMINANCE_BLOCK_SIZE = 512
+
+
+def non_dominated_fronts(objectives: np.ndarray) -> np.ndarray:
+    """
+    Sort the points into non-dominated fronts, all objectives being minimized. The dominance matrix of all the
+    pairs of points is kept in memory, e.g., 100 MB for 10000 points.
+
+    Parameters
+    ----------
+    objectives : np.ndarray
+        The (n_points, n_objectives) matrix of objective values.
+
+    Returns
+    -------
+    np.ndarray
+        The front of each point, starting at 1 for the Pareto front.
+    """
+    n_points = objectives.shape[0]
+    dominates = np.zeros((n_points, n_points), dtype=bool)
+    for start in range(0, n_points, DOMINANCE_BLOCK_SIZE):
+        block = objectives[start:start + DOMINANCE_BLOCK_SIZE, None, :]
+        dominates[start:start + DOMINANCE_BLOCK_SIZE] = (block <= objectives[None, :, :]).all(axis=2) & (
+            block < objectives[None, :, :]
+        ).any(axis=2)
+
+    fronts = np.zeros(n_points, dtype=int)
+    domination_count = dominates.sum(axis=0)
+    remaining = np.ones(n_points, dtype=bool)
+    front = 0
+    while remaining.any():
+        front += 1
+        current = remaining & (domination_count == 0)
+        fronts[current] = front
+        remaining &= ~current
+        domination_count -= dominates[current].sum(axis=0)
+    return fronts
+
+
+def crowding_distances(objectives: np.ndarray, fronts: np.ndarray) -> np.ndarray:
+    """
+    Compute the crowding distance of each point within its front.
+
+    The distance is the sum over the objectives of the normalized distance between the two neighbours of a point.
+    The boundary points of a front get an infinite distance.
+    """
+    distances = np.zeros(objectives.shape[0])
+    for front in np.unique(fronts):
+        members = np.flatnonzero(fronts == front)
+        if len(members) <= 2:
+            distances[members] = np.inf
+            continue
+        values = objectives[members]
+        order = np.argsort(values, axis=0, kind="stable")
+        sorted_values = np.take_along_axis(values, order, axis=0)
+        span = sorted_values[-1] - sorted_values[0]
+        span[span == 0] = 1
+        gaps = np.zeros_like(values)
+        gaps[1:-1] = (sorted_values[2:] - sorted_values[:-2]) / span
+        gaps[[0, -1]] = np.inf
+        front_distances = np.zeros_like(values)
+        np.put_along_axis(front_distances, order, gaps, axis=0)
+        distances[members] = front_distances.sum(axis=1)
+    return distances
+
+
+def _objective(benchmark: dict, direction: str) -> float:
+    """Return the value of a benchmark to minimize, or NaN if it has no numeric value."""
+    aggregate_value = benchmark["aggregate_value"]
+    if "value" in aggregate_value:
+        value = aggregate_value["value"]
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value if direction == "min" else -value
+        return np.nan
+    # aggregated over several inputs, only the desirability is available, higher is better
+    return -aggregate_value["desirability"]
+
+
+def _succeeded(benchmarks: dict) -> bool:
+    status = benchmarks["Status"]["aggregate_value"]
+    return status.get("value", "✓") == "✓" and status["desirability"] == 1
+
+
+def rank_workflows(workflows_benchmarks: List[dict], metrics: List[str] = DEFAULT_RANKING_METRICS) -> None:
+    """
+    Rank the workflows by Pareto dominance over the given metrics and add the ranking to their benchmarks.
+
+    Each workflow gets a `ranking` entry with its non-dominated `front` (1 being the Pareto front), its
+    `crowding_distance` within the front (null for the boundary workflows of a front) and its overall `rank`,
+    ordering the workflows by front and then by decreasing crowding distance. The workflows that failed are only
+    ranked after all the workflows that finished successfully, as their partial measurements are not comparable.
+    Missing metric values count as the worst value of that metric.
+
+    Parameters
+    ----------
+    workflows_benchmarks : List[dict]
+        The benchmark results of the workflows, as stored in the json file.
+    metrics : List[str]
+        The metrics to rank the workflows on, keys of `RANKING_METRICS`.
+    """
+    if not workflows_benchmarks:
+        return
+    objectives = np.empty((len(workflows_benchmarks), len(metrics)))
+    succeeded = np.empty(len(workflows_benchmarks), dtype=bool)
+    for row, workflow in enumerate(workflows_benchmarks):
+        benchmarks = {benchmark["title"]: benchmark for benchmark in workflow["benchmarks"]}
+        succeeded[row] = _succeeded(benchmarks)
+        for column, metric in enumerate(metrics):
+            title, direction = RANKING_METRICS[metric]
+            objectives[row, column] = _objective(benchmarks[title], direction) if title in benchmarks else np.nan
+
+    # missing values are worse than any measured value
+    missing = np.isnan(objectives)
+    worst = np.where(missing.all(axis=0), 0, np.where(missing, -np.inf, objectives).max(axis=0) + 1)
+    objectives = np.where(missing, worst, objectives)
+
+    fronts = np.zeros(len(workflows_benchmarks), dtype=int)
+    distances = np.zeros(len(workflows_benchmarks))
+    offset = 0
+    for group in [succeeded, ~succeeded]:
+        if not group.any():
+            continue
+        fronts[group] = non_dominated_fronts(objectives[group]) + offset
+        distances[group] = crowding_distances(objectives[group], fronts[group])
+        offset = fronts[group].max()
+
+    order = np.lexsort((-distances, fronts))
+    ranks = np.empty(len(workflows_benchmarks), dtype=int)
+    ranks[order] = np.arange(1, len(workflows_benchmarks) + 1)
+    for row, workflow in enumerate(workflows_benchmarks):
+        workflow["ranking"] = {
+            "front": int(fronts[row]),
+            "crowding_distance": None if np.isinf(distances[row]) else round(float(distances[row]), 4),
+            "rank": int(ranks[row]),
+        }
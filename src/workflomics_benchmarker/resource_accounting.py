@@ -0,0 +1,416 @@
+import glob
+import os
+import re
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import yaml
+
+from workflomics_benchmarker.isolation import parse_cpu_list, pin_container
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# Where container runtimes place the cgroup v2 of a container, relative to the cgroup root.
+CONTAINER_CGROUP_CANDIDATES = [
+    "system.slice/docker-{cid}.scope",
+    "docker/{cid}",
+    "machine.slice/libpod-{cid}.scope",
+]
+
+job_command_pattern = re.compile(r"\[job (.+?)\] .*\$ (docker|podman)\b")
+
+
+def find_container_cgroup(container_id: str) -> str | None:
+    """
+    Find the cgroup v2 directory of a running container.
+
+    Parameters
+    ----------
+    container_id : str
+        The full id of the container.
+
+    Returns
+    -------
+    str | None
+        The path to the cgroup directory, or None if the container has no cgroup v2 (anymore).
+    """
+    for candidate in CONTAINER_CGROUP_CANDIDATES:
+        path = os.path.join(CGROUP_ROOT, candidate.format(cid=container_id))
+        if os.path.exists(os.path.join(path, "cpu.stat")):
+            return path
+    # rootless runtimes nest the container cgroups under the user's service
+    for path in glob.glob(os.path.join(CGROUP_ROOT, "user.slice", "**", f"*{container_id}*.scope"), recursive=True):
+        if os.path.exists(os.path.join(path, "cpu.stat")):
+            return path
+    return None
+
+
+def read_cgroup_usage(cgroup_path: str) -> dict | None:
+    """
+    Read the cumulative CPU and block I/O usage of a cgroup v2.
+
+    Parameters
+    ----------
+    cgroup_path : str
+        The path to the cgroup directory.
+
+    Returns
+    -------
+    dict | None
+        The user and system CPU time (in seconds), the bytes read and written, and the number of cores the
+        cgroup may use: its CPU set, capped by its CPU quota. None if the cgroup disappeared.
+    """
+    try:
+        with open(os.path.join(cgroup_path, "cpu.stat")) as file:
+            cpu_stat = dict(line.split() for line in file if line.strip())
+        io_read, io_write = 0, 0
+        if os.path.exists(os.path.join(cgroup_path, "io.stat")):
+            with open(os.path.join(cgroup_path, "io.stat")) as file:
+                for line in file:
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition("=")
+                        if key == "rbytes":
+                            io_read += int(value)
+                        elif key == "wbytes":
+                            io_write += int(value)
+        cores = os.cpu_count()
+        if os.path.exists(os.path.join(cgroup_path, "cpuset.cpus.effective")):  # e.g., a pinned container
+            with open(os.path.join(cgroup_path, "cpuset.cpus.effective")) as file:
+                cores = len(parse_cpu_list(file.read())) or cores
+        if os.path.exists(os.path.join(cgroup_path, "cpu.max")):
+            with open(os.path.join(cgroup_path, "cpu.max")) as file:
+                quota, period = file.read().split()
+            if quota != "max":
+                cores = min(cores, int(quota) / int(period))
+    except (OSError, ValueError):
+        return None
+    return {
+        "cpu_user": int(cpu_stat.get("user_usec", 0)) / 1e6,
+        "cpu_system": int(cpu_stat.get("system_usec", 0)) / 1e6,
+        "io_read": io_read,
+        "io_write": io_write,
+        "cores": cores,
+    }
+
+
+def read_cgroup_memory(cgroup_path: str) -> dict | None:
+    """
+    Read the memory usage of a cgroup v2 and the number of its processes killed by the OOM killer.
+
+    Parameters
+    ----------
+    cgroup_path : str
+        The path to the cgroup directory.
+
+    Returns
+    -------
+    dict | None
+        The current and peak memory usage (in bytes, the peak is None on kernels without `memory.peak`) and the
+        number of OOM kills. None if the cgroup disappeared.
+    """
+    try:
+        with open(os.path.join(cgroup_path, "memory.current")) as file:
+            current = int(file.read())
+        peak = None
+        if os.path.exists(os.path.join(cgroup_path, "memory.peak")):
+            with open(os.path.join(cgroup_path, "memory.peak")) as file:
+                peak = int(file.read())
+        oom_kills = 0
+        if os.path.exists(os.path.join(cgroup_path, "memory.events")):
+            with open(os.path.join(cgroup_path, "memory.events")) as file:
+                events = dict(line.split() for line in file if line.strip())
+            oom_kills = int(events.get("oom_kill", 0))
+    except (OSError, ValueError):
+        return None
+    return {"current": current, "peak": peak, "oom_kills": oom_kills}
+
+
+def write_memory_overrides(workflow_path: str, limit_mb: int, directory: str) -> str:
+    """
+    Write a cwltool overrides file giving the workflow, and the tools its steps run, a `ResourceRequirement` of
+    exactly `limit_mb` MiB, so that with `--strict-memory-limit` cwltool creates each step container with that
+    memory limit. The tools that declare no `ResourceRequirement` inherit the one of the workflow; the tools
+    embedded in the workflow that declare their own keep it until their container is limited by the monitor.
+
+    Parameters
+    ----------
+    workflow_path : str
+        The path to the workflow file.
+    limit_mb : int
+        The memory ceiling of each step in MiB.
+    directory : str
+        The directory in which the overrides file is written.
+
+    Returns
+    -------
+    str
+        The path to the overrides file.
+    """
+    with open(workflow_path, "r") as file:
+        workflow = yaml.safe_load(file)
+    steps = workflow.get("steps") or {}
+    steps = steps.values() if isinstance(steps, dict) else steps
+    # the tools are referred to as in the workflow, cwltool resolves them relative to the workflow file
+    targets = [Path(workflow_path).resolve().as_uri()]
+    targets += [step["run"] for step in steps if isinstance(step, dict) and isinstance(step.get("run"), str)]
+    overrides = {target: {"requirements": {"ResourceRequirement": {"ramMin": limit_mb, "ramMax": limit_mb}}} for target in targets}
+    path = os.path.join(directory, "memory_overrides.yml")
+    with open(path, "w") as file:
+        yaml.safe_dump({"cwltool:overrides": overrides}, file)
+    return path
+
+
+def limit_container_memory(container_id: str, limit_mb: int, runtime: str = "docker") -> bool:
+    """Limit the memory of a running container, without swap, so that it is OOM-killed when it uses more.
+    Return whether it worked."""
+    limit = f"{limit_mb}m"
+    command = [runtime, "update", "--memory", limit, "--memory-swap", limit, container_id]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+def container_memory_limit(container_id: str, runtime: str = "docker") -> int | None:
+    """Return the memory limit of a container in bytes (0 if it has none), or None if it cannot be inspected."""
+    try:
+        result = subprocess.run(
+            [runtime, "inspect", "--format", "{{.HostConfig.Memory}}", container_id],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        return int(result.stdout) if result.returncode == 0 else None
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return None
+
+
+def kill_container(container_id: str, runtime: str = "docker") -> bool:
+    """Kill a running container with SIGKILL, as the OOM killer does. Return whether it worked."""
+    try:
+        result = subprocess.run([runtime, "kill", container_id], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+class CgroupMonitor:
+    """
+    Samples the cgroup v2 accounting of the containers started for the steps of a workflow.
+    cwltool writes the id of each container to a file in `cidfile_dir` (`--record-container-id`). The
+    counters are cumulative, so the last sample taken before the container exits is its usage; the
+    sampling interval bounds how much usage at the very end of a step can be missed.
+    If CPUs are given, each container is pinned to them as soon as it is discovered.
+
+    Memory ceilings are enforced through the container runtime. The step containers are created with a limit of
+    `memory_limit` MiB (see `write_memory_overrides`); as soon as a container is discovered, its swap is disabled
+    and the containers created without the limit get it. A container that cannot be limited is recorded in
+    `unlimited`. When the containers of the workflow use more than `workflow_memory_limit` MiB together, the one
+    using the most memory is killed. The workflow ceiling is checked at every sample, so it can be exceeded for
+    up to one sampling interval.
+    """
+
+    def __init__(
+        self,
+        cidfile_dir: str,
+        interval: float = 0.25,
+        runtime: str = "docker",
+        cpus: List[int] = None,
+        numa_node: int = None,
+        memory_limit: int = None,
+        workflow_memory_limit: int = None,
+    ):
+        self.cidfile_dir = cidfile_dir
+        self.interval = interval
+        self.runtime = runtime
+        self.cpus = cpus
+        self.numa_node = numa_node
+        self.memory_limit = memory_limit
+        self.workflow_memory_limit = workflow_memory_limit
+        self.usage = {}
+        self.images = {}
+        # the peak memory (in bytes) and the number of OOM kills of each container, the containers killed for
+        # exceeding the workflow ceiling, and the containers running without the step ceiling
+        self.memory = {}
+        self.killed = set()
+        self.unlimited = set()
+        self._cgroups = {}
+        self._exited = set()
+        self._container_ids = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> dict:
+        """Stop sampling and return the last usage sampled for each cidfile."""
+        self._stop.set()
+        self._thread.join()
+        return self.usage
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+        self.sample()
+
+    def sample(self):
+        """Read the current usage of every container whose cidfile appeared so far."""
+        for cidfile in glob.glob(os.path.join(self.cidfile_dir, "*.cid")):
+            if cidfile not in self._container_ids:
+                try:
+                    container_id = Path(cidfile).read_text().strip()
+                except OSError:
+                    continue
+                if not container_id:
+                    continue
+                if self.cpus is not None:
+                    pin_container(container_id, self.cpus, self.numa_node, self.runtime)
+                if self.memory_limit is not None:
+                    self._limit_memory(cidfile, container_id)
+                self._container_ids[cidfile] = container_id
+                self.images[cidfile] = inspect_container_image(container_id, self.runtime)
+            if cidfile in self._exited:
+                continue
+            cgroup_path = self._cgroups.get(cidfile)
+            if cgroup_path is None:
+                # the runtime writes the cidfile before it creates the cgroup, which is looked for until it exists
+                cgroup_path = find_container_cgroup(self._container_ids[cidfile])
+                if cgroup_path is None:
+                    continue
+                self._cgroups[cidfile] = cgroup_path
+            usage = read_cgroup_usage(cgroup_path)
+            if usage is None:  # the container exited, keep its last sample
+                self._exited.add(cidfile)
+                continue
+            self.usage[cidfile] = usage
+            memory = read_cgroup_memory(cgroup_path)
+            if memory is not None:
+                self._sample_memory(cidfile, memory)
+        if self.workflow_memory_limit is not None:
+            self.enforce_workflow_memory_limit()
+
+    def _limit_memory(self, cidfile: str, container_id: str):
+        if limit_container_memory(container_id, self.memory_limit, self.runtime):
+            return
+        # the container may have been created with the limit, only its swap could not be disabled then
+        if not container_memory_limit(container_id, self.runtime):
+            LoggingWrapper.warning(f"Could not limit the memory of container {container_id}, its step runs without a memory ceiling.")
+            self.unlimited.add(cidfile)
+
+    def _sample_memory(self, cidfile: str, memory: dict):
+        previous = self.memory.get(cidfile, {"peak": 0})
+        self.memory[cidfile] = {
+            # without memory.peak, the peak is the highest usage sampled
+            "peak": max(previous["peak"], memory["peak"] or 0, memory["current"]),
+            "current": memory["current"],
+            "oom_kills": memory["oom_kills"],
+        }
+
+    def enforce_workflow_memory_limit(self):
+        """Kill the running container using the most memory while the containers of the workflow use more than
+        the workflow ceiling together."""
+        running = {
+            cidfile: memory["current"]
+            for cidfile, memory in self.memory.items()
+            if cidfile in self._cgroups and cidfile not in self._exited | self.killed
+        }
+        while running and sum(running.values()) > self.workflow_memory_limit * 2**20:
+            cidfile = max(running, key=running.get)
+            kill_container(self._container_ids[cidfile], self.runtime)
+            self.killed.add(cidfile)
+            del running[cidfile]
+
+
+def inspect_container_image(container_id: str, runtime: str = "docker") -> str | None:
+    """Return the digest of the image a running container was created from, or None if it cannot be inspected."""
+    try:
+        result = subprocess.run(
+            [runtime, "inspect", "--format", "{{.Image}}", container_id],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    return result.stdout.strip()
+
+
+def map_containers_to_steps(cwltool_output_lines: List[str]) -> dict:
+    """
+    Find which step each container was started for, based on the docker command lines cwltool logs.
+
+    Returns
+    -------
+    dict
+        The step name for each cidfile path.
+    """
+    containers = {}
+    job = None
+    for line in cwltool_output_lines:
+        match = job_command_pattern.search(line)
+        if match:
+            job = match.group(1)
+        if job is not None and "--cidfile=" in line:
+            containers[line.split("--cidfile=")[1].split()[0]] = job
+            job = None
+    return containers
+
+
+def read_output(stream, line_times: List[float] = None) -> str:
+    """Read the output of a command until it exits. If a list is given as `line_times`, the time (in seconds since
+    the epoch, measured with the monotonic clock) at which each line arrived is appended to it."""
+    if line_times is None:
+        return stream.read()
+    epoch_offset = time.time() - time.monotonic()
+    lines = []
+    for line in stream:
+        line_times.append(epoch_offset + time.monotonic())
+        lines.append(line)
+    return "".join(lines)
+
+
+def run_with_rusage(command: List[str], line_times: List[float] = None) -> tuple:
+    """
+    Run a command, capturing its combined output, and collect the resource usage of its process tree with wait4.
+    To run it on some CPUs only, prefix it with `taskset` (see `CpuSetPool.command_prefix`). If a list is given as
+    `line_times`, the time (in seconds since the epoch, measured with the monotonic clock) at which each line
+    of the output arrived is appended to it.
+
+    Returns
+    -------
+    tuple
+        The output of the command, its return code and its resource usage (CPU time in seconds and the
+        bytes read and written, including all its waited-for descendants).
+    """
+    start = time.monotonic()
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        # the log lines of cwltool must not be held back in its buffers to be timed when they arrive
+        env=dict(os.environ, PYTHONUNBUFFERED="1"),
+    )
+    output = read_output(process.stdout, line_times)
+    process.stdout.close()
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return output, process.returncode, {
+        "cpu_user": rusage.ru_utime,
+        "cpu_system": rusage.ru_stime,
+        # block operations are counted in units of 512 bytes
+        "io_read": rusage.ru_inblock * 512,
+        "io_write": rusage.ru_oublock * 512,
+        "elapsed": time.monotonic() - start,
+        "cores": os.cpu_count(),
+    }
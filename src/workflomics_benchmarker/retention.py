@@ -0,0 +1,131 @@
+import fnmatch
+import gzip
+import json
+import os
+import shutil
+import urllib.request
+from stat import S_ISLNK
+from typing import List
+
+DEFAULT_COMPRESS_PATTERNS = ["*.xml", "*.mzML", "*.mzid", "*.tsv"]
+
+
+def parse_cwltool_outputs(cwltool_output: str) -> dict | None:
+    """
+    Extract the output object cwltool prints when the workflow finishes from its combined output.
+
+    Returns
+    -------
+    dict | None
+        The output object, mapping each workflow output to its File or Directory object(s). None if it is missing.
+    """
+    decoder = json.JSONDecoder()
+    # the output object is printed as an indented json object starting on its own line
+    start = cwltool_output.rfind("\n{")
+    while start != -1:
+        try:
+            outputs, _ = decoder.raw_decode(cwltool_output, start + 1)
+            if isinstance(outputs, dict):
+                return outputs
+        except ValueError:
+            pass
+        start = cwltool_output.rfind("\n{", 0, start)
+    if cwltool_output.startswith("{"):
+        try:
+            return decoder.raw_decode(cwltool_output)[0]
+        except ValueError:
+            return None
+    return None
+
+
+def output_paths(outputs: dict, output_ids: List[str]) -> set:
+    """Return the paths of the files and directories of the given outputs, including their secondary files."""
+    paths = set()
+
+    def collect(value):
+        if isinstance(value, list):
+            for item in value:
+                collect(item)
+        elif isinstance(value, dict):
+            if value.get("class") in ["File", "Directory"]:
+                if "path" in value:
+                    paths.add(os.path.realpath(value["path"]))
+                elif value.get("location", "").startswith("file://"):
+                    paths.add(os.path.realpath(urllib.request.url2pathname(value["location"][len("file://"):])))
+            for key in ["secondaryFiles", "listing"]:
+                collect(value.get(key))
+
+    for output_id in output_ids:
+        collect(outputs.get(output_id))
+    return paths
+
+
+class RetentionPolicy:
+    """
+    Decides what happens to the outputs of a workflow once all the metrics have been extracted from them.
+    Applied to each workflow right after it is benchmarked, so that the disk usage of a batch stays bounded
+    whatever its size.
+
+    The rules, in order: the final outputs of the workflow (the outputs of the original workflow, not the ones
+    added by the benchmarker to extract metrics) are kept, files smaller than `keep_under` bytes are kept, files
+    matching one of the `compress_patterns` are compressed with gzip, and all the other files are deleted.
+    Symbolic links are left as they are, and their targets are never touched.
+    """
+
+    def __init__(self, keep_under: int = 2**20, compress_patterns: List[str] = DEFAULT_COMPRESS_PATTERNS):
+        self.keep_under = keep_under
+        self.compress_patterns = compress_patterns
+
+    def _is_kept(self, path: str, final_outputs: set) -> bool:
+        return any(path == final or path.startswith(final + os.sep) for final in final_outputs)
+
+    def apply(self, workflow_outdir: str, final_outputs: set) -> dict:
+        """
+        Apply the retention rules to the outputs of a workflow.
+
+        Parameters
+        ----------
+        workflow_outdir : str
+            The output directory of the workflow.
+        final_outputs : set
+            The real paths of the final output files and directories of the workflow.
+
+        Returns
+        -------
+        dict
+            The number of bytes reclaimed and the number of files deleted and compressed.
+        """
+        result = {"reclaimed": 0, "deleted": 0, "compressed": 0}
+        for directory, _, files in os.walk(workflow_outdir):
+            for file_name in files:
+                # the link itself is handled, never its target, which may be outside of the output directory
+                path = os.path.join(directory, file_name)
+                stat = os.lstat(path)
+                if S_ISLNK(stat.st_mode):  # a link takes no space, and its target is not an output to reclaim
+                    continue
+                size = stat.st_size
+                if self._is_kept(os.path.realpath(path), final_outputs) or size < self.keep_under or file_name.endswith(".gz"):
+                    continue
+                if any(fnmatch.fnmatch(file_name, pattern) for pattern in self.compress_patterns):
+                    with open(path, "rb") as source, gzip.open(path + ".gz", "wb", compresslevel=6) as target:
+                        shutil.copyfileobj(source, target)
+                    result["reclaimed"] += size - os.path.getsize(path + ".gz")
+                    result["compressed"] += 1
+                else:
+                    result["deleted"] += 1
+                    result["reclaimed"] += size
+                os.remove(path)
+        # remove the directories emptied by the deletions
+        for directory, _, _ in sorted(os.walk(workflow_outdir), key=lambda entry: -len(entry[0])):
+            if directory != workflow_outdir and not os.listdir(directory):
+                os.rmdir(directory)
+        return result
+
+
+def format_bytes(size: float) -> str:
+    """Return a human readable size."""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
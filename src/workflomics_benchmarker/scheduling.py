@@ -0,0 +1,82 @@
+import json
+import statistics
+from pathlib import Path
+from typing import List
+
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+
+ORDERING_POLICIES = ["name", "longest-first"]
+
+# estimated seconds of a step when there is no history of any tool at all
+DEFAULT_STEP_SECONDS = 1.0
+
+
+def load_tool_times(benchmarks_path: str) -> dict:
+    """
+    Collect the execution time of each tool from a previous `benchmarks.json`.
+
+    Parameters
+    ----------
+    benchmarks_path : str
+        The path to the `benchmarks.json` of a previous benchmarking run, holding either the list of workflow
+        benchmarks of a single input or the benchmarks keyed by input.
+
+    Returns
+    -------
+    dict
+        The median execution time (in seconds) of the steps of each tool, keyed by the step label without number.
+        Empty if the file does not exist or cannot be read.
+    """
+    if benchmarks_path is None or not Path(benchmarks_path).is_file():
+        return {}
+    try:
+        with open(benchmarks_path, "r") as file:
+            benchmarks = json.load(file)
+    except (OSError, ValueError) as e:
+        LoggingWrapper.warning(f"Could not read the previous benchmarks {benchmarks_path}: {e}")
+        return {}
+    if isinstance(benchmarks, dict):
+        records = [record for records in benchmarks.get("inputs", {}).values() for record in records]
+    else:
+        records = benchmarks
+
+    step_times = {}
+    for record in records:
+        for benchmark in record.get("benchmarks", []):
+            if benchmark.get("title") != "Execution time":
+                continue
+            for step in benchmark.get("steps", []):
+                # failed steps only ran partially, so their time underestimates the tool
+                if isinstance(step["value"], (int, float)) and step.get("desirability") != -1:
+                    step_times.setdefault(step["label"], []).append(step["value"])
+    return {tool: statistics.median(times) for tool, times in step_times.items()}
+
+
+def estimate_workflow_time(steps: List[str], tool_times: dict, default_time: float) -> float:
+    """Estimate the execution time of a workflow as the sum of the expected times of its steps."""
+    return sum(tool_times.get(step.rstrip("_0123456789"), default_time) for step in steps)
+
+
+def longest_first(runs_steps: List[List[str]], tool_times: dict) -> List[int]:
+    """
+    Order the runs by decreasing estimated execution time, so that a long run does not start last and
+    dominate the total wall time when the runs are executed concurrently.
+
+    Tools without history are expected to take the median time of the known tools (or DEFAULT_STEP_SECONDS
+    if there is no history at all). Runs with the same estimate keep their original order.
+
+    Parameters
+    ----------
+    runs_steps : List[List[str]]
+        The names of the steps of the workflow of each run.
+    tool_times : dict
+        The expected execution time of each tool, see `load_tool_times`.
+
+    Returns
+    -------
+    List[int]
+        The indices of the runs, in the order they should be started.
+    """
+    default_time = statistics.median(tool_times.values()) if tool_times else DEFAULT_STEP_SECONDS
+    estimates = [estimate_workflow_time(steps, tool_times, default_time) for steps in runs_steps]
+    return sorted(range(len(runs_steps)), key=lambda index: -estimates[index])
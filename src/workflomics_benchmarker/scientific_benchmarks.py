@@ -1,20 +1,182 @@
 import json
-import jsonpath_ng.ext
 import re
 import os
+from typing import Iterator, List
 
 import pandas as pd
 from lxml import etree
 
+from workflomics_benchmarker.profiler import profiled_phase
 
 
+
+# the enriched terms that are counted: GO-terms with a p-value < 0.001
+SIGNIFICANT_P_VALUE = 0.001
+go_term_pattern = re.compile(r'GO:')
+# the rows of the GOEnrichment result tables read at a time, and the columns they are recognized by
+GOENRICHMENT_CHUNK_ROWS = 100000
+GOENRICHMENT_COLUMNS = ["GO Term", "p-value"]
+
+
+# what the scan of a JSON value stops at: in a string, outside of strings (a whole string, up to the end of the
+# buffer if it continues in the next chunk, or a bracket), and after a scalar
+json_string_pattern = re.compile(r'["\\]')
+json_structure_pattern = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*("?)|[\[\]{}]')
+json_scalar_end_pattern = re.compile(r'[\s,:\]}]')
+
+
+def iter_json_array(file, key: str, chunk_size: int = 64 * 1024) -> Iterator:
+    """
+    Yield the items of the array under `key` in the top-level object of a JSON file one at a time, reading the
+    file in chunks, so that only one item is held in memory. The other values of the top-level object are
+    skipped without being decoded.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a JSON object, or its value under `key` is not an array.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position = "", 0
+
+    def read_more() -> bool:
+        nonlocal buffer, position
+        chunk = file.read(chunk_size)
+        if chunk:  # the consumed part of the buffer is dropped
+            buffer, position = buffer[position:] + chunk, 0
+        return bool(chunk)
+
+    def next_char() -> str:
+        """Skip the whitespace and return the next character, without consuming it ("" at the end of the file)."""
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or not read_more():
+                return buffer[position:position + 1]
+
+    def value_end(keep: bool) -> int:
+        """
+        Find the end of the value at the current position, reading more until it is complete. Each character is
+        scanned once, whatever the number of chunks the value spans. Unless the value is kept, the scanned part
+        is consumed, so that it is dropped from the buffer.
+        """
+        nonlocal position
+        first = next_char()
+        if first == "":
+            raise ValueError("Unexpected end of the JSON file.")
+        offset = 0  # the scanned part, relative to the position as the buffer is shifted by read_more
+
+        def more() -> bool:
+            nonlocal position, offset
+            if not keep:
+                consumed = min(offset, len(buffer) - position)
+                position, offset = position + consumed, offset - consumed
+            return read_more()
+
+        if first not in '[{"':  # a number, true, false or null
+            while True:
+                match = json_scalar_end_pattern.search(buffer, position + offset)
+                if match is not None:
+                    return match.start()
+                offset = len(buffer) - position
+                if not more():
+                    return len(buffer)
+        depth, in_string = 0, False
+        while True:
+            match = (json_string_pattern if in_string else json_structure_pattern).search(buffer, position + offset)
+            if match is None:
+                # an escaped character may be the first one of the next chunk
+                offset = max(offset, len(buffer) - position)
+                if not more():
+                    raise ValueError("Unexpected end of the JSON file.")
+                continue
+            character = match.group()[0]
+            offset = match.end() - position
+            if in_string:
+                if character == "\\":
+                    offset += 1  # the escaped character
+                else:
+                    in_string = False
+            elif character == '"':
+                in_string = not match.group(1)  # the string continues in the next chunk
+            elif character in "[{":
+                depth += 1
+            else:
+                depth -= 1
+            if depth == 0 and not in_string:
+                return position + offset
+
+    def decode():
+        """Decode the value at the current position, once it is complete in the buffer."""
+        nonlocal position
+        # a number is only known to be complete once the character after it is read (e.g., `1.` may be `1.5e-05`)
+        if next_char() not in '[{"':
+            end = value_end(keep=True)  # reads more, which shifts the buffer
+            value, position = decoder.raw_decode(buffer[:end], position)
+            return value
+        try:  # most values, e.g., the items of the array, are already complete in the buffer
+            value, end = decoder.raw_decode(buffer, position)
+            if end < len(buffer):
+                position = end
+                return value
+        except ValueError:
+            pass
+        value_end(keep=True)  # read the rest of the value, which is scanned once however many chunks it spans
+        value, position = decoder.raw_decode(buffer, position)
+        return value
+
+    def skip():
+        """Skip the value at the current position, without decoding it."""
+        nonlocal position
+        position = value_end(keep=False)
+
+    def expect(characters: str) -> str:
+        nonlocal position
+        character = next_char()
+        if character == "" or character not in characters:
+            raise ValueError(f"Expected one of {characters!r} in the JSON file, found {character or 'its end'!r}.")
+        position += 1
+        return character
+
+    expect("{")
+    if next_char() == "}":
+        return
+    while True:
+        name = decode()
+        expect(":")
+        if name == key:
+            break
+        skip()  # another value of the top-level object
+        if expect(",}") == "}":
+            return
+    expect("[")
+    if next_char() == "]":
+        return
+    while True:
+        yield decode()
+        if expect(",]") == "]":
+            return
+
+
+def significant_go_term(result: dict):
+    """Return the id of an enrichment result of g:Profiler if it is a significantly enriched GO-term, else None."""
+    p_value = result.get("p_value") if isinstance(result, dict) else None
+    if not isinstance(p_value, (int, float)) or not p_value < SIGNIFICANT_P_VALUE or "native" not in result:
+        return None
+    return result["native"] if go_term_pattern.search(str(result["native"])) else None
+
+
+@profiled_phase("scientific_metrics")
 def benchmark_gProfiler(path_to_output: str) -> int:
     """
     Count the number of significantly enriched unique GO-terms with a p-value < 0.001.
 
+    The results are streamed from the file, so that the memory use does not grow with the size of the output.
+
     Parameters
     ----------
-    pethia_output : str
+    path_to_output : str
         The path to the g:Profiler output JSON file.
     
     Returns
@@ -22,54 +184,70 @@ def benchmark_gProfiler(path_to_output: str) -> int:
     int
         The number of significantly enriched unique GO-terms.
     """
+    go_terms = set()
+    with open(path_to_output, "r") as file:
+        for result in iter_json_array(file, "result"):
+            go_term = significant_go_term(result)
+            if go_term is None:
+                continue
+            try:
+                go_terms.add(go_term)
+            except TypeError as e:  # not a term id
+                print(f"Warning: {e}")
+                return 0
+    return len(go_terms)
 
-    # Load the g:Profiler output JSON:
-    data = json.load(open(path_to_output))
-
-    # Definte jsonpath for terms enriched with a p-value < 0.001:
-    jsonpath_expr = jsonpath_ng.ext.parse('$.result[?(@.p_value < 0.001)].native')
-
-    # Define regular expression for GO-terms:
-    regex = re.compile(r'GO:')
-
-    # Extract significantly enriched GO-terms:
-    all_terms = [match.value for match in jsonpath_expr.find(data)]
-    go_terms = [item for item in all_terms if regex.search(str(item))]
 
-    # Return the number of significantly enriched unique GO-terms:
+def is_goenrichment_table(path: str) -> bool:
+    """Check whether a file is a result table of GOEnrichment, i.e., whether its header has the GO-term and p-value columns."""
     try:
-        return len(list(set(go_terms)))
-    except (IndexError, TypeError) as e:
-        print(f"Warning: {e}")
-        return 0
+        with open(path, "r") as file:
+            header = file.readline().rstrip("\r\n").split("\t")
+    except (OSError, UnicodeDecodeError):
+        return False
+    return all(column in header for column in GOENRICHMENT_COLUMNS)
 
 
-def benchmark_goenrichment(path_to_output: str) -> int:
+@profiled_phase("scientific_metrics")
+def benchmark_goenrichment(path_to_output: str | List[str]) -> int:
     """
-    Benchmark the GOEnrichment output. It currently reads the three TSV files from the GOEnrichment output, 
-    however, our implementation will only output one TSV file.
-    """ 
-    # Read and merge the three TSV files from the GOEnrichment output:
-    df_BP = pd.read_csv("BP_result.txt", sep='\t')
-    df_CC = pd.read_csv("CC_result.txt", sep='\t')
-    df_MF = pd.read_csv("MF_result.txt", sep='\t')
-    merged_df = pd.concat([df_BP, df_CC, df_MF])
+    Count the number of significantly enriched unique GO-terms with a p-value < 0.001 in the GOEnrichment
+    result tables, e.g., the BP, CC and MF tables.
 
-    """Extract GO terms enriched with a p-value < 0.001:"""
+    Only the GO-term and p-value columns are read, a chunk of rows at a time, so that the memory use does not
+    grow with the size of the tables.
 
-    go_terms = merged_df["GO Term"]
-    go_terms = merged_df.loc[merged_df['p-value'] < 0.001]["GO Term"]
+    Parameters
+    ----------
+    path_to_output : str | List[str]
+        The path(s) to the TSV result table(s) of GOEnrichment.
 
-    """Count the number of significantly enriched unique GO-terms:"""
-    try:
-        return len(list(set(go_terms)))
-    except (IndexError, TypeError) as e:
-        print(f"Warning: {e}")
-        return 0
-    
+    Returns
+    -------
+    int
+        The number of significantly enriched unique GO-terms.
 
+    Raises
+    ------
+    ValueError
+        If a table does not have the GO-term and p-value columns, or a p-value is not a number.
+    """
+    paths = [path_to_output] if isinstance(path_to_output, str) else path_to_output
+    go_terms = set()
+    for path in paths:
+        chunks = pd.read_csv(
+            path,
+            sep='\t',
+            usecols=GOENRICHMENT_COLUMNS,
+            dtype={"GO Term": str, "p-value": float},
+            chunksize=GOENRICHMENT_CHUNK_ROWS,
+        )
+        for chunk in chunks:
+            go_terms.update(chunk.loc[chunk["p-value"] < SIGNIFICANT_P_VALUE, "GO Term"])
+    return len(go_terms)
 
 
+@profiled_phase("scientific_metrics")
 def benchmark_peptideprophet(path_to_output: str) -> int:
     tree = etree.parse(path_to_output) # the PeptideProphet output, regardless of search engine (Comet, X!Tandem), e.g., 'interact.pep.xml'
     root = tree.getroot()
@@ -82,6 +260,7 @@ def benchmark_peptideprophet(path_to_output: str) -> int:
         return 0
 
     
+@profiled_phase("scientific_metrics")
 def benchmark_proteinprophet(path_to_output: str) -> int:
     """ProteinProphet ProtXML benchmark"""
 
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import tempfile
+import urllib.request
+from pathlib import Path
+
+import yaml
+
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+
+
+def default_staging_dir() -> str:
+    """Return the default directory of the input cache, `~/.cache/workflomics/inputs`."""
+    cache_home = os.environ.get("XDG_CACHE_HOME", str(Path.home().joinpath(".cache")))
+    return str(Path(cache_home).joinpath("workflomics", "inputs"))
+
+
+CHUNK_SIZE = 2**20
+
+
+class InputStager:
+    """
+    Stages the input files of the workflows once into a local cache directory, e.g., on a local scratch disk or
+    a tmpfs, so that the workflows read them from fast local storage instead of copying or downloading them again
+    for every run.
+
+    Each file is stored as `<sha1>/<file name>` and its checksum is computed only once, while it is copied or
+    downloaded into the cache. A manifest remembers the size and modification time of every staged local file, so
+    that the files are only copied (and hashed) again when they changed. URLs are downloaded once.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = Path(cache_dir if cache_dir is not None else default_staging_dir())
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.cache_dir.joinpath("manifest.json")
+        self.manifest = {}
+        if self.manifest_path.is_file():
+            try:
+                with open(self.manifest_path, "r") as file:
+                    self.manifest = json.load(file)
+            except ValueError:
+                LoggingWrapper.warning(f"Ignoring the corrupt input cache manifest {self.manifest_path}.")
+        self.staged_bytes = 0
+        self.reused_bytes = 0
+
+    def _save_manifest(self):
+        with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, delete=False, suffix=".json") as file:
+            json.dump(self.manifest, file, indent=2)
+        os.replace(file.name, self.manifest_path)
+
+    def _is_cached(self, source: str, stat: os.stat_result | None) -> bool:
+        entry = self.manifest.get(source)
+        if entry is None or not Path(entry["path"]).is_file() or os.path.getsize(entry["path"]) != entry["size"]:
+            return False
+        # local files are staged again when they changed, URLs are assumed not to change
+        return stat is None or (entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime)
+
+    def _copy_and_hash(self, source: str, is_url: bool) -> tuple:
+        """Copy (or download) the source into the cache, computing its checksum on the way."""
+        sha1 = hashlib.sha1()
+        size = 0
+        with tempfile.NamedTemporaryFile("wb", dir=self.cache_dir, delete=False, suffix=".part") as target:
+            with urllib.request.urlopen(source) if is_url else open(source, "rb") as stream:
+                while chunk := stream.read(CHUNK_SIZE):
+                    sha1.update(chunk)
+                    target.write(chunk)
+                    size += len(chunk)
+        return target.name, sha1.hexdigest(), size
+
+    def stage_file(self, source: str) -> dict:
+        """
+        Stage a local file or URL into the cache, unless it is already there.
+
+        Parameters
+        ----------
+        source : str
+            The absolute path or URL of the file.
+
+        Returns
+        -------
+        dict
+            The path of the cached file, its sha1 checksum and its size.
+        """
+        is_url = source.startswith(("http://", "https://", "ftp://"))
+        stat = None if is_url else os.stat(source)
+        if self._is_cached(source, stat):
+            entry = self.manifest[source]
+            self.reused_bytes += entry["size"]
+            return entry
+
+        LoggingWrapper.info(f"Staging {source} into {self.cache_dir}...")
+        part_path, checksum, size = self._copy_and_hash(source, is_url)
+        name = Path(urllib.request.url2pathname(source.split("?")[0])).name if is_url else Path(source).name
+        cached_path = self.cache_dir.joinpath(checksum, name)
+        cached_path.parent.mkdir(exist_ok=True)
+        if cached_path.is_file():  # the same content was already staged from another source
+            os.remove(part_path)
+        else:
+            os.replace(part_path, cached_path)
+            os.chmod(cached_path, 0o444)
+        self.staged_bytes += size
+        entry = {
+            "path": str(cached_path),
+            "sha1": checksum,
+            "size": size,
+            "mtime": stat.st_mtime if stat is not None else None,
+        }
+        self.manifest[source] = entry
+        self._save_manifest()
+        return entry
+
+    def _stage_value(self, value, base_dir: Path):
+        """Stage the File objects in an input value, recursively, and return the rewritten value."""
+        if isinstance(value, list):
+            return [self._stage_value(item, base_dir) for item in value]
+        if not isinstance(value, dict):
+            return value
+        value = {key: self._stage_value(item, base_dir) for key, item in value.items()}
+        if value.get("class") not in ["File", "Directory"]:
+            return value
+        key = "path" if "path" in value else "location"
+        if key not in value:  # a literal file with `contents`
+            return value
+        source = value[key]
+        if source.startswith("file://"):
+            source = urllib.request.url2pathname(source[len("file://"):])
+        if not source.startswith(("http://", "https://", "ftp://")):
+            source = str(base_dir.joinpath(source).resolve())
+        if value["class"] == "Directory":  # directories are not cached, but the staged yaml moves
+            value[key] = source
+            return value
+        entry = self.stage_file(source)
+        value.pop("location", None)
+        value["path"] = entry["path"]
+        value["checksum"] = "sha1$" + entry["sha1"]
+        return value
+
+    def stage_input_yaml(self, input_yaml_path: str, staged_yaml_path: str) -> str:
+        """
+        Stage all the input files of an input yaml file and write a copy of the yaml pointing to the cached files.
+
+        Parameters
+        ----------
+        input_yaml_path : str
+            The path to the input yaml file.
+        staged_yaml_path : str
+            The path to write the staged input yaml file to.
+
+        Returns
+        -------
+        str
+            The path to the staged input yaml file.
+        """
+        with open(input_yaml_path, "r") as file:
+            input_data = yaml.safe_load(file)
+        staged_data = self._stage_value(input_data, Path(input_yaml_path).resolve().parent)
+        with open(staged_yaml_path, "w") as file:
+            yaml.dump(staged_data, file)
+        return staged_yaml_path
@@ -0,0 +1,178 @@
+import json
+import math
+import os
+import statistics
+import tempfile
+from pathlib import Path
+from typing import List
+
+from workflomics_benchmarker.benchmark_utils import FAILED_STATUSES, OOM_STATUS
+from workflomics_benchmarker.cwl_utils import extract_steps_from_cwl
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+
+TOOL_PROFILES_FILE = "tool_profiles.json"
+
+
+def distribution(values: List[float]) -> dict | None:
+    """Summarize values by their count, minimum, median, 90th percentile, maximum and mean. None if there are none."""
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "min": values[0],
+        "median": statistics.median(values),
+        # nearest-rank percentile, i.e., a value that was actually measured
+        "p90": values[math.ceil(0.9 * len(values)) - 1],
+        "max": values[-1],
+        "mean": round(statistics.fmean(values), 3),
+    }
+
+
+def build_tool_profiles(benchmarks_by_input: dict) -> dict:
+    """
+    Index the step benchmarks of all the workflows by tool, i.e., by step label without number.
+
+    The time and memory distributions only include the successful steps, as the failed steps only ran
+    partially. The warnings are counted for every executed step. The records of deduplicated workflows are left
+    out, as they repeat the results of the workflow that was executed in their place.
+
+    Parameters
+    ----------
+    benchmarks_by_input : dict
+        The benchmark results of the workflows run on each input, by input name, as stored in `benchmarks.json`.
+
+    Returns
+    -------
+    dict
+        The number of runs, failures and OOM kills of each tool, its failure rate, the workflows that used it and
+        the distributions of its execution time (seconds), memory usage (MB) and number of warnings.
+    """
+    tools = {}
+    for records in benchmarks_by_input.values():
+        for record in records:
+            benchmarks = {benchmark["title"]: benchmark["steps"] for benchmark in record.get("benchmarks", [])}
+            # the results fanned out to a deduplicated workflow are the measurements of another record
+            if "Status" not in benchmarks or "deduplicatedFrom" in record:
+                continue
+            for index, status in enumerate(benchmarks["Status"]):
+                if status["value"] == "-":  # not reached
+                    continue
+                tool = tools.setdefault(
+                    status["label"],
+                    {"runs": 0, "failures": 0, "oom_kills": 0, "workflows": set(), "time": [], "memory": [], "warnings": []},
+                )
+                tool["runs"] += 1
+                tool["workflows"].add(record["workflowName"])
+                failed = status["value"] in FAILED_STATUSES
+                tool["failures"] += failed
+                tool["oom_kills"] += status["value"] == OOM_STATUS
+                if "Warnings" in benchmarks:
+                    tool["warnings"].append(benchmarks["Warnings"][index]["value"])
+                if failed:
+                    continue
+                time = benchmarks.get("Execution time", [None] * (index + 1))[index]
+                if time is not None and isinstance(time["value"], (int, float)):
+                    tool["time"].append(time["value_ms"] / 1000 if "value_ms" in time else time["value"])
+                memory = benchmarks.get("Memory usage", [None] * (index + 1))[index]
+                if memory is not None and isinstance(memory["value"], (int, float)):
+                    tool["memory"].append(memory["value"])
+
+    return {
+        label: {
+            "runs": tool["runs"],
+            "failures": tool["failures"],
+            "oom_kills": tool["oom_kills"],
+            "failure_rate": round(tool["failures"] / tool["runs"], 3),
+            "workflows": sorted(tool["workflows"]),
+            "time": distribution(tool["time"]),
+            "memory": distribution(tool["memory"]),
+            "warnings": distribution(tool["warnings"]),
+        }
+        for label, tool in sorted(tools.items())
+    }
+
+
+def write_tool_profiles(profiles: dict, outdir: str) -> str:
+    """Store the tool profiles in `tool_profiles.json` in the output directory, atomically, and return its path."""
+    path = os.path.join(outdir, TOOL_PROFILES_FILE)
+    with tempfile.NamedTemporaryFile("w", dir=outdir, delete=False, suffix=".json") as file:
+        json.dump(profiles, file, indent=3)
+    os.replace(file.name, path)
+    return path
+
+
+def load_tool_profiles(path: str) -> dict:
+    """
+    Load the tool profiles stored by a benchmarking run.
+
+    Raises
+    ------
+    OSError
+        If the file cannot be read.
+    ValueError
+        If the file is not valid json.
+    """
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def predict_workflow_cost(steps: List[str], profiles: dict) -> dict:
+    """
+    Predict the cost of a workflow from the profiles of the tools of its steps.
+
+    The execution time is the sum of the median times of the steps (i.e., the steps run one after the other), the
+    memory usage the highest median memory of the steps and the success probability the product of the success
+    rates of the steps.
+
+    Parameters
+    ----------
+    steps : List[str]
+        The names of the steps of the workflow.
+    profiles : dict
+        The tool profiles, see `build_tool_profiles`.
+
+    Returns
+    -------
+    dict
+        The predicted time (seconds), memory (MB) and success probability, and the tools without a profile, which
+        are left out of the prediction.
+    """
+    time, memory, success_probability = 0.0, 0.0, 1.0
+    unknown_tools = []
+    for step in steps:
+        tool = step.rstrip("_0123456789")
+        profile = profiles.get(tool)
+        if profile is None:
+            unknown_tools.append(tool)
+            continue
+        if profile["time"] is not None:
+            time += profile["time"]["median"]
+        if profile["memory"] is not None:
+            memory = max(memory, profile["memory"]["median"])
+        success_probability *= 1 - profile["failure_rate"]
+    return {
+        "time": round(time, 3),
+        "memory": memory,
+        "success_probability": round(success_probability, 3),
+        "unknown_tools": unknown_tools,
+    }
+
+
+def show_prediction(args) -> List[dict]:
+    """Log the predicted cost of each given workflow, based on the tool profiles of a previous benchmarking run."""
+    try:
+        profiles = load_tool_profiles(args.profiles)
+    except (OSError, ValueError) as e:
+        LoggingWrapper.error(f"Could not read the tool profiles {args.profiles}: {e}")
+        return []
+    predictions = []
+    for workflow in args.workflow:
+        prediction = predict_workflow_cost(extract_steps_from_cwl(workflow), profiles)
+        predictions.append(prediction)
+        LoggingWrapper.info(
+            f"{Path(workflow).name}: {prediction['time']:.1f} s, {prediction['memory']:.0f} MB, "
+            f"{100 * prediction['success_probability']:.0f}% chance of success"
+            + (f" (no profile of {', '.join(prediction['unknown_tools'])})" if prediction["unknown_tools"] else "")
+        )
+    return predictions
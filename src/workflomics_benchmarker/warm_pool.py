@@ -0,0 +1,269 @@
+import json
+import os
+import queue
+import random
+import runpy
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from typing import List
+
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+from workflomics_benchmarker.resource_accounting import read_output
+
+# started with the path to the cwltool executable and the file descriptor of the connection to the pool
+WORKER_COMMAND = (
+    "import socket, sys; from workflomics_benchmarker.warm_pool import serve; "
+    "serve(sys.argv[1], socket.socket(fileno=int(sys.argv[2])))"
+)
+# the largest request (arguments and environment) sent to a worker, bounded by the socket buffer
+MAX_MESSAGE_BYTES = 128 * 1024
+
+
+def preload(executable: str):
+    """
+    Import everything the cwltool executable imports, without running it, and load the CWL schemas of every
+    supported version into the schema cache of cwltool.
+    """
+    runpy.run_path(executable, run_name="workflomics_warm")
+    try:
+        from cwltool.process import get_schema
+        from cwltool.update import UPDATES
+    except ImportError:  # not the Python cwltool
+        return
+    for version in UPDATES:
+        get_schema(version)
+
+
+def script_interpreter(path: str) -> str:
+    """
+    Return the Python interpreter a script is run with, from its shebang line. An interpreter started through
+    `env` (e.g., `#!/usr/bin/env python3`) is looked up on the PATH.
+
+    Raises
+    ------
+    ValueError
+        If the script is not a Python script, or its interpreter is not found.
+    """
+    with open(path, "rb") as file:
+        line = file.readline()
+    words = line[2:].decode(errors="replace").split() if line.startswith(b"#!") else []
+    if words and os.path.basename(words[0]) == "env":
+        words = [word for word in words[1:] if not word.startswith("-")]
+        if words and shutil.which(words[0]) is None:
+            raise ValueError(f"The interpreter {words[0]} of {path} is not found on the PATH.")
+        words = [shutil.which(words[0])] if words else []
+    if not words or "python" not in os.path.basename(words[0]):
+        raise ValueError(f"{path} is not a Python script, it cannot be preloaded.")
+    return words[0]
+
+
+def find_python_executable(executable: str = "cwltool") -> str:
+    """
+    Return the path to the executable on the PATH, checking that it is a Python script that can be preloaded:
+    its interpreter must run in the Python environment of the benchmarker, whose modules the workers import.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the executable is not found on the PATH.
+    ValueError
+        If the executable is not a Python script, or it runs in another Python environment.
+    """
+    path = shutil.which(executable)
+    if path is None:
+        raise FileNotFoundError(f"{executable} is not found on the PATH.")
+    interpreter = script_interpreter(path)
+    result = subprocess.run([interpreter, "-c", "import sys; print(sys.prefix)"], capture_output=True, text=True)
+    if result.returncode != 0 or result.stdout.strip() != sys.prefix:
+        raise ValueError(
+            f"{path} runs with {interpreter}, not in the Python environment of the benchmarker ({sys.prefix}), "
+            "it cannot be preloaded."
+        )
+    return path
+
+
+def run_forked(executable: str, request: dict, output_fd: int, connection: socket.socket):
+    """
+    Run the cwltool executable in a process forked from a warm worker, as if it were started with the arguments,
+    environment, working directory and CPUs of the request, and exit with its exit code. Never returns.
+
+    The forked process starts from the state of the worker right after `preload`, which it only changes in its
+    own copy of the memory. The worker itself never runs cwltool, so no state is carried over between runs.
+    """
+    code = 1
+    try:
+        connection.close()
+        os.dup2(output_fd, 1)
+        os.dup2(output_fd, 2)
+        os.close(output_fd)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        random.seed()  # the forked processes would otherwise share the random state of the worker
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        if request["cpus"] is not None:
+            os.sched_setaffinity(0, request["cpus"])
+        # line buffered, so that the lines are timed when they are written
+        sys.stdout = open(1, "w", buffering=1, encoding="utf-8", closefd=False)
+        sys.stderr = open(2, "w", buffering=1, encoding="utf-8", closefd=False)
+        sys.argv = [executable] + request["args"]
+        try:
+            runpy.run_path(executable, run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def serve(executable: str, connection: socket.socket):
+    """
+    Serve the requests of a `WarmWorkerPool` until it closes the connection: preload cwltool, then fork a
+    process running cwltool for each request and reply with its exit code and resource usage.
+    """
+    # Ctrl-C reaches the running cwltool, the pool stops the worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    preload(executable)
+    connection.send(b"ready")
+    while True:
+        message, fds, _, _ = socket.recv_fds(connection, MAX_MESSAGE_BYTES, 1)
+        if not message:  # the pool was closed
+            return
+        request = json.loads(message)
+        [output_fd] = fds
+        pid = os.fork()
+        if pid == 0:
+            run_forked(executable, request, output_fd, connection)
+        os.close(output_fd)
+        _, status, rusage = os.wait4(pid, 0)
+        connection.send(
+            json.dumps(
+                {
+                    "returncode": os.waitstatus_to_exitcode(status),
+                    "cpu_user": rusage.ru_utime,
+                    "cpu_system": rusage.ru_stime,
+                    # block operations are counted in units of 512 bytes
+                    "io_read": rusage.ru_inblock * 512,
+                    "io_write": rusage.ru_oublock * 512,
+                }
+            ).encode()
+        )
+
+
+class WarmWorkerPool:
+    """
+    A pool of worker processes that have cwltool imported and its schemas loaded, so that the runs do not pay
+    for the startup of cwltool (about a second). Like a fork server, a worker forks a new process for each run
+    from its preloaded state, so the runs are as isolated from each other as separate cwltool processes.
+
+    The workers run the `cwltool` executable found on the PATH, which must be a Python script, with the interpreter
+    of its shebang line. The output of each run is streamed through a pipe, and its resource usage is collected by
+    the worker with wait4.
+    """
+
+    def __init__(self, size: int, executable: str = "cwltool"):
+        """
+        Start the workers and wait until they are ready.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the executable is not found on the PATH.
+        ValueError
+            If the executable is not a Python script, or it runs in another Python environment.
+        RuntimeError
+            If a worker failed to start.
+        """
+        self.executable = find_python_executable(executable)
+        self.interpreter = script_interpreter(self.executable)
+        self._free = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+        start = time.monotonic()
+        workers = [self._start_worker() for _ in range(size)]
+        for worker in workers:
+            self._wait_ready(worker)
+            self._free.put(worker)
+        LoggingWrapper.info(f"Started {size} warm cwltool workers in {time.monotonic() - start:.1f} s.")
+
+    def _start_worker(self) -> tuple:
+        connection, worker_connection = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        process = subprocess.Popen(
+            [self.interpreter, "-c", WORKER_COMMAND, self.executable, str(worker_connection.fileno())],
+            pass_fds=[worker_connection.fileno()],
+        )
+        worker_connection.close()
+        worker = (process, connection)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _wait_ready(self, worker: tuple):
+        if worker[1].recv(16) != b"ready":
+            raise RuntimeError(f"A warm cwltool worker failed to start (exit code {worker[0].wait()}).")
+
+    def _stop_worker(self, worker: tuple):
+        process, connection = worker
+        connection.close()  # the worker exits when the connection is closed
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        with self._lock:
+            self._workers.remove(worker)
+
+    def run(self, args: List[str], cpus: List[int] = None, line_times: List[float] = None) -> tuple:
+        """
+        Run cwltool with the given arguments in a warm worker, see `run_with_rusage`.
+
+        Returns
+        -------
+        tuple
+            The output of cwltool, its return code and its resource usage.
+        """
+        worker = self._free.get()
+        process, connection = worker
+        read_fd, write_fd = os.pipe()
+        start = time.monotonic()
+        request = {"args": args, "cwd": os.getcwd(), "env": dict(os.environ), "cpus": cpus}
+        try:
+            socket.send_fds(connection, [json.dumps(request).encode()], [write_fd])
+        except OSError:
+            os.close(read_fd)
+            self._replace(worker)
+            raise
+        finally:
+            os.close(write_fd)
+        with open(read_fd, "r", encoding="utf-8", errors="replace") as stream:
+            output = read_output(stream, line_times)
+        reply = connection.recv(MAX_MESSAGE_BYTES)
+        if not reply:  # the worker died, the run is lost
+            self._replace(worker)
+            raise RuntimeError(f"A warm cwltool worker exited unexpectedly (exit code {process.wait()}).")
+        self._free.put(worker)
+        usage = json.loads(reply)
+        return output, usage.pop("returncode"), dict(usage, elapsed=time.monotonic() - start, cores=os.cpu_count())
+
+    def _replace(self, worker: tuple):
+        self._stop_worker(worker)
+        replacement = self._start_worker()
+        self._wait_ready(replacement)
+        self._free.put(replacement)
+
+    def close(self):
+        """Stop the workers, after the running workflows completed."""
+        for worker in list(self._workers):
+            self._stop_worker(worker)
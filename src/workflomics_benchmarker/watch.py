@@ -0,0 +1,269 @@
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import List, Set
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+from workflomics_benchmarker.utils import natural_keys
+
+# inotify event masks, see inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0x00000800
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Detects new and changed workflow files in a directory by comparing the size and modification time of the
+    files at a regular interval."""
+
+    def __init__(self, directory: str, interval: float = 1.0):
+        self.directory = Path(directory)
+        self.interval = interval
+        self._signatures = {}
+
+    def changes(self, timeout: float) -> Set[str]:
+        """Wait up to `timeout` seconds and return the paths of the workflow files that appeared or changed."""
+        time.sleep(min(timeout, self.interval))
+        changed = set()
+        for path in self.directory.glob("*.cwl"):
+            try:
+                stat = path.stat()
+            except OSError:  # removed in the meantime
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._signatures.get(str(path)) != signature:
+                self._signatures[str(path)] = signature
+                changed.add(str(path))
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Detects new and changed workflow files in a directory with inotify, without scanning the directory."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self._fd, str(self.directory).encode(), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, f"Cannot watch {self.directory}")
+
+    def changes(self, timeout: float) -> Set[str]:
+        """Wait up to `timeout` seconds and return the paths of the workflow files that appeared or changed."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        changed = set()
+        if not readable:
+            return changed
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0").decode()
+            offset += INOTIFY_EVENT.size + length
+            if name.endswith(".cwl"):
+                changed.add(str(self.directory.joinpath(name)))
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(directory: str, polling: bool = False, interval: float = 1.0):
+    """Return an inotify watcher of the directory, or a polling watcher if requested or inotify is not available."""
+    if not polling:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError, TypeError) as e:  # not Linux, or no inotify instance left
+            LoggingWrapper.warning(f"Cannot use inotify ({e}), polling {directory} every {interval} s instead.")
+    return PollingWatcher(directory, interval)
+
+
+def file_sha1(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+class WorkflowWatcher:
+    """
+    Benchmarks the workflows written into a directory as they appear, e.g., while users explore the candidate
+    workflows generated by Workflomics.
+
+    A new or changed workflow file is only benchmarked once it was not written to for `debounce` seconds, so that
+    partially written files are not picked up. Each distinct content is benchmarked once: files that are copies
+    of benchmarked workflows, or that are touched without changing, are skipped. At most `jobs` workflow runs are
+    executed at the same time, and `benchmarks.json` is updated (and re-ranked) after every run. The content
+    hashes of the benchmarked workflows are kept in `watch_state.json`, so that a restarted watch continues where
+    it stopped.
+    """
+
+    def __init__(self, benchmarker: CWLToolRuntimeBenchmark, polling: bool = False, poll_interval: float = 1.0, debounce: float = 2.0):
+        self.benchmarker = benchmarker
+        self.polling = polling
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.state_path = Path(benchmarker.outdir).joinpath("watch_state.json")
+        self.benchmarked = {}
+        self.benchmarks_by_input = {name: {} for name in benchmarker.input_names.values()}
+        if self.state_path.is_file():
+            self._resume()
+        self.pending = {}
+        self.running = {}
+        self.completed_runs = 0
+
+    def _resume(self):
+        """Load the hashes of the workflows benchmarked by a previous watch, and their results."""
+        try:
+            with open(self.state_path, "r") as file:
+                self.benchmarked = json.load(file)
+            with open(Path(self.benchmarker.outdir).joinpath("benchmarks.json"), "r") as file:
+                benchmarks = json.load(file)
+        except (OSError, ValueError) as e:
+            LoggingWrapper.warning(f"Could not resume the previous watch: {e}")
+            self.benchmarked = {}
+            return
+        if isinstance(benchmarks, dict):
+            benchmarks_by_input = benchmarks.get("inputs", {})
+        elif len(self.benchmarks_by_input) == 1:
+            benchmarks_by_input = {next(iter(self.benchmarks_by_input)): benchmarks}
+        else:  # the previous watch was run on a single input
+            benchmarks_by_input = {}
+        for name, records in benchmarks_by_input.items():
+            if name in self.benchmarks_by_input:
+                self.benchmarks_by_input[name] = {record["workflowName"]: record for record in records}
+        LoggingWrapper.info(f"Resuming the watch with {len(self.benchmarked)} benchmarked workflows.")
+
+    def _save_state(self):
+        with tempfile.NamedTemporaryFile("w", dir=self.state_path.parent, delete=False, suffix=".json") as file:
+            json.dump(self.benchmarked, file, indent=2)
+        os.replace(file.name, self.state_path)
+
+    def notice(self, paths: Set[str]):
+        """Queue new or changed workflow files, restarting their debounce period."""
+        now = time.monotonic()
+        for path in paths:
+            self.pending[path] = now
+
+    def ready_workflows(self) -> List[tuple]:
+        """Return the queued workflow files that were not written to during the debounce period and have a content
+        that was not benchmarked yet, with their content hash."""
+        now = time.monotonic()
+        ready = []
+        for path, noticed_at in list(self.pending.items()):
+            if now - noticed_at < self.debounce:
+                continue
+            try:
+                # the modification time catches writes the watcher did not report yet
+                if time.time() - os.path.getmtime(path) < self.debounce:
+                    continue
+                checksum = file_sha1(path)
+            except OSError:  # removed before it was ready
+                del self.pending[path]
+                continue
+            del self.pending[path]
+            if checksum in self.benchmarked:
+                LoggingWrapper.info(f"Skipping {Path(path).name}, its content was already benchmarked as {self.benchmarked[checksum]}.")
+                continue
+            self.benchmarked[checksum] = Path(path).name
+            ready.append((path, checksum))
+        return sorted(ready, key=lambda item: natural_keys(item[0]))
+
+    def submit(self, executor: ThreadPoolExecutor, workflows: List[tuple]):
+        """Benchmark the workflows (paths and content hashes) on every input, skipping the invalid runs if the
+        pre-flight validation is on."""
+        checksums = {Path(workflow_path).name: checksum for workflow_path, checksum in workflows}
+        workflow_paths = [workflow_path for workflow_path, _ in workflows]
+        invalid_runs = set()
+        if self.benchmarker.preflight_mode is not None:
+            problems = self.benchmarker.preflight_checker().check(workflow_paths, self.benchmarker.input_yaml_paths)
+            for (workflow_path, input_yaml_path), run_problems in problems.items():
+                if run_problems:
+                    invalid_runs.add((Path(workflow_path).name, input_yaml_path))
+                    LoggingWrapper.warning(f"Skipping {Path(workflow_path).name}, it is invalid: " + "; ".join(run_problems))
+        for workflow_name, workflow_path, steps in self.benchmarker.prepare_workflows(workflow_paths):
+            for input_yaml_path in self.benchmarker.input_yaml_paths:
+                if (workflow_name, input_yaml_path) in invalid_runs:
+                    continue
+                future = executor.submit(self.benchmarker.benchmark_workflow, workflow_name, workflow_path, steps, input_yaml_path)
+                self.running[future] = (workflow_name, input_yaml_path, checksums[workflow_name])
+
+    def collect(self, futures):
+        """Add the results of the completed runs to the result set and store it."""
+        recorded_runs = []
+        for future in futures:
+            workflow_name, input_yaml_path, _ = self.running.pop(future)
+            if future.exception() is not None:
+                LoggingWrapper.error(f"Benchmarking {workflow_name} failed: {future.exception()}")
+                continue
+            workflow_execution_information, workflow_benchmarks = future.result()
+            self.benchmarks_by_input[self.benchmarker.input_names[input_yaml_path]][workflow_name] = workflow_benchmarks
+            recorded_runs.append((workflow_name, input_yaml_path, workflow_execution_information))
+        self.completed_runs += len(recorded_runs)
+        self.benchmarker.write_results(
+            {
+                input_name: [records[name] for name in sorted(records, key=natural_keys)]
+                for input_name, records in self.benchmarks_by_input.items()
+            }
+        )
+        if self.benchmarker.record_history:
+            self.benchmarker.record_runs(recorded_runs)
+        self._save_state()
+
+    def run(self, stop: threading.Event = None):
+        """
+        Watch the directory and benchmark the workflows until `stop` is set or the process is interrupted. The
+        workflows already in the directory are benchmarked first, unless they were benchmarked by a previous watch.
+        """
+        stop = stop if stop is not None else threading.Event()
+        watcher = create_watcher(self.benchmarker.workflows_dir, self.polling, self.poll_interval)
+        self.notice(set(self.benchmarker.workflows))
+        LoggingWrapper.info(f"Watching {self.benchmarker.workflows_dir} for new workflows (Ctrl-C to stop)...", color="green")
+        executor = ThreadPoolExecutor(max_workers=self.benchmarker.jobs)
+        try:
+            while not stop.is_set():
+                self.notice(watcher.changes(timeout=min(self.poll_interval, self.debounce)))
+                ready = self.ready_workflows()
+                if ready:
+                    self.submit(executor, ready)
+                if self.running:
+                    done, _ = wait(list(self.running), timeout=0, return_when=FIRST_COMPLETED)
+                    if done:
+                        self.collect(done)
+        except KeyboardInterrupt:
+            LoggingWrapper.info("Stopping the watch, waiting for the running workflows...")
+        finally:
+            watcher.close()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.benchmarker.close_warm_pool()
+            # the workflows whose runs did not start are benchmarked by the next watch
+            for future, (_, _, checksum) in list(self.running.items()):
+                if future.cancelled():
+                    self.benchmarked.pop(checksum, None)
+                    del self.running[future]
+            if self.running:
+                self.collect(list(self.running))
+            else:
+                self._save_state()
+        LoggingWrapper.info(f"Watch stopped after {self.completed_runs} workflow runs.", color="green")
@@ -1,29 +1,114 @@
 import argparse
+import inspect
+import sys
 
 from sys import platform
 from workflomics_benchmarker.loggingwrapper import LoggingWrapper
+from workflomics_benchmarker.api import benchmark
+from workflomics_benchmarker.comparison import compare_executors
 from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
 from workflomics_benchmarker.cwltool_runner import CWLToolRunner
+from workflomics_benchmarker.executors import EXECUTORS
+from workflomics_benchmarker.history import STEP_METRICS, show_history, show_regressions
+from workflomics_benchmarker.preflight import PREFLIGHT_MODES
+from workflomics_benchmarker.ranking import RANKING_METRICS
+from workflomics_benchmarker.retention import DEFAULT_COMPRESS_PATTERNS
+from workflomics_benchmarker.scheduling import ORDERING_POLICIES
+from workflomics_benchmarker.tool_profiles import show_prediction
+from workflomics_benchmarker.watch import WorkflowWatcher
 
 
 def add_benchmark_args(parser):
     """Add the arguments for the benchmark command."""
     parser.add_argument('--singularity', action='store_true', help='Use singularity instead of docker.')
+    parser.add_argument('--executor', action='append', dest='executors', metavar='NAME[=PATH]', help=f'The CWL engine the workflows are run with, one of {", ".join(EXECUTORS)}, optionally with the path to its executable (default: cwltool). Repeat it to benchmark the workflows with each executor and compare the results in executor_comparison.json.', default= None)
     parser.add_argument('--interactive', action='store_true', help='Allow the user to interact with the library while running, e.g., to edit the paths to the input files before executing the workflows.')
     parser.add_argument('-o','--outdir', help='Path to the output directory to store the results (default: workflows directory).', default= None)
     parser.add_argument('-v', '--verbose', action='store_true', help='Print the output of the cwltool command.')
-    parser.add_argument('-i','--input', help='Path to the input yaml file (default: input.yml in the workflows directory).', default= None)
+    parser.add_argument('-i','--input', nargs='+', help='Path(s) to the input yaml file(s), or directories containing them. Each workflow is run on each input (default: input.yml in the workflows directory).', default= None)
+    parser.add_argument('-j','--jobs', type=int, help='Maximum number of workflow runs executed at the same time (default: 1).', default= 1)
+    parser.add_argument('--parallel', action='store_true', help='Execute the independent steps of each workflow in parallel (cwltool --parallel).')
+    parser.add_argument('--stage-inputs', nargs='?', const='', metavar='CACHE_DIR', help='Copy the input files once into a local cache directory (default: ~/.cache/workflomics/inputs), e.g., on a local scratch disk or tmpfs, and run all the workflows on the cached files.', default= None)
+    parser.add_argument('--order', choices=ORDERING_POLICIES, help='The order in which the workflow runs are started: by file name, or the longest expected first based on the step times in previous benchmarks (default: name).', default='name')
+    parser.add_argument('--previous-benchmarks', help='Path to the benchmarks.json of a previous run used by --order longest-first (default: benchmarks.json in the output directory).', default= None)
+    parser.add_argument('--preflight', nargs='?', const='exclude', choices=PREFLIGHT_MODES, help='Validate all the workflows (CWL schema, input files and formats) concurrently before executing any of them, and exclude the invalid runs or fail (default: exclude). Workflows found valid are cached by content hash.', default= None)
+    parser.add_argument('--profile', action='store_true', help='Measure the time the benchmarker spends in its own phases and store the breakdown in benchmarker_profile.json.')
+    parser.add_argument('--profile-output', help='Path to store a cProfile dump of the benchmarker (requires --profile).', default= None)
+    parser.add_argument('--history-db', help='Path to the SQLite database in which every run is recorded (default: ~/.workflomics/history.sqlite).', default= None)
+    parser.add_argument('--no-history', action='store_true', help='Do not record the run in the history database.')
+    parser.add_argument('--retention', action='store_true', help='Once the metrics of a workflow are extracted, compress or delete its outputs, except its final outputs.')
+    parser.add_argument('--retention-keep-under', type=float, metavar='MB', help='With --retention, keep the output files smaller than this size (default: 1 MB).', default=1.0)
+    parser.add_argument('--retention-compress', nargs='*', metavar='PATTERN', help='With --retention, compress the output files matching these patterns with gzip instead of deleting them (default: %(default)s).', default=DEFAULT_COMPRESS_PATTERNS)
+    parser.add_argument('--dedupe-messages', action='store_true', help='Store each distinct warning and error (without timestamps and paths) once in messages.json, with its count and the workflows and tools it occurred in, and refer to it by id in benchmarks.json.')
+    parser.add_argument('--log-rules', metavar='FILE', help='Yaml file with the rules classifying the tool output lines as noise, warnings and errors (default: built-in rules).', default= None)
+    parser.add_argument('--log-rules-report', action='store_true', help='Store the number of lines matched by each log rule, with an example line, in log_rules_report.json.')
+    parser.add_argument('--isolate', action='store_true', help='Pin each concurrent workflow run, and its containers, to a dedicated set of CPUs, and measure the load of other processes on these CPUs before and during the run.')
+    parser.add_argument('--cpus-per-run', type=int, help='With --isolate, the number of CPUs of each run (default: the available CPUs divided by the number of jobs).', default= None)
+    parser.add_argument('--numa-node', type=int, help='With --isolate, only use the CPUs (and memory) of this NUMA node.', default= None)
+    parser.add_argument('--interference-threshold', type=float, metavar='LOAD', help='With --isolate, the load of other processes on the CPUs of a run (0 to 1) above which the run is flagged as measured under interference (default: 0.1).', default=0.1)
+    parser.add_argument('--interference-reruns', type=int, metavar='N', help='With --isolate, run a workflow again, up to N times, when it was measured under interference (default: 0).', default=0)
+    parser.add_argument('--warm-workers', action='store_true', help='Run the workflows in a pool of worker processes (one per job) that have cwltool and its schemas already loaded, so that the measured runs do not include the startup of cwltool. The cwltool on the PATH must be a Python script.')
+    parser.add_argument('--dedupe-workflows', action='store_true', help='Execute the structurally equivalent workflows (same tools, wiring and parameters, e.g., differing only in the numbering of their steps) only once, and report the results for each of them.')
+    parser.add_argument('--memory-limit', type=int, metavar='MB', help='Limit the memory of each step container to this many MiB (without swap). Steps killed for exceeding it get the OOM status, with their peak memory.', default= None)
+    parser.add_argument('--workflow-memory-limit', type=int, metavar='MB', help='Limit the memory used by the step containers of each workflow run together to this many MiB: the container using the most memory is killed when it is exceeded.', default= None)
+    parser.add_argument('--rank-by', nargs='+', choices=list(RANKING_METRICS), help='The metrics the workflows are Pareto-ranked on (default: all of them).', default= None)
     parser.add_argument('workflows', help='Path to the workflows directory.')
 
 def add_run_args(parser):
     """Add the arguments for the run command."""
     parser.add_argument('--singularity', action='store_true', help='Use singularity instead of docker.')
+    parser.add_argument('--executor', action='append', dest='executors', metavar='NAME[=PATH]', help=f'The CWL engine the workflows are run with, one of {", ".join(EXECUTORS)}, optionally with the path to its executable (default: cwltool).', default= None)
     parser.add_argument('--interactive', action='store_true', help='Allow the user to interact with the library while running, e.g., to edit the paths to the input files before executing the workflows.')
     parser.add_argument('-o','--outdir', help='Path to the output directory to store the results (default: workflows directory).', default= None)
     parser.add_argument('-v', '--verbose', action='store_true', help='Print the output of the cwltool command.')
-    parser.add_argument('-i','--input', help='Path to the input yaml file (default: input.yml in the workflows directory).', default= None)
+    parser.add_argument('-i','--input', nargs='+', help='Path(s) to the input yaml file(s), or directories containing them. Each workflow is run on each input (default: input.yml in the workflows directory).', default= None)
+    parser.add_argument('-j','--jobs', type=int, help='Maximum number of workflow runs executed at the same time (default: 1).', default= 1)
+    parser.add_argument('--parallel', action='store_true', help='Execute the independent steps of each workflow in parallel (cwltool --parallel).')
+    parser.add_argument('--stage-inputs', nargs='?', const='', metavar='CACHE_DIR', help='Copy the input files once into a local cache directory (default: ~/.cache/workflomics/inputs), e.g., on a local scratch disk or tmpfs, and run all the workflows on the cached files.', default= None)
+    parser.add_argument('--order', choices=ORDERING_POLICIES, help='The order in which the workflow runs are started: by file name, or the longest expected first based on the step times in previous benchmarks (default: name).', default='name')
+    parser.add_argument('--previous-benchmarks', help='Path to the benchmarks.json of a previous run used by --order longest-first (default: benchmarks.json in the output directory).', default= None)
+    parser.add_argument('--preflight', nargs='?', const='exclude', choices=PREFLIGHT_MODES, help='Validate all the workflows (CWL schema, input files and formats) concurrently before executing any of them, and exclude the invalid runs or fail (default: exclude). Workflows found valid are cached by content hash.', default= None)
     parser.add_argument('workflows', help='Path to the workflows directory.')
-   
+
+
+def add_watch_args(parser):
+    """Add the arguments for the watch command."""
+    add_benchmark_args(parser)
+    parser.add_argument('--poll', action='store_true', help='Poll the workflows directory for changes instead of using inotify.')
+    parser.add_argument('--poll-interval', type=float, metavar='SECONDS', help='How often the workflows directory is polled for changes (default: 1 s).', default=1.0)
+    parser.add_argument('--debounce', type=float, metavar='SECONDS', help='How long a workflow file must not change before it is benchmarked, so that partially written files are not picked up (default: 2 s).', default=2.0)
+
+
+def add_history_args(parser):
+    """Add the arguments for the history command."""
+    parser.add_argument('--history-db', help='Path to the SQLite database with the recorded runs (default: ~/.workflomics/history.sqlite).', default= None)
+    parser.add_argument('--tool', help='Show the history of a metric of this tool (step label without number) instead of the list of runs.', default= None)
+    parser.add_argument('--metric', choices=STEP_METRICS, help='The metric to show the history of (default: time).', default='time')
+    parser.add_argument('-n', '--limit', type=int, help='Maximum number of runs to show (default: 20).', default=20)
+
+def add_regressions_args(parser):
+    """Add the arguments for the regressions command."""
+    parser.add_argument('--history-db', help='Path to the SQLite database with the recorded runs (default: ~/.workflomics/history.sqlite).', default= None)
+    parser.add_argument('--metric', nargs='+', choices=STEP_METRICS, help='The metrics to check for regressions (default: time memory).', default=['time', 'memory'])
+    parser.add_argument('--baseline-runs', type=int, help='Number of previous runs of a tool forming its baseline (default: 10).', default=10)
+    parser.add_argument('--threshold', type=float, help='Minimal relative increase over the baseline that is flagged (default: 0.2).', default=0.2)
+    parser.add_argument('--min-z-score', type=float, help='Minimal robust z-score of the increase that is flagged (default: 3).', default=3.0)
+
+
+def add_predict_args(parser):
+    """Add the arguments for the predict command."""
+    parser.add_argument('--profiles', help='Path to the tool_profiles.json of a previous benchmarking run.', required=True)
+    parser.add_argument('workflow', nargs='+', help='Path(s) to the workflow file(s).')
+
+
+def benchmark_options(args) -> dict:
+    """Return the arguments of the benchmark command as the options of `api.benchmark`."""
+    parameters = inspect.signature(benchmark).parameters
+    options = {name: value for name, value in vars(args).items() if name in parameters and name != "workflows"}
+    if args.executors:
+        options["executor"] = args.executors[0]
+    return options
+
 
 def main():
     """Main entry point for the workflomics-benchmarker application."""
@@ -39,23 +124,43 @@ def main():
     subparsers = parser.add_subparsers(dest='subcommand', help='Subcommands.')
     parser_benchmark = subparsers.add_parser('benchmark', help='Run the benchmark.')
     parser_run = subparsers.add_parser('run', help='Run the workflow.')
+    parser_watch = subparsers.add_parser('watch', help='Benchmark the workflows written into a directory as they appear.')
+    parser_history = subparsers.add_parser('history', help='Show the recorded benchmarking runs.')
+    parser_regressions = subparsers.add_parser('regressions', help='Detect tools whose latest run is slower or uses more memory than before.')
+    parser_predict = subparsers.add_parser('predict', help='Predict the execution time, memory usage and chance of success of workflows from the profiles of their tools.')
 
     add_benchmark_args(parser_benchmark)
     add_run_args(parser_run)
+    add_watch_args(parser_watch)
+    add_history_args(parser_history)
+    add_regressions_args(parser_regressions)
+    add_predict_args(parser_predict)
     args = parser.parse_args()
 
-    
-    if (args.subcommand == "benchmark"):
-        LoggingWrapper.info("Benchmarking Workflows...", color="green", bold=True)
-        op = CWLToolRuntimeBenchmark(args)
-    elif (args.subcommand == "run"):
-        LoggingWrapper.info("Running Workflows...", color="green", bold=True)
-        op = CWLToolRunner(args)
-    elif (args.subcommand == None):
-        parser.print_help()
-        return    
-
-    op.run_workflows()
+    try:
+        if (args.subcommand == "benchmark" and args.executors and len(args.executors) > 1):
+            LoggingWrapper.info("Comparing Executors...", color="green", bold=True)
+            compare_executors(args)
+        elif (args.subcommand == "benchmark"):
+            LoggingWrapper.info("Benchmarking Workflows...", color="green", bold=True)
+            for _ in benchmark(args.workflows, **benchmark_options(args)):
+                pass
+        elif (args.subcommand == "run"):
+            LoggingWrapper.info("Running Workflows...", color="green", bold=True)
+            CWLToolRunner(args).run_workflows()
+        elif (args.subcommand == "watch"):
+            WorkflowWatcher(CWLToolRuntimeBenchmark(args), args.poll, args.poll_interval, args.debounce).run()
+        elif (args.subcommand == "history"):
+            show_history(args)
+        elif (args.subcommand == "regressions"):
+            show_regressions(args)
+        elif (args.subcommand == "predict"):
+            show_prediction(args)
+        elif (args.subcommand == None):
+            parser.print_help()
+    except (OSError, ValueError) as e:  # invalid arguments, missing executor or failed pre-flight validation
+        LoggingWrapper.error(str(e))
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,9 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def bench_scale() -> int:
+    """Size multiplier of the synthetic workloads, e.g., WORKFLOMICS_BENCH_SCALE=256 for multi-GB XML files."""
+    return int(os.environ.get("WORKFLOMICS_BENCH_SCALE", "1"))
@@ -0,0 +1,121 @@
+"""Measurement and history tracking for the offline benchmarks."""
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import time
+from pathlib import Path
+
+import psutil
+
+HISTORY_PATH = os.environ.get(
+    "WORKFLOMICS_BENCH_HISTORY", str(Path(__file__).parents[2].joinpath(".benchmarks", "history.jsonl"))
+)
+# relative slowdown (or memory growth) compared to the median of previous runs that counts as a regression
+TOLERANCE = float(os.environ.get("WORKFLOMICS_BENCH_TOLERANCE", "0.5"))
+# number of previous runs the latest run is compared against
+BASELINE_RUNS = 5
+# peak memory below this many MiB is considered noise
+MEMORY_SLACK_MIB = 16
+
+
+def _maxrss_mib() -> float:
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return maxrss / 2**20 if platform.system() == "Darwin" else maxrss / 2**10
+
+
+def _measure_in_child(connection, setup, function, args):
+    try:
+        if setup is not None:
+            args = (setup(*args),)
+        baseline = psutil.Process().memory_info().rss / 2**20
+        start = time.perf_counter()
+        result = function(*args)
+        seconds = time.perf_counter() - start
+        connection.send((seconds, max(0.0, _maxrss_mib() - baseline), result, None))
+    except Exception as e:  # forward the failure to the parent process
+        connection.send((None, None, None, repr(e)))
+    finally:
+        connection.close()
+
+
+def measure(function, *args, setup=None, env: dict = None):
+    """
+    Run `function(*args)` in a fresh process and measure its wall time and peak memory.
+    If `setup` is given, `function(setup(*args))` is run instead and only `function` is measured.
+
+    Running the workload in its own process makes the peak resident memory independent of the workloads
+    that ran before it, and it includes memory allocated by C extensions such as lxml.
+
+    Returns
+    -------
+    tuple
+        The wall time in seconds, the peak memory growth in MiB and the return value of the function.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    previous_env = {key: os.environ.get(key) for key in (env or {})}
+    os.environ.update(env or {})
+    try:
+        process = context.Process(target=_measure_in_child, args=(sender, setup, function, args))
+        process.start()
+    finally:
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key)
+            else:
+                os.environ[key] = value
+    sender.close()
+    seconds, peak_mib, result, error = receiver.recv()
+    process.join()
+    if error is not None:
+        raise RuntimeError(f"Benchmark workload failed: {error}")
+    return seconds, peak_mib, result
+
+
+def record(name: str, scale: int, throughput: float, unit: str, peak_mib: float) -> list:
+    """
+    Append a measurement to the benchmark history and compare it with the previous runs on this host.
+
+    Returns
+    -------
+    list
+        Descriptions of the detected regressions, empty if there are none.
+    """
+    entry = {
+        "name": name,
+        "scale": scale,
+        "host": platform.node(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "throughput": throughput,
+        "unit": unit,
+        "peak_mib": peak_mib,
+    }
+    history = []
+    if os.path.exists(HISTORY_PATH):
+        with open(HISTORY_PATH) as file:
+            history = [json.loads(line) for line in file if line.strip()]
+    previous = [
+        run for run in history if run["name"] == name and run["scale"] == scale and run["host"] == entry["host"]
+    ][-BASELINE_RUNS:]
+
+    os.makedirs(os.path.dirname(HISTORY_PATH), exist_ok=True)
+    with open(HISTORY_PATH, "a") as file:
+        file.write(json.dumps(entry) + "\n")
+
+    regressions = []
+    if len(previous) < 3:
+        return regressions
+    baseline_throughput = statistics.median(run["throughput"] for run in previous)
+    baseline_peak = statistics.median(run["peak_mib"] for run in previous)
+    if throughput < baseline_throughput * (1 - TOLERANCE):
+        regressions.append(
+            f"{name}: throughput dropped to {throughput:.1f} {unit} (baseline {baseline_throughput:.1f} {unit})"
+        )
+    if peak_mib > baseline_peak * (1 + TOLERANCE) + MEMORY_SLACK_MIB:
+        regressions.append(f"{name}: peak memory grew to {peak_mib:.1f} MiB (baseline {baseline_peak:.1f} MiB)")
+    return regressions
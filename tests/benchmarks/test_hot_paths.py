@@ -0,0 +1,154 @@
+"""
+Offline performance benchmarks of the benchmarker's hot paths.
+
+Each benchmark runs its workload in a fresh process, records the throughput and peak memory in the
+benchmark history (`.benchmarks/history.jsonl`) and fails if it regressed compared to the previous runs
+on the same host. Set WORKFLOMICS_BENCH_SCALE to increase the size of the synthetic workloads.
+"""
+import json
+import os
+from argparse import Namespace
+
+import pytest
+
+from harness import measure, record
+from workloads import (
+    generate_cwltool_log,
+    generate_workflow_records,
+    write_gprofiler_json,
+    write_pepxml,
+    write_protxml,
+    write_workflows,
+)
+from workflomics_benchmarker.benchmark_utils import benchmark_steps
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.ranking import rank_workflows
+from workflomics_benchmarker.scientific_benchmarks import (
+    benchmark_gProfiler,
+    benchmark_peptideprophet,
+    benchmark_proteinprophet,
+)
+
+pytestmark = pytest.mark.benchmark
+
+MiB = 2**20
+
+
+def parse_log(log_path, steps, outdir):
+    with open(log_path) as file:
+        lines = file.read().split("\n")
+    return benchmark_steps(steps, lines, outdir)
+
+
+def create_benchmarker(workflows_dir):
+    return CWLToolRuntimeBenchmark(Namespace(workflows=workflows_dir))
+
+
+def load_scoring_workload(workflows_dir, records_path):
+    with open(records_path) as file:
+        return create_benchmarker(workflows_dir), json.load(file)
+
+
+def score(workload):
+    benchmarker, records = workload
+    return [benchmarker.compute_technical_benchmarks(record) for record in records]
+
+
+def load_ranking_workload(workflows_dir, records_path):
+    return [{"benchmarks": benchmarks} for benchmarks in score(load_scoring_workload(workflows_dir, records_path))]
+
+
+def rank(workflows_benchmarks):
+    rank_workflows(workflows_benchmarks)
+    return [workflow["ranking"]["rank"] for workflow in workflows_benchmarks]
+
+
+def run_workflows(benchmarker):
+    benchmarker.run_workflows()
+    with open(os.path.join(benchmarker.outdir, "benchmarks.json")) as file:
+        return [record["workflowName"] for record in json.load(file)]
+
+
+def test_log_parsing(tmp_path, bench_scale):
+    """Benchmark the extraction of the step benchmarks from the cwltool output."""
+    n_steps, n_lines = 12, 500 * bench_scale
+    lines = generate_cwltool_log(n_steps, n_lines, n_failed=2)
+    log_path = tmp_path / "cwltool.log"
+    log_path.write_text("\n".join(lines))
+    steps = [line.split("[step ")[1].split("]")[0] for line in lines if "] start" in line and "[step " in line]
+    write_gprofiler_json(str(tmp_path / "output.json"), 100)
+
+    seconds, peak_mib, step_results = measure(parse_log, str(log_path), steps, str(tmp_path))
+
+    assert [step["status"] for step in step_results] == ["✓"] * (n_steps - 2) + ["✗"] * 2
+    assert not record("log_parsing", bench_scale, len(lines) / seconds, "lines/s", peak_mib)
+
+
+@pytest.mark.parametrize(
+    "extractor, writer, expected",
+    [(benchmark_peptideprophet, write_pepxml, 1750), (benchmark_proteinprophet, write_protxml, 175)],
+)
+def test_xml_extractors(tmp_path, bench_scale, extractor, writer, expected):
+    """Benchmark the pepXML and protXML metric extractors."""
+    path = writer(str(tmp_path / "interact.xml"), 8 * MiB * bench_scale)
+
+    seconds, peak_mib, value = measure(extractor, path)
+
+    assert value == expected
+    throughput = os.path.getsize(path) / MiB / seconds
+    assert not record(extractor.__name__, bench_scale, throughput, "MiB/s", peak_mib)
+
+
+def test_gprofiler_extractor(tmp_path, bench_scale):
+    """Benchmark the g:Profiler metric extractor."""
+    n_results = 20000 * bench_scale
+    path = write_gprofiler_json(str(tmp_path / "output.json"), n_results)
+
+    seconds, peak_mib, value = measure(benchmark_gProfiler, path)
+
+    assert value > 0
+    assert not record("benchmark_gProfiler", bench_scale, n_results / seconds, "results/s", peak_mib)
+
+
+def test_scoring(tmp_path, bench_scale, fake_cwltool):
+    """Benchmark the computation of the technical benchmarks of workflow records."""
+    n_workflows = 500 * bench_scale
+    records_path = tmp_path / "records.json"
+    records_path.write_text(json.dumps(generate_workflow_records(n_workflows, n_steps=6)))
+    workflows_dir = write_workflows(str(tmp_path / "workflows"), n_workflows=1, n_steps=1)
+
+    seconds, peak_mib, benchmarks = measure(
+        score, workflows_dir, str(records_path), setup=load_scoring_workload
+    )
+
+    assert len(benchmarks) == n_workflows
+    assert not record("scoring", bench_scale, n_workflows / seconds, "workflows/s", peak_mib)
+
+
+def test_ranking(tmp_path, bench_scale, fake_cwltool):
+    """Benchmark the Pareto ranking of the workflows."""
+    n_workflows = 2000 * bench_scale
+    records_path = tmp_path / "records.json"
+    records_path.write_text(json.dumps(generate_workflow_records(n_workflows, n_steps=6)))
+    workflows_dir = write_workflows(str(tmp_path / "workflows"), n_workflows=1, n_steps=1)
+
+    seconds, peak_mib, ranks = measure(rank, workflows_dir, str(records_path), setup=load_ranking_workload)
+
+    assert sorted(ranks) == list(range(1, n_workflows + 1))
+    assert not record("ranking", bench_scale, n_workflows / seconds, "workflows/s", peak_mib)
+
+
+def test_end_to_end_with_fake_cwltool(tmp_path, bench_scale, fake_cwltool):
+    """Benchmark a complete benchmarking run, with cwltool replaced by the offline stand-in."""
+    n_workflows = 10 * bench_scale
+    workflows_dir = write_workflows(str(tmp_path / "workflows"), n_workflows, n_steps=6)
+
+    seconds, peak_mib, workflow_names = measure(
+        run_workflows,
+        workflows_dir,
+        setup=create_benchmarker,
+        env={"FAKE_CWLTOOL_LINES": "200"},
+    )
+
+    assert len(workflow_names) == n_workflows
+    assert not record("end_to_end", bench_scale, n_workflows / seconds, "workflows/s", peak_mib)
@@ -0,0 +1,202 @@
+"""Synthetic workload generators for the offline benchmarks of the benchmarker's hot paths."""
+import datetime
+import json
+import os
+import random
+from typing import List
+
+TOOLS = ["Comet", "PeptideProphet", "ProteinProphet", "StPeter", "gProfiler", "XTandem", "MSAmanda", "mzRecal"]
+
+
+def _timestamp(start: datetime.datetime, seconds: int) -> str:
+    return (start + datetime.timedelta(seconds=seconds)).strftime("[%Y-%m-%d %H:%M:%S]")
+
+
+def step_names(n_steps: int) -> List[str]:
+    """Return `n_steps` step names in the `<Tool>_<NN>` form used by generated workflows."""
+    return [f"{TOOLS[index % len(TOOLS)]}_{index + 1:02d}" for index in range(n_steps)]
+
+
+def generate_cwltool_log(n_steps: int, n_lines: int, n_failed: int = 0, seed: int = 0) -> List[str]:
+    """
+    Generate the output of a cwltool run (with `--timestamps`) of a workflow with `n_steps` steps,
+    each printing `n_lines` lines of tool output, a mix of regular lines, warnings, errors and known noise.
+    The last `n_failed` steps fail.
+    """
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    seconds = 0
+    lines = [
+        _timestamp(start, seconds) + " INFO /usr/bin/cwltool 3.1.20240112164112",
+        _timestamp(start, seconds) + " INFO [workflow ] start",
+    ]
+    for index, step in enumerate(step_names(n_steps)):
+        failed = index >= n_steps - n_failed
+        lines.append(_timestamp(start, seconds) + f" INFO [workflow ] starting step {step}")
+        lines.append(_timestamp(start, seconds) + f" INFO [step {step}] start")
+        lines.append(_timestamp(start, seconds) + f" INFO [job {step}] /tmp/abcdef$ docker \\")
+        for line in range(n_lines):
+            kind = rng.random()
+            if kind < 0.02:
+                lines.append(f"WARNING: {step} could not find a decoy entry for scan {line}")
+            elif kind < 0.03:
+                lines.append(f"Error parsing spectrum {line}, skipping")
+            elif kind < 0.04:
+                lines.append("WARNING: The requested image's platform (linux/amd64) does not match")
+            else:
+                lines.append(f"  processed scan {line} of {n_lines} ({rng.random():.4f})")
+        seconds += rng.randint(1, 120)
+        lines.append(_timestamp(start, seconds) + f" INFO [job {step}] Max memory used: {rng.randint(1, 4000)}MiB")
+        if failed:
+            lines.append(_timestamp(start, seconds) + f" WARNING [job {step}] completed permanentFail")
+            lines.append(_timestamp(start, seconds) + f" ERROR [step {step}] Output is missing expected field")
+        else:
+            lines.append(_timestamp(start, seconds) + f" INFO [job {step}] completed success")
+            lines.append(_timestamp(start, seconds) + f" INFO [step {step}] completed success")
+    lines.append(_timestamp(start, seconds) + " INFO [workflow ] completed success")
+    return lines
+
+
+def _write_filler(file, element: str, target_bytes: int):
+    written = file.tell()
+    index = 0
+    while written < target_bytes:
+        chunk = "".join(element.format(index=index + offset) for offset in range(1000))
+        file.write(chunk)
+        written += len(chunk)
+        index += 1000
+
+
+def write_pepxml(path: str, target_bytes: int) -> str:
+    """Write a PeptideProphet pepXML file of roughly `target_bytes` bytes."""
+    with open(path, "w") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write('<msms_pipeline_analysis xmlns="http://regis-web.systemsbiology.net/pepXML">\n')
+        file.write("<analysis_summary><peptideprophet_summary>\n")
+        file.write('<roc_error_data charge="all">\n')
+        for point, error in enumerate([0.0, 0.0025, 0.005, 0.01, 0.02, 0.05]):
+            file.write(f'<error_point error="{error}" min_prob="0.9" num_corr="{1000 + point * 250}" num_incorr="{point}"/>\n')
+        file.write("</roc_error_data>\n</peptideprophet_summary></analysis_summary>\n")
+        file.write('<msms_run_summary base_name="synthetic">\n')
+        _write_filler(
+            file,
+            '<spectrum_query spectrum="scan.{index}.{index}.2" index="{index}" assumed_charge="2">'
+            '<search_result><search_hit hit_rank="1" peptide="PEPTIDEK" protein="sp|P{index}|SYN"/>'
+            "</search_result></spectrum_query>\n",
+            target_bytes,
+        )
+        file.write("</msms_run_summary>\n</msms_pipeline_analysis>\n")
+    return path
+
+
+def write_protxml(path: str, target_bytes: int) -> str:
+    """Write a ProteinProphet protXML file of roughly `target_bytes` bytes."""
+    with open(path, "w") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write('<protein_summary xmlns="http://regis-web.systemsbiology.net/protXML">\n')
+        file.write("<protein_summary_header><program_details><proteinprophet_details>\n")
+        for point, error in enumerate([0.0, 0.0025, 0.005, 0.01, 0.02, 0.05]):
+            file.write(f'<error_point error="{error}" min_prob="0.9" num_corr="{100 + point * 25}" num_incorr="{point}"/>\n')
+        file.write("</proteinprophet_details></program_details></protein_summary_header>\n")
+        _write_filler(
+            file,
+            '<protein_group group_number="{index}" probability="0.99"><protein protein_name="sp|P{index}|SYN" '
+            'n_indistinguishable_proteins="1" probability="0.99"/></protein_group>\n',
+            target_bytes,
+        )
+        file.write("</protein_summary>\n")
+    return path
+
+
+def write_gprofiler_json(path: str, n_results: int, seed: int = 0) -> str:
+    """Write a g:Profiler `output.json` with `n_results` enrichment results."""
+    rng = random.Random(seed)
+    sources = ["GO:BP", "GO:MF", "GO:CC", "KEGG", "REAC"]
+    with open(path, "w") as file:
+        file.write('{"meta": {"query_metadata": {"organism": "hsapiens"}}, "result": [')
+        for index in range(n_results):
+            source = sources[index % len(sources)]
+            native = f"GO:{index % 20000:07d}" if source.startswith("GO") else f"{source}:{index}"
+            result = {
+                "native": native,
+                "name": f"synthetic term {index}",
+                "p_value": rng.choice([1e-8, 1e-4, 0.0009, 0.002, 0.04]),
+                "source": source,
+                "intersection_size": rng.randint(1, 200),
+                "intersections": [[f"ENSG{gene:011d}"] for gene in range(5)],
+            }
+            file.write(("," if index else "") + json.dumps(result))
+        file.write("]}")
+    return path
+
+
+def generate_workflow_records(n_workflows: int, n_steps: int, seed: int = 0) -> List[dict]:
+    """Generate `n_workflows` workflow execution records as produced by `execute_and_benchmark_workflow`."""
+    rng = random.Random(seed)
+    records = []
+    start = datetime.datetime(2024, 1, 1, 12, 0, 0).timestamp()
+    for _ in range(n_workflows):
+        steps = []
+        started_at = start
+        for step in step_names(n_steps):
+            failed = rng.random() < 0.05
+            time = rng.randint(1, 900)
+            steps.append(
+                {
+                    "step": step,
+                    "status": "✗" if failed else "✓",
+                    "time": time,
+                    "time_ms": float(time * 1000),
+                    "memory": rng.randint(1, 4000),
+                    "warnings": [f"WARNING: synthetic warning {index}" for index in range(rng.randint(0, 8))],
+                    "errors": ["Error: synthetic failure"] if failed else [],
+                    "identified_proteins": rng.randint(0, 2000) if step.startswith("ProteinProphet") else "-",
+                    "go_terms": rng.randint(0, 2000) if step.startswith("gProfiler") else "-",
+                    "cpu_user": round(rng.uniform(0, 3600), 2),
+                    "cpu_system": round(rng.uniform(0, 60), 2),
+                    "io_read": round(rng.uniform(0, 20000), 2),
+                    "io_write": round(rng.uniform(0, 5000), 2),
+                    "cpu_efficiency": round(rng.uniform(0, 100), 1),
+                    "started_at": started_at,
+                    "finished_at": started_at + time,
+                    "critical_path": time,
+                    "parallelism": 1,
+                    "interference": "-",
+                }
+            )
+            started_at += time
+        status = "✗" if any(step["status"] == "✗" for step in steps) else "✓"
+        total_time = sum(step["time"] for step in steps)
+        timing = {
+            "wall_clock": total_time,
+            "critical_path": total_time,
+            "parallelism": 1.0,
+            "wall_clock_ms": float(total_time * 1000),
+            "critical_path_ms": float(total_time * 1000),
+        }
+        records.append({"n_steps": n_steps, "status": status, "steps": steps, "timing": timing})
+    return records
+
+
+def write_workflows(directory: str, n_workflows: int, n_steps: int) -> str:
+    """Write `n_workflows` linear CWL workflows of `n_steps` steps and an `input.yml` for the fake cwltool."""
+    os.makedirs(directory, exist_ok=True)
+    for workflow in range(n_workflows):
+        lines = ["cwlVersion: v1.2", "class: Workflow", "inputs:", "  input_1:", "    type: File", "steps:"]
+        previous = "input_1"
+        for step in step_names(n_steps):
+            tool = step.rstrip("_0123456789")
+            lines += [
+                f"  {step}:",
+                f"    run: https://example.org/cwl/tools/{tool}/{tool}.cwl",
+                "    in:",
+                f"      {tool}_in_1: {previous}",
+                f"    out: [{tool}_out_1]",
+            ]
+            previous = f"{step}/{tool}_out_1"
+        lines += ["outputs:", "  output_1:", "    type: File", f"    outputSource: {previous}"]
+        with open(os.path.join(directory, f"candidate_workflow_{workflow + 1}.cwl"), "w") as file:
+            file.write("\n".join(lines) + "\n")
+    with open(os.path.join(directory, "input.yml"), "w") as file:
+        file.write("input_1:\n  class: File\n  format: http://edamontology.org/format_3244\n  path: spectra.mzML\n")
+    return directory
@@ -0,0 +1,29 @@
+import os
+from pathlib import Path
+
+import pytest
+
+FAKE_CWLTOOL_BIN = str(Path(__file__).parent.joinpath("benchmarks", "bin"))
+
+
+@pytest.fixture
+def fake_cwltool(monkeypatch):
+    """Put the offline `cwltool` stand-in first on the PATH and return the directory containing it."""
+    monkeypatch.setenv("PATH", FAKE_CWLTOOL_BIN + os.pathsep + os.environ.get("PATH", ""))
+    return FAKE_CWLTOOL_BIN
+
+
+@pytest.fixture(autouse=True)
+def history_db(tmp_path, monkeypatch):
+    """Record the runs of the tests in a temporary history database instead of the user's one."""
+    path = str(tmp_path / "history.sqlite")
+    monkeypatch.setenv("WORKFLOMICS_HISTORY_DB", path)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    """Keep the caches of the tests (staged inputs, pre-flight verdicts) in a temporary directory."""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(path))
+    return path
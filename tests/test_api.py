@@ -0,0 +1,104 @@
+import asyncio
+import shutil
+import threading
+import time
+from contextlib import aclosing
+from pathlib import Path
+
+import pytest
+
+from workflomics_benchmarker.api import WorkflowResult, abenchmark, benchmark
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+
+
+def copy_workflows(directory):
+    for name in ["workflow.cwl", "workflow_fail.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), directory)
+    return str(directory)
+
+
+def test_benchmark_yields_typed_results(tmp_path, fake_cwltool):
+    results = {result.workflow: result for result in benchmark(copy_workflows(tmp_path), jobs=2)}
+
+    assert set(results) == {"workflow.cwl", "workflow_fail.cwl"}
+    assert all(isinstance(result, WorkflowResult) for result in results.values())
+    assert results["workflow.cwl"].succeeded
+    assert results["workflow.cwl"].input == "input"
+    time = results["workflow.cwl"].metric("time")
+    assert (time.title, time.unit) == ("Execution time", "seconds")
+    step = results["workflow.cwl"].steps[0]
+    assert step.tool == "Comet" and step.status == "✓" and step.time is not None and step.memory == 100
+    assert isinstance(step.warnings, tuple)
+    with pytest.raises(KeyError):
+        results["workflow.cwl"].metric("unknown")
+    # the results are still stored once all the runs completed
+    assert tmp_path.joinpath("benchmarks.json").is_file()
+
+
+def test_benchmark_without_storing(tmp_path, fake_cwltool):
+    assert len(list(benchmark(copy_workflows(tmp_path), store_results=False))) == 2
+    assert not tmp_path.joinpath("benchmarks.json").exists()
+
+
+@pytest.mark.parametrize("stage_inputs", [False, True])
+def test_benchmark_stages_inputs_on_request(tmp_path, fake_cwltool, cache_home, stage_inputs):
+    workflows = copy_workflows(tmp_path)
+    for name in ["spectra.mzML", "proteins.fasta"]:
+        tmp_path.joinpath(name).write_text(name)
+    tmp_path.joinpath("input.yml").write_text(
+        "input_1:\n  class: File\n  path: spectra.mzML\ninput_2:\n  class: File\n  path: proteins.fasta\n"
+    )
+
+    list(benchmark(workflows, stage_inputs=stage_inputs, store_results=False))
+
+    assert tmp_path.joinpath("staged_input.yml").exists() == stage_inputs
+    assert cache_home.joinpath("workflomics", "inputs").exists() == stage_inputs
+
+
+def test_benchmark_raises_on_invalid_arguments(tmp_path):
+    with pytest.raises(NotADirectoryError):
+        next(benchmark(str(tmp_path / "missing")))
+    tmp_path.joinpath("rules.yml").write_text("rules: 1\n")
+    with pytest.raises(ValueError):
+        next(benchmark(str(tmp_path), log_rules=str(tmp_path / "rules.yml")))
+
+
+def test_abenchmark(tmp_path, fake_cwltool):
+    async def collect():
+        return [result async for result in abenchmark(copy_workflows(tmp_path), jobs=2, store_results=False)]
+
+    results = asyncio.run(collect())
+    assert sorted(result.workflow for result in results) == ["workflow.cwl", "workflow_fail.cwl"]
+
+
+@pytest.mark.filterwarnings("error::pytest.PytestUnhandledThreadExceptionWarning")
+def test_abenchmark_cancels_the_pending_runs(tmp_path, fake_cwltool, monkeypatch):
+    """Test whether stopping the iteration cancels the runs that did not start yet, without waiting for the running one."""
+    for name in ["first.cwl", "second.cwl", "third.cwl"]:
+        shutil.copy("tests/data/workflow.cwl", tmp_path.joinpath(name))
+    shutil.copy("tests/data/input.yml", tmp_path)
+    started, release = [], threading.Event()
+    benchmark_workflow = CWLToolRuntimeBenchmark.benchmark_workflow
+
+    def blocking_benchmark_workflow(self, workflow_name, *run):
+        started.append(workflow_name)
+        if workflow_name == "second.cwl":  # still running when the iteration is stopped
+            release.wait()
+        return benchmark_workflow(self, workflow_name, *run)
+
+    monkeypatch.setattr(CWLToolRuntimeBenchmark, "benchmark_workflow", blocking_benchmark_workflow)
+    stop = threading.Event()
+
+    async def first_result():
+        async with aclosing(abenchmark(str(tmp_path), stop=stop)) as results:
+            async for result in results:
+                return result
+
+    assert asyncio.run(first_result()).workflow == "first.cwl"
+    assert stop.is_set()
+    time.sleep(4 * CWLToolRuntimeBenchmark.STOP_CHECK_INTERVAL)  # the stop is seen while the second run is blocked
+    release.set()
+    [producer] = [thread for thread in threading.enumerate() if thread.name == "abenchmark"]
+    producer.join()  # the event loop is closed by now, the end of the iteration is not reported to it
+    assert started == ["first.cwl", "second.cwl"]
+    assert not tmp_path.joinpath("benchmarks.json").exists()
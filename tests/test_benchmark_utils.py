@@ -0,0 +1,118 @@
+import datetime
+import json
+
+from workflomics_benchmarker.benchmark_utils import benchmark_steps, benchmark_workflow_timing, setup_empty_benchmark_for_step
+from workflomics_benchmarker.cwl_utils import extract_output_sources_from_cwl, extract_step_dependencies_from_cwl
+
+START = datetime.datetime(2024, 1, 1, 12, 0, 0).timestamp()
+
+
+def executed_step(name, start, end):
+    step = setup_empty_benchmark_for_step(name)
+    step.update(
+        {
+            "status": "✓",
+            "time": max(1, end - start),
+            "time_ms": float((end - start) * 1000),
+            "started_at": START + start,
+            "finished_at": START + end,
+        }
+    )
+    return step
+
+
+def test_extract_step_dependencies():
+    assert extract_step_dependencies_from_cwl("tests/data/workflow.cwl") == {
+        "Comet_01": [],
+        "PeptideProphet_02": ["Comet_01"],
+        "ProteinProphet_03": ["PeptideProphet_02"],
+        "StPeter_04": ["ProteinProphet_03", "PeptideProphet_02"],
+    }
+
+
+def test_workflow_timing_of_branched_workflow():
+    # Comet feeds two independent branches that ran concurrently, StPeter was not reached
+    dependencies = {
+        "Comet_01": [],
+        "PeptideProphet_02": ["Comet_01"],
+        "MSAmanda_03": ["Comet_01"],
+        "ProteinProphet_04": ["PeptideProphet_02"],
+        "StPeter_05": ["ProteinProphet_04", "MSAmanda_03"],
+    }
+    steps = [
+        executed_step("Comet_01", 0, 100),
+        executed_step("PeptideProphet_02", 100, 130),
+        executed_step("MSAmanda_03", 100, 190),
+        executed_step("ProteinProphet_04", 130, 150),
+        setup_empty_benchmark_for_step("StPeter_05"),
+    ]
+
+    timing = benchmark_workflow_timing(steps, dependencies)
+
+    assert timing == {
+        "wall_clock": 190,
+        "critical_path": 190,
+        "parallelism": 1.26,
+        "wall_clock_ms": 190000.0,
+        "critical_path_ms": 190000.0,
+    }
+    assert [step["critical_path"] for step in steps] == [100, "-", 90, "-", "-"]
+    assert [step["parallelism"] for step in steps] == [1, 2, 3, 2, "-"]
+
+
+def test_workflow_timing_without_executed_steps():
+    steps = [setup_empty_benchmark_for_step("Comet_01")]
+    assert benchmark_workflow_timing(steps, {"Comet_01": []})["wall_clock"] == "N/A"
+
+
+def test_steps_are_timed_when_their_log_lines_arrive():
+    lines = [
+        "[2024-01-01 12:00:00] INFO [step Comet_01] start",
+        "[2024-01-01 12:00:00] INFO [job Comet_01] completed success",
+        "[2024-01-01 12:00:00] INFO [step Comet_01] completed success",
+    ]
+    [step] = benchmark_steps(["Comet_01"], lines, ".", line_times=[START, START + 0.2504, START + 0.251])
+    assert (step["time_ms"], step["time"]) == (250.4, 1)
+    assert step["started_at"] == START
+
+    # without the arrival times, the cwltool timestamps only have a resolution of one second
+    [step] = benchmark_steps(["Comet_01"], lines, ".")
+    assert (step["time_ms"], step["time"]) == (0.0, 1)
+
+
+def test_go_terms_are_read_from_the_real_output(tmp_path):
+    assert extract_output_sources_from_cwl("tests/data/workflow.cwl") == {"output_1": "StPeter_04"}
+    path = tmp_path / "enrichment" / "gprofiler_result.json"
+    path.parent.mkdir()
+    path.write_text(json.dumps({"result": [{"native": "GO:0000001", "p_value": 1e-5}]}))
+    lines = [
+        "[2024-01-01 12:00:00] INFO [step gProfiler_01] start",
+        "[2024-01-01 12:00:02] INFO [job gProfiler_01] completed success",
+    ]
+
+    [step] = benchmark_steps(["gProfiler_01"], lines, str(tmp_path), output_files={"gProfiler_01": [str(path)]})
+
+    assert step["go_terms"] == 1
+
+
+def test_go_terms_are_read_from_the_goenrichment_tables(tmp_path):
+    tables = {
+        "BP_result.txt": "GO Term\tp-value\tName\nGO:1\t1e-5\ta\nGO:2\t0.01\tb\n",
+        "genes.txt": "Gene\tCount\nA\t3\n",  # another output of the step
+        "MF_result.txt": "GO Term\tp-value\tName\nGO:3\tn/a?\tc\n",
+    }
+    for name, text in tables.items():
+        tmp_path.joinpath(name).write_text(text)
+    lines = [
+        "[2024-01-01 12:00:00] INFO [step GOEnrichment_01] start",
+        "[2024-01-01 12:00:02] INFO [job GOEnrichment_01] completed success",
+    ]
+    outputs = {"GOEnrichment_01": [str(tmp_path / name) for name in ["BP_result.txt", "genes.txt"]]}
+
+    [step] = benchmark_steps(["GOEnrichment_01"], lines, str(tmp_path), output_files=outputs)
+    assert step["go_terms"] == 1
+
+    # a table that cannot be read does not stop the benchmark
+    outputs["GOEnrichment_01"].append(str(tmp_path / "MF_result.txt"))
+    [step] = benchmark_steps(["GOEnrichment_01"], lines, str(tmp_path), output_files=outputs)
+    assert step["go_terms"] == "-"
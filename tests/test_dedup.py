@@ -0,0 +1,78 @@
+import json
+import shutil
+from argparse import Namespace
+from pathlib import Path
+
+import yaml
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.dedup import deduplicate_workflows
+
+# the steps of tests/data/workflow.cwl renumbered, as another generated workflow would number them
+RENUMBERING = {"Comet_01": "Comet_03", "PeptideProphet_02": "PeptideProphet_01", "ProteinProphet_03": "ProteinProphet_04", "StPeter_04": "StPeter_02"}
+
+
+def renumbered_workflow(path: Path) -> dict:
+    with open("tests/data/workflow.cwl") as file:
+        workflow = yaml.safe_load(file)
+    text = json.dumps(workflow)
+    for step_name, new_name in RENUMBERING.items():
+        text = text.replace(f'"{step_name}', f'"{new_name}')
+    workflow = json.loads(text)
+    workflow["label"] = "WorkflowNo_7"
+    workflow["steps"] = dict(reversed(workflow["steps"].items()))
+    with open(path, "w") as file:
+        yaml.safe_dump(workflow, file, sort_keys=False)
+    return workflow
+
+
+def test_deduplicate_workflows(tmp_path):
+    renumbered_workflow(tmp_path / "renumbered.cwl")
+    rewired = renumbered_workflow(tmp_path / "rewired.cwl")
+    rewired["steps"]["StPeter_02"]["in"]["StPeter_in_2"] = "Comet_03/Comet_out_1"
+    with open(tmp_path / "rewired.cwl", "w") as file:
+        yaml.safe_dump(rewired, file)
+    paths = ["tests/data/workflow.cwl", str(tmp_path / "renumbered.cwl"), str(tmp_path / "rewired.cwl")]
+
+    unique_paths, aliases = deduplicate_workflows(paths)
+
+    assert unique_paths == [paths[0], paths[2]]
+    assert aliases == {"renumbered.cwl": ("workflow.cwl", {new: old for old, new in RENUMBERING.items()})}
+
+
+def test_benchmark_deduplicated_workflows(tmp_path, fake_cwltool):
+    shutil.copy("tests/data/workflow.cwl", tmp_path)
+    shutil.copy("tests/data/input.yml", tmp_path)
+    renumbered_workflow(tmp_path / "workflow_renumbered.cwl")
+    benchmarker = CWLToolRuntimeBenchmark(Namespace(workflows=str(tmp_path), dedupe_workflows=True))
+    executed = []
+    benchmark_workflow = benchmarker.benchmark_workflow
+    benchmarker.benchmark_workflow = lambda *run: executed.append(run[0]) or benchmark_workflow(*run)
+
+    benchmarker.run_workflows()
+
+    assert executed == ["workflow.cwl"]
+    with open(tmp_path / "benchmarks.json") as file:
+        records = {record["workflowName"]: record for record in json.load(file)}
+    alias = records["workflow_renumbered.cwl"]
+    assert alias["deduplicatedFrom"] == "workflow.cwl"
+    status = next(benchmark for benchmark in alias["benchmarks"] if benchmark["title"] == "Status")
+    assert [step["label"] for step in status["steps"]] == ["StPeter", "ProteinProphet", "PeptideProphet", "Comet"]
+    [info] = [info for (name, _, _, _), (info, _) in zip(benchmarker.runs, benchmarker.results) if name == "workflow_renumbered.cwl"]
+    assert [entry["step"] for entry in info["steps"]] == ["StPeter_02", "ProteinProphet_04", "PeptideProphet_01", "Comet_03"]
+
+
+def test_deduplicated_workflows_reclaim_nothing(tmp_path, fake_cwltool):
+    """Test whether the disk space reclaimed from the outputs of a workflow is not counted again for its equivalents."""
+    shutil.copy("tests/data/workflow.cwl", tmp_path)
+    shutil.copy("tests/data/input.yml", tmp_path)
+    renumbered_workflow(tmp_path / "workflow_renumbered.cwl")
+    benchmarker = CWLToolRuntimeBenchmark(
+        Namespace(workflows=str(tmp_path), dedupe_workflows=True, retention=True, retention_keep_under=0)
+    )
+
+    benchmarker.run_workflows()
+
+    infos = {name: info for (name, _, _, _), (info, _) in zip(benchmarker.runs, benchmarker.results)}
+    assert infos["workflow.cwl"]["retention"] is not None
+    assert infos["workflow_renumbered.cwl"]["retention"] is None
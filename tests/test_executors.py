@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
+from workflomics_benchmarker.cwltool_runner import CWLToolRunner
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.comparison import COMPARISON_FILE, compare_executors
+from workflomics_benchmarker.executors import CWLToolExecutor, Executor, ToilExecutor, get_executor
+
+
+class QuietExecutor(Executor):
+    """A local stand-in for an engine that does not log its steps: the offline cwltool with its log discarded."""
+
+    name = "quiet"
+    executable = "sh"
+    step_logs = False
+
+    def version(self) -> str:
+        return "1.0"
+
+    def command(self, workflow_path, input_yaml_path, outdir, container="docker", parallel=False, cidfile_dir=None, benchmark=True, scratch_dir=None, memory_limit=None):
+        return ["sh", "-c", 'cwltool "$@" > /dev/null', "sh", "--outdir", outdir, workflow_path, input_yaml_path]
+
+
+def aggregate_status(outdir: Path) -> dict:
+    with open(outdir / "benchmarks.json") as file:
+        [record] = json.load(file)
+    return next(benchmark for benchmark in record["benchmarks"] if benchmark["title"] == "Status")["aggregate_value"]
+
+
+@pytest.fixture
+def workflows_dir(tmp_path):
+    for name in ["workflow.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+    return tmp_path
+
+
+def test_get_executor():
+    assert isinstance(get_executor("cwltool"), CWLToolExecutor)
+    assert get_executor("toil=/opt/toil/bin/toil-cwl-runner").executable == "/opt/toil/bin/toil-cwl-runner"
+    executor = QuietExecutor()
+    assert get_executor(executor) is executor
+    with pytest.raises(ValueError):
+        get_executor("nextflow")
+    with pytest.raises(TypeError):  # an executor must build its commands
+        Executor()
+
+
+def test_executor_commands(tmp_path):
+    command = CWLToolExecutor().command("wf.cwl", "input.yml", "out", parallel=True, cidfile_dir="cids", benchmark=False)
+    assert command == ["cwltool", "--record-container-id", "--cidfile-dir", "cids", "--parallel", "--on-error", "continue", "--outdir", "out", "wf.cwl", "input.yml"]
+    command = CWLToolExecutor().command("tests/data/workflow.cwl", "input.yml", "out", scratch_dir=str(tmp_path), memory_limit=512)
+    assert command[1:4] == ["--strict-memory-limit", "--overrides", str(tmp_path / "memory_overrides.yml")]
+    command = ToilExecutor().command("wf.cwl", "input.yml", "out", container="singularity", scratch_dir="run")
+    assert command == [
+        "toil-cwl-runner", "--batchSystem", "single_machine", "--singularity", "--jobStore", "run/jobstore", "--clean", "always",
+        "--outdir", "out", "wf.cwl", "input.yml",
+    ]
+
+
+def test_compare_executors(workflows_dir, fake_cwltool):
+    comparison = compare_executors(Namespace(workflows=str(workflows_dir), executors=["cwltool", QuietExecutor()]))
+
+    with open(workflows_dir / COMPARISON_FILE) as file:
+        assert json.load(file) == comparison
+    assert [executor["executor"] for executor in comparison["executors"]] == ["cwltool 3.3.0.fake", "quiet 1.0"]
+    [workflow] = comparison["workflows"]
+    assert workflow["workflowName"] == "workflow.cwl"
+    assert {name: result["status"] for name, result in workflow["results"].items()} == {"cwltool": "✓", "quiet": "✓"}
+    assert workflow["speedup"]["cwltool"] == 1.0
+    assert aggregate_status(workflows_dir / "quiet") == {"value": "✓", "desirability": 1}
+    for name in ["cwltool", "quiet"]:
+        with open(workflows_dir / name / "benchmarks.json") as file:
+            [record] = json.load(file)
+        assert record["executor"] == comparison["executors"][name == "quiet"]["executor"]
+
+
+def test_status_from_exit_code(workflows_dir, fake_cwltool, monkeypatch):
+    """The runs of an executor that does not log its steps succeed or fail with its exit code."""
+    monkeypatch.setenv("FAKE_CWLTOOL_FAIL", "StPeter")
+    comparison = compare_executors(Namespace(workflows=str(workflows_dir), executors=[QuietExecutor(), "cwltool"]))
+
+    [workflow] = comparison["workflows"]
+    assert {name: result["status"] for name, result in workflow["results"].items()} == {"quiet": "✗", "cwltool": "✗"}
+    assert [executor["failed"] for executor in comparison["executors"]] == [1, 1]
+    assert aggregate_status(workflows_dir / "quiet") == {"value": "✗", "desirability": -1}
+
+
+def test_preflight_validates_with_cwltool(workflows_dir, fake_cwltool):
+    """Whatever the executor, the workflows are validated with cwltool, and cached under its version."""
+    benchmarker = CWLToolRuntimeBenchmark(Namespace(workflows=str(workflows_dir), executors=[QuietExecutor()]))
+    checker = benchmarker.preflight_checker()
+
+    assert (checker.cwltool, checker.cwltool_version) == ("cwltool", "3.3.0.fake")
+    assert checker.validate_schema(str(workflows_dir / "workflow.cwl")) == []
+
+
+def test_scratch_directory_removed(workflows_dir, fake_cwltool, monkeypatch):
+    """The scratch directory of each run, e.g., the job store of Toil, is removed once the run is over."""
+    scratch_dirs = []
+
+    class ScratchExecutor(QuietExecutor):
+        def command(self, workflow_path, input_yaml_path, outdir, container="docker", parallel=False, cidfile_dir=None, benchmark=True, scratch_dir=None, memory_limit=None):
+            assert os.listdir(scratch_dir) == []
+            scratch_dirs.append(scratch_dir)
+            return super().command(workflow_path, input_yaml_path, outdir)
+
+    CWLToolRuntimeBenchmark(Namespace(workflows=str(workflows_dir), executors=[ScratchExecutor()])).run_workflows()
+    CWLToolRunner(Namespace(workflows=str(workflows_dir), executors=[ScratchExecutor()])).run_workflows()
+
+    assert len(scratch_dirs) == 2 and not any(os.path.exists(path) for path in scratch_dirs)
@@ -0,0 +1,54 @@
+from argparse import Namespace
+
+from workflomics_benchmarker.history import RunHistory, detect_regressions, show_regressions
+
+
+def step(name, time, memory=100, image="sha256:aaa"):
+    return {
+        "step": name,
+        "status": "✓",
+        "time": time,
+        "memory": memory,
+        "warnings": [],
+        "errors": [],
+        "identified_proteins": "-",
+        "go_terms": "-",
+        "image_digest": image,
+    }
+
+
+def record(history, run_id, comet_time, image="sha256:aaa"):
+    information = {"n_steps": 2, "status": "✓", "steps": [step("Comet_01", comet_time, image=image), step("StPeter_02", 30)]}
+    history.record_run(run_id, "cwltool 3.1", "3.1", "host", "/workflows", [("candidate_workflow_1", "input", information)])
+
+
+def test_record_run(history_db):
+    history = RunHistory(history_db)
+    record(history, "run1", 100)
+    record(history, "run2", 110)
+
+    assert [run["run_id"] for run in history.runs()] == ["run2", "run1"]
+    assert history.runs()[0]["n_steps"] == 2
+    assert history.tools() == ["Comet", "StPeter"]
+    assert [row["value"] for row in history.tool_history("Comet", "time")] == [110, 100]
+    history.close()
+
+
+def test_detect_regressions(history_db):
+    history = RunHistory(history_db)
+    for run, comet_time in enumerate([100, 104, 98, 101, 99, 102]):
+        record(history, f"run{run}", comet_time)
+    assert detect_regressions(history) == []
+
+    record(history, "slower", 140, image="sha256:bbb")
+    regressions = detect_regressions(history)
+    history.close()
+
+    assert [(regression["tool"], regression["metric"]) for regression in regressions] == [("Comet", "time")]
+    assert regressions[0]["image_changed"]
+    assert round(regressions[0]["change"], 2) == 0.39
+
+
+def test_show_regressions_without_history(history_db):
+    args = Namespace(history_db=history_db, metric=["time"], baseline_runs=10, threshold=0.2, min_z_score=3.0)
+    assert show_regressions(args) == []
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import sqlite3
+import sys
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.history import SCHEMA, RunHistory
+from workflomics_benchmarker.isolation import CpuSetPool, format_cpu_list, interference_report, parse_cpu_list
+from workflomics_benchmarker.resource_accounting import run_with_rusage
+
+
+def test_cpu_lists():
+    assert parse_cpu_list("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert format_cpu_list([11, 0, 1, 2, 3, 8, 10]) == "0-3,8,10-11"
+
+
+def test_cpu_set_pool(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)))
+    pool = CpuSetPool(jobs=3)
+    assert pool.cpu_sets == [[0, 1], [2, 3], [4, 5]]
+    cpus = pool.acquire()
+    pool.release(cpus)
+    assert CpuSetPool(jobs=2, cpus_per_run=1).cpu_sets == [[0], [1]]
+    with pytest.raises(ValueError):
+        CpuSetPool(jobs=3, cpus_per_run=3)
+
+
+def test_pinned_command(monkeypatch):
+    """Test whether a run is pinned to its CPUs from its start, with the processes it starts."""
+    pool = CpuSetPool(jobs=1, cpus_per_run=1)
+    [cpu] = cpus = pool.acquire()
+    command = [sys.executable, "-c", "import os, subprocess, sys; print(sorted(os.sched_getaffinity(0))); subprocess.run([sys.executable, '-c', 'import os; print(sorted(os.sched_getaffinity(0)))'])"]
+
+    output, returncode, _ = run_with_rusage(pool.command_prefix(cpus) + command)
+
+    assert returncode == 0
+    assert output.split() == [f"[{cpu}]", f"[{cpu}]"]
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    with pytest.raises(ValueError):  # without taskset, the runs cannot be pinned
+        CpuSetPool(jobs=1)
+
+
+def test_interference_report(monkeypatch):
+    monkeypatch.setattr(os, "sysconf", lambda name: 100)
+    before = {0: (0, 0), 1: (0, 0), 2: (0, 0)}
+    after = {0: (800, 1000), 1: (600, 1000), 2: (1000, 1000)}
+    # 14 s busy on CPUs 0 and 1 during 10 s, 10 s of which were used by the run itself
+    report = interference_report([0, 1], 0.0, before, after, 10.0, 10.0, 0.1)
+    assert report == {"cpus": "0-1", "load_before": 0.0, "load_during": 0.2, "interfered": True}
+    assert not interference_report([0, 1], 0.05, before, after, 10.0, 14.0, 0.1)["interfered"]
+
+
+def test_isolated_runs_flag_interference(tmp_path, fake_cwltool, history_db):
+    for name in ["workflow.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+
+    # every run is flagged with a negative threshold, so that it is run again
+    args = Namespace(workflows=str(tmp_path), isolate=True, interference_threshold=-1, interference_reruns=1)
+    benchmarker = CWLToolRuntimeBenchmark(args)
+    benchmarker.run_workflows()
+
+    with open(tmp_path / "benchmarks.json") as file:
+        [record] = json.load(file)
+    assert record["isolation"]["attempts"] == 2 and record["isolation"]["interfered"]
+    assert record["isolation"]["cpus"] == format_cpu_list(sorted(os.sched_getaffinity(0)))
+    [(info, _)] = benchmarker.results  # the CPU efficiency of the run is relative to its CPU set
+    assert info["rusage"]["cores"] == len(os.sched_getaffinity(0))
+    time = next(benchmark for benchmark in record["benchmarks"] if benchmark["title"] == "Execution time")
+    assert all(step["interfered"] for step in time["steps"])
+    # the steps measured under interference are not part of the history of the tools
+    history = RunHistory(history_db)
+    assert history.tool_history("Comet", "time") == []
+
+
+def test_history_without_interference_column(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA.replace("    interfered INTEGER,\n", ""))
+    connection.close()
+    history = RunHistory(path)
+    assert "interfered" in [row["name"] for row in history.connection.execute("PRAGMA table_info(step_runs)")]
@@ -0,0 +1,65 @@
+import pytest
+
+from workflomics_benchmarker.benchmark_utils import benchmark_steps
+from workflomics_benchmarker.log_rules import LogClassifier, load_log_rules
+
+LINES = [
+    "  processed scan 12 of 500",
+    "WARNING: Comet_01 could not find a decoy entry",
+    "Error parsing spectrum 7, skipping",
+    "WARNING: The requested image's platform (linux/amd64) does not match",
+    "Calculating sensitivity...and error tables...",
+    "Finished with 0 errors",
+]
+
+
+def test_default_rules():
+    classifier = LogClassifier()
+    assert [classifier.classify(line) for line in LINES] == [None, "warning", "error", "noise", "noise", "noise"]
+    report = {rule["name"]: rule for rule in classifier.report()}
+    assert report["warning"]["matches"] == 1
+    assert report["zero-errors"]["example"] == "Finished with 0 errors"
+
+
+def test_rules_file(tmp_path):
+    rules_path = tmp_path / "rules.yml"
+    rules_path.write_text(
+        """
+extend_defaults: true
+rules:
+  - name: comet-decoys
+    class: noise
+    regex: "could not find a decoy entry"
+    tools: [Comet]
+  - name: skipped-spectra
+    class: warning
+    regex: "^Error parsing spectrum \\\\d+, skipping$"
+"""
+    )
+    classifier = LogClassifier(load_log_rules(str(rules_path)))
+
+    assert classifier.classify(LINES[1], "Comet") == "noise"
+    assert classifier.classify(LINES[1], "MSAmanda") == "warning"
+    # the first matching rule wins, before the default error rule
+    assert classifier.match(LINES[2], "Comet")["name"] == "skipped-spectra"
+
+
+def test_invalid_rules_file(tmp_path):
+    rules_path = tmp_path / "rules.yml"
+    rules_path.write_text("rules:\n  - class: error\n    regex: '('\n")
+    with pytest.raises(ValueError, match="invalid regex"):
+        load_log_rules(str(rules_path))
+
+
+def test_benchmark_steps_with_rules(tmp_path):
+    lines = [
+        "[2024-01-01 12:00:00] INFO [step Comet_01] start",
+        "WARNING: Comet_01 could not find a decoy entry",
+        "Error parsing spectrum 7, skipping",
+        "[2024-01-01 12:00:09] INFO [job Comet_01] completed success",
+    ]
+    classifier = LogClassifier([{"name": "decoys", "class": "noise", "contains": "decoy"}] + LogClassifier().rules)
+
+    [step] = benchmark_steps(["Comet_01"], lines, str(tmp_path), classifier)
+
+    assert (step["warnings"], step["errors"]) == ([], ["Error parsing spectrum 7, skipping"])
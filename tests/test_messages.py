@@ -0,0 +1,53 @@
+import json
+import shutil
+from argparse import Namespace
+from pathlib import Path
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.messages import MessageTable, normalize_message
+
+
+def test_normalize_message():
+    assert (
+        normalize_message("[2024-01-01 12:00:00] WARNING Could not read /tmp/abc123/interact.pep.xml (1/3 files)")
+        == "WARNING Could not read <path> (1/3 files)"
+    )
+    assert normalize_message("Error: file:///data/run_7/input.mzML  is empty") == "Error: <path> is empty"
+
+
+def test_message_table():
+    table = MessageTable()
+    first = table.intern_step_messages(
+        ["WARNING: missing decoy in /tmp/a/x.fasta", "WARNING: missing decoy in /tmp/b/x.fasta"],
+        "warning",
+        "candidate_workflow_1.cwl",
+        "Comet",
+    )
+    second = table.intern_step_messages(
+        ["WARNING: missing decoy in /scratch/y.fasta"], "warning", "candidate_workflow_2.cwl", "Comet"
+    )
+
+    assert list(first.values()) == [2] and first.keys() == second.keys()
+    [entry] = table.to_json()
+    assert entry["count"] == 3
+    assert entry["message"] == "WARNING: missing decoy in <path>"
+    assert entry["workflows"] == ["candidate_workflow_1.cwl", "candidate_workflow_2.cwl"]
+    # the same text as an error is a different message
+    assert table.intern("WARNING: missing decoy in /x", "error", "w", "Comet") not in first
+
+
+def test_benchmarks_refer_to_message_ids(tmp_path, fake_cwltool, monkeypatch):
+    monkeypatch.setenv("FAKE_CWLTOOL_LINES", "20")
+    for name in ["workflow.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+
+    CWLToolRuntimeBenchmark(Namespace(workflows=str(tmp_path), dedupe_messages=True)).run_workflows()
+
+    with open(tmp_path / "messages.json") as file:
+        messages = {entry["id"]: entry for entry in json.load(file)}
+    with open(tmp_path / "benchmarks.json") as file:
+        benchmarks = {benchmark["title"]: benchmark for benchmark in json.load(file)[0]["benchmarks"]}
+    comet = benchmarks["Warnings"]["steps"][0]
+    assert "tooltip" not in comet
+    assert sum(comet["messages"].values()) == comet["value"] == 2
+    assert all(messages[message_id]["tools"] == ["Comet"] for message_id in comet["messages"])
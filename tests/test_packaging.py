@@ -0,0 +1,25 @@
+import hashlib
+import json
+
+import pytest
+
+tomllib = pytest.importorskip("tomllib")
+
+# the sections of [tool.poetry] the content hash of poetry.lock is computed from
+LEGACY_KEYS = ["dependencies", "source", "extras", "dev-dependencies"]
+RELEVANT_KEYS = LEGACY_KEYS + ["group"]
+
+
+def test_lock_file_is_up_to_date():
+    """Test whether poetry.lock was regenerated after the dependencies in pyproject.toml changed."""
+    with open("pyproject.toml", "rb") as file:
+        config = tomllib.load(file)["tool"]["poetry"]
+    with open("poetry.lock", "rb") as file:
+        lock = tomllib.load(file)
+    relevant_content = {key: config.get(key) for key in RELEVANT_KEYS if key in LEGACY_KEYS or key in config}
+
+    content_hash = hashlib.sha256(json.dumps(relevant_content, sort_keys=True).encode()).hexdigest()
+
+    assert lock["metadata"]["content-hash"] == content_hash
+    locked = {package["name"] for package in lock["package"]}
+    assert {"numpy", "psutil"} <= locked
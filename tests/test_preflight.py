@@ -0,0 +1,81 @@
+import json
+import shutil
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+import yaml
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.preflight import Preflight, PreflightError, check_workflow_inputs
+from workflomics_benchmarker.cwl_utils import extract_inputs_from_cwl
+
+
+def write_workflows(directory):
+    directory.mkdir(exist_ok=True)
+    for name in ["workflow.cwl", "workflow_fail.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), directory)
+    directory.joinpath("broken.cwl").write_text("cwlVersion: v1.2\nclass: Workflow\nsteps:\n  Comet_01:\n    in: {}\n")
+    return directory
+
+
+def test_check_workflow_inputs():
+    workflow_inputs = extract_inputs_from_cwl("tests/data/workflow.cwl")
+    assert workflow_inputs["input_1"] == {"type": "File", "format": "http://edamontology.org/format_3244", "optional": False}
+    with open("tests/data/input.yml") as file:
+        input_data = yaml.safe_load(file)
+    assert check_workflow_inputs(workflow_inputs, input_data) == []
+
+    input_data["input_1"]["format"] = "edam:format_1929"
+    del input_data["input_2"]
+    assert check_workflow_inputs(workflow_inputs, input_data) == [
+        "input_1: format edam:format_1929 instead of http://edamontology.org/format_3244",
+        "input_2: missing in the input",
+    ]
+
+
+def test_valid_workflows_are_cached(tmp_path, fake_cwltool, monkeypatch):
+    directory = write_workflows(tmp_path / "workflows")
+    workflows = sorted(str(path) for path in directory.glob("*.cwl"))
+    input_yaml_path = str(directory / "input.yml")
+
+    checker = Preflight("3.3.0", str(tmp_path / "preflight.json"))
+    problems = checker.check(workflows, [input_yaml_path])
+    assert problems[(str(directory / "broken.cwl"), input_yaml_path)] == [
+        f"{directory / 'broken.cwl'}: step Comet_01 is missing run, out"
+    ]
+    assert problems[(str(directory / "workflow.cwl"), input_yaml_path)] == []
+    assert checker.cached_workflows == 0
+
+    # the valid workflows are not validated again, the invalid one is
+    validated = []
+    checker = Preflight("3.3.0", str(tmp_path / "preflight.json"))
+    monkeypatch.setattr(checker, "validate_schema", lambda path: validated.append(path) or ["invalid"])
+    checker.check(workflows, [input_yaml_path])
+    assert validated == [str(directory / "broken.cwl")] and checker.cached_workflows == 2
+    # unless the cwltool version changed
+    checker = Preflight("3.4.0", str(tmp_path / "preflight.json"))
+    checker.validate_workflows(workflows)
+    assert checker.cached_workflows == 0
+
+
+def test_invalid_runs_are_excluded_or_fail(tmp_path, fake_cwltool):
+    directory = write_workflows(tmp_path)
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    shutil.copy("tests/data/input.yml", inputs / "remote.yml")
+    inputs.joinpath("local.yml").write_text(
+        yaml.dump({"input_1": {"class": "File", "path": "missing.mzML"}, "input_2": {"class": "File", "path": "up.fasta"}})
+    )
+    inputs.joinpath("up.fasta").write_text(">sp|P1|SYN\nPEPTIDEK\n")
+
+    args = Namespace(workflows=str(directory), input=[str(inputs / "local.yml"), str(inputs / "remote.yml")], preflight="exclude")
+    CWLToolRuntimeBenchmark(args).run_workflows()
+    with open(directory / "benchmarks.json") as file:
+        results = json.load(file)
+    assert results["inputs"]["local"] == []
+    assert [record["workflowName"] for record in results["inputs"]["remote"]] == ["workflow.cwl", "workflow_fail.cwl"]
+
+    args.preflight = "fail"
+    with pytest.raises(PreflightError):
+        CWLToolRuntimeBenchmark(args).run_workflows()
@@ -0,0 +1,29 @@
+from workflomics_benchmarker.profiler import PhaseProfiler
+
+
+def test_nested_phases_are_attributed_exclusively():
+    """Test whether the time of a nested phase is not counted twice."""
+    profiler = PhaseProfiler()
+    profiler.enable()
+    with profiler.workflow("workflow.cwl"):
+        with profiler.phase("cwltool_execution"):
+            pass
+        with profiler.phase("log_parsing"):
+            with profiler.phase("scientific_metrics"):
+                sum(range(100000))
+    profiler.disable()
+
+    summary = profiler.summary()
+    phases = summary["workflows"]["workflow.cwl"]
+    assert set(phases) == {"total", "cwltool_execution", "log_parsing", "scientific_metrics", "benchmarker_overhead"}
+    assert phases["log_parsing"] < phases["scientific_metrics"]
+    assert phases["benchmarker_overhead"] == phases["total"] - phases["cwltool_execution"]
+    assert summary["total"]["total"] == phases["total"]
+
+
+def test_disabled_profiler_records_nothing():
+    """Test whether phases are ignored while the profiler is disabled."""
+    profiler = PhaseProfiler()
+    with profiler.workflow("workflow.cwl"), profiler.phase("log_parsing"):
+        pass
+    assert profiler.summary() == {"workflows": {}, "total": {}}
@@ -0,0 +1,68 @@
+import numpy as np
+
+from workflomics_benchmarker.ranking import crowding_distances, non_dominated_fronts, rank_workflows
+
+
+def brute_force_fronts(objectives):
+    fronts = np.zeros(len(objectives), dtype=int)
+    front = 0
+    while (fronts == 0).any():
+        front += 1
+        remaining = np.flatnonzero(fronts == 0)
+        for i in remaining:
+            if not any(
+                (objectives[j] <= objectives[i]).all() and (objectives[j] < objectives[i]).any() for j in remaining
+            ):
+                fronts[i] = front
+    return fronts
+
+
+def workflow(name, status, time, memory, errors, proteins, go_terms):
+    values = {
+        "Status": status,
+        "Execution time": time,
+        "Memory usage": memory,
+        "Errors": errors,
+        "Proteins": proteins,
+        "GO-terms": go_terms,
+    }
+    return {
+        "workflowName": name,
+        "benchmarks": [
+            {"title": title, "aggregate_value": {"value": value, "desirability": 1 if value == "✓" else 0}}
+            for title, value in values.items()
+        ],
+    }
+
+
+def test_non_dominated_fronts_match_brute_force():
+    rng = np.random.default_rng(0)
+    objectives = rng.integers(0, 6, size=(300, 3)).astype(float)
+    assert (non_dominated_fronts(objectives) == brute_force_fronts(objectives)).all()
+
+
+def test_crowding_distances():
+    objectives = np.array([[0.0, 4.0], [1.0, 2.0], [3.0, 1.0], [4.0, 0.0]])
+    distances = crowding_distances(objectives, np.ones(4, dtype=int))
+    assert np.isinf(distances[[0, 3]]).all()
+    assert distances[1:3].tolist() == [0.75 + 0.75, 0.75 + 0.5]
+
+
+def test_rank_workflows():
+    workflows = [
+        workflow("fast", "✓", 100, 500, 0, 100, 10),
+        workflow("slow_but_accurate", "✓", 900, 500, 0, 400, 30),
+        workflow("dominated", "✓", 1000, 800, 0, 50, 5),
+        workflow("failed", "(1/3) ✗", 10, 10, 1, 0, 0),
+        workflow("no_proteins", "✓", 100, 500, 0, "N/A", 10),
+    ]
+    rank_workflows(workflows, ["time", "memory", "identified_proteins", "go_terms"])
+    ranking = {workflow["workflowName"]: workflow["ranking"] for workflow in workflows}
+
+    assert ranking["fast"]["front"] == ranking["slow_but_accurate"]["front"] == 1
+    # a missing number of proteins is worse than any identified number
+    assert ranking["no_proteins"]["front"] == ranking["dominated"]["front"] == 2
+    # the failed workflow is ranked after all the successful ones, however fast it was
+    assert ranking["failed"]["front"] == 3
+    assert sorted(ranking[name]["rank"] for name in ranking) == [1, 2, 3, 4, 5]
+    assert ranking["failed"]["rank"] == 5
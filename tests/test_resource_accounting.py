@@ -0,0 +1,258 @@
+import json
+import os
+import shutil
+from argparse import Namespace
+from pathlib import Path
+
+import yaml
+
+from workflomics_benchmarker import resource_accounting
+from workflomics_benchmarker.benchmark_utils import (
+    benchmark_step_resource_usage,
+    classify_oom_steps,
+    setup_empty_benchmark_for_step,
+    store_step_time,
+)
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.resource_accounting import (
+    CgroupMonitor,
+    map_containers_to_steps,
+    read_cgroup_memory,
+    read_cgroup_usage,
+    write_memory_overrides,
+)
+
+CWLTOOL_OUTPUT = """[2024-01-01 12:00:00] INFO [step Comet_01] start
+[2024-01-01 12:00:00] INFO [job Comet_01] /tmp/abc$ docker \\
+    run \\
+    -i \\
+    --cidfile=/tmp/cid/20240101120000-000001.cid \\
+    comet
+[2024-01-01 12:00:20] INFO [job Comet_01] completed success
+[2024-01-01 12:00:20] INFO [step PeptideProphet_02] start
+[2024-01-01 12:00:20] INFO [job PeptideProphet_02] /tmp/def$ docker \\
+    run \\
+    --cidfile=/tmp/cid/20240101120020-000002.cid \\
+    peptideprophet
+[2024-01-01 12:00:30] INFO [job PeptideProphet_02] completed success""".split("\n")
+
+
+def test_map_containers_to_steps():
+    """Test whether the containers recorded by cwltool are mapped to the steps they were started for."""
+    assert map_containers_to_steps(CWLTOOL_OUTPUT) == {
+        "/tmp/cid/20240101120000-000001.cid": "Comet_01",
+        "/tmp/cid/20240101120020-000002.cid": "PeptideProphet_02",
+    }
+
+
+def test_read_cgroup_usage(tmp_path, monkeypatch):
+    """Test whether the cumulative CPU and I/O counters of a cgroup v2 are read."""
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    tmp_path.joinpath("cpu.stat").write_text("usage_usec 3500000\nuser_usec 3000000\nsystem_usec 500000\n")
+    tmp_path.joinpath("io.stat").write_text(
+        "8:0 rbytes=1048576 wbytes=2097152 rios=10 wios=20\n8:16 rbytes=1048576 wbytes=0 rios=1 wios=0\n"
+    )
+    tmp_path.joinpath("cpu.max").write_text("200000 100000\n")
+
+    assert read_cgroup_usage(str(tmp_path)) == {
+        "cpu_user": 3.0,
+        "cpu_system": 0.5,
+        "io_read": 2097152,
+        "io_write": 2097152,
+        "cores": 2.0,
+    }
+    assert read_cgroup_usage(str(tmp_path.joinpath("exited"))) is None
+    tmp_path.joinpath("cpuset.cpus.effective").write_text("4\n")  # a container pinned to one CPU
+    assert read_cgroup_usage(str(tmp_path))["cores"] == 1
+
+
+def test_benchmark_step_resource_usage():
+    """Test whether the usage of each container is stored with its step, and CPU efficiency is derived."""
+    step_results = [setup_empty_benchmark_for_step(step) for step in ["Comet_01", "PeptideProphet_02", "StPeter_03"]]
+    for step_result, time in zip(step_results, [20, 10]):
+        step_result["status"] = "✓"
+        step_result["time"] = time
+    usage = {
+        "/tmp/cid/20240101120000-000001.cid": {
+            "cpu_user": 30.0, "cpu_system": 2.0, "io_read": 2**30, "io_write": 2**20, "cores": 2,
+        },
+    }
+
+    comet, peptide_prophet, st_peter = benchmark_step_resource_usage(step_results, CWLTOOL_OUTPUT, usage)
+
+    assert (comet["cpu_user"], comet["cpu_system"], comet["io_read"], comet["io_write"]) == (30.0, 2.0, 1024.0, 1.0)
+    assert comet["cpu_efficiency"] == 80.0
+    assert peptide_prophet["cpu_user"] == "N/A"
+    assert st_peter["cpu_user"] == "-"
+
+
+def test_cpu_efficiency_of_short_steps():
+    """Test whether the CPU efficiency of a step is derived from its execution time in milliseconds."""
+    step_result = setup_empty_benchmark_for_step("Comet_01")
+    store_step_time(step_result, 0.0, 0.5)
+    step_result["status"] = "✓"
+    usage = {
+        "/tmp/cid/20240101120000-000001.cid": {
+            "cpu_user": 0.4, "cpu_system": 0.0, "io_read": 0, "io_write": 0, "cores": 1,
+        },
+    }
+
+    [comet] = benchmark_step_resource_usage([step_result], CWLTOOL_OUTPUT, usage)
+
+    assert comet["time"] == 1
+    assert comet["cpu_efficiency"] == 80.0
+
+
+def write_cgroup(path, current, peak=None, oom_kills=0):
+    path.mkdir(exist_ok=True)
+    path.joinpath("cpu.stat").write_text("user_usec 0\nsystem_usec 0\n")
+    path.joinpath("memory.current").write_text(f"{current}\n")
+    if peak is not None:
+        path.joinpath("memory.peak").write_text(f"{peak}\n")
+    path.joinpath("memory.events").write_text(f"low 0\nhigh 0\nmax 3\noom 1\noom_kill {oom_kills}\n")
+
+
+def test_read_cgroup_memory(tmp_path):
+    """Test whether the memory usage and the OOM kills of a cgroup v2 are read."""
+    write_cgroup(tmp_path, 2**20, 3 * 2**20, 1)
+    assert read_cgroup_memory(str(tmp_path)) == {"current": 2**20, "peak": 3 * 2**20, "oom_kills": 1}
+    assert read_cgroup_memory(str(tmp_path.joinpath("exited"))) is None
+
+
+def test_monitor_enforces_memory_ceilings(tmp_path, monkeypatch):
+    """Test whether the containers are limited when discovered, and the largest is killed above the workflow ceiling."""
+    limited, killed = [], []
+    monkeypatch.setattr(resource_accounting, "find_container_cgroup", lambda container_id: str(tmp_path / container_id))
+    monkeypatch.setattr(resource_accounting, "inspect_container_image", lambda container_id, runtime: None)
+    monkeypatch.setattr(resource_accounting, "limit_container_memory", lambda container_id, limit, runtime: limited.append((container_id, limit)))
+    monkeypatch.setattr(resource_accounting, "kill_container", lambda container_id, runtime: killed.append(container_id))
+    cidfile_dir = tmp_path / "cid"
+    cidfile_dir.mkdir()
+    for container_id, current in [("small", 100 * 2**20), ("large", 300 * 2**20)]:
+        cidfile_dir.joinpath(f"{container_id}.cid").write_text(container_id)
+        write_cgroup(tmp_path / container_id, current)
+
+    monitor = CgroupMonitor(str(cidfile_dir), memory_limit=512, workflow_memory_limit=350)
+    monitor.sample()
+
+    assert sorted(limited) == [("large", 512), ("small", 512)]
+    assert killed == ["large"]
+    assert monitor.killed == {str(cidfile_dir / "large.cid")}
+    assert monitor.memory[str(cidfile_dir / "large.cid")]["peak"] == 300 * 2**20
+
+
+def test_monitor_waits_for_the_container_cgroup(tmp_path, monkeypatch):
+    """Test whether the cgroup of a container is looked for again until it exists, once the cidfile appeared."""
+    lookups = []
+
+    def find_container_cgroup(container_id):
+        lookups.append(container_id)
+        path = tmp_path / container_id
+        return str(path) if path.exists() else None
+
+    monkeypatch.setattr(resource_accounting, "find_container_cgroup", find_container_cgroup)
+    monkeypatch.setattr(resource_accounting, "inspect_container_image", lambda container_id, runtime: None)
+    cidfile_dir = tmp_path / "cid"
+    cidfile_dir.mkdir()
+    cidfile_dir.joinpath("step.cid").write_text("step")
+    monitor = CgroupMonitor(str(cidfile_dir))
+
+    monitor.sample()  # the cgroup does not exist yet
+    write_cgroup(tmp_path / "step", 2**20)
+    tmp_path.joinpath("step", "cpu.stat").write_text("user_usec 2000000\nsystem_usec 500000\n")
+    monitor.sample()
+    monitor.sample()
+
+    assert lookups == ["step", "step"]
+    assert monitor.usage[str(cidfile_dir / "step.cid")]["cpu_user"] == 2.0
+
+
+def test_monitor_records_unlimited_containers(tmp_path, monkeypatch):
+    """Test whether a container that could not be limited, nor was created with the limit, is recorded as unlimited."""
+    monkeypatch.setattr(resource_accounting, "find_container_cgroup", lambda container_id: None)
+    monkeypatch.setattr(resource_accounting, "inspect_container_image", lambda container_id, runtime: None)
+    monkeypatch.setattr(resource_accounting, "limit_container_memory", lambda container_id, limit, runtime: False)
+    monkeypatch.setattr(resource_accounting, "container_memory_limit", lambda container_id, runtime: {"created": 512 * 2**20, "late": 0}[container_id])
+    cidfile_dir = tmp_path / "cid"
+    cidfile_dir.mkdir()
+    for container_id in ["created", "late"]:
+        cidfile_dir.joinpath(f"{container_id}.cid").write_text(container_id)
+
+    monitor = CgroupMonitor(str(cidfile_dir), memory_limit=512)
+    monitor.sample()
+
+    assert monitor.unlimited == {str(cidfile_dir / "late.cid")}
+
+
+def test_write_memory_overrides(tmp_path):
+    """Test whether the workflow and the tools of its steps are given the memory ceiling as their ResourceRequirement."""
+    with open(write_memory_overrides("tests/data/workflow.cwl", 512, str(tmp_path))) as file:
+        overrides = yaml.safe_load(file)["cwltool:overrides"]
+
+    assert list(overrides)[0] == Path("tests/data/workflow.cwl").resolve().as_uri()
+    assert "https://raw.githubusercontent.com/Workflomics/containers/main/cwl/tools/Comet/Comet.cwl" in overrides
+    assert len(overrides) == 5
+    for override in overrides.values():
+        assert override == {"requirements": {"ResourceRequirement": {"ramMin": 512, "ramMax": 512}}}
+
+
+def test_classify_oom_steps():
+    """Test whether the steps killed for their memory usage get the OOM status and their peak memory."""
+    lines = CWLTOOL_OUTPUT[:7] + ["[2024-01-01 12:00:20] WARNING [job Comet_01] exited with status: 137"]
+    step_results = [setup_empty_benchmark_for_step(step) for step in ["Comet_01", "PeptideProphet_02", "StPeter_03"]]
+    for step_result in step_results[:2]:
+        step_result["status"] = "✗"
+        step_result["memory"] = 100
+    memory = {
+        "/tmp/cid/20240101120000-000001.cid": {"peak": 2**30, "current": 0, "oom_kills": 1},
+        "/tmp/cid/20240101120020-000002.cid": {"peak": 2**20, "current": 0, "oom_kills": 0},
+    }
+
+    comet, peptide_prophet, _ = classify_oom_steps([dict(step) for step in step_results], lines, memory, memory_limit=1024)
+    assert (comet["status"], comet["oom_kill"], comet["memory"]) == ("OOM", "step_limit", 1024)
+    assert peptide_prophet["status"] == "✗"
+    # without a ceiling, the container was killed by the OOM killer of the host
+    comet, _, _ = classify_oom_steps([dict(step) for step in step_results], lines, memory)
+    assert comet["oom_kill"] == "kernel"
+    comet, _, _ = classify_oom_steps([dict(step) for step in step_results], lines, memory, {"/tmp/cid/20240101120000-000001.cid"})
+    assert comet["oom_kill"] == "workflow_limit"
+    # a container that could not be given the ceiling was killed by the OOM killer of the host
+    comet, _, _ = classify_oom_steps([dict(step) for step in step_results], lines, memory, memory_limit=1024, unlimited_containers={"/tmp/cid/20240101120000-000001.cid"})
+    assert comet["oom_kill"] == "kernel"
+
+
+def test_oom_killed_steps_are_penalized(tmp_path, fake_cwltool, monkeypatch):
+    """Test whether a step killed with SIGKILL under a memory ceiling fails the workflow with the OOM status."""
+    for name in ["workflow.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+    monkeypatch.setenv("FAKE_CWLTOOL_OOM", "PeptideProphet")
+    monkeypatch.setattr(resource_accounting, "limit_container_memory", lambda container_id, limit, runtime: True)
+
+    CWLToolRuntimeBenchmark(Namespace(workflows=str(tmp_path), memory_limit=64)).run_workflows()
+
+    with open(tmp_path / "benchmarks.json") as file:
+        [record] = json.load(file)
+    assert record["memory_limits"] == {"step": 64, "workflow": None}
+    benchmarks = {benchmark["title"]: benchmark for benchmark in record["benchmarks"]}
+    assert [step["value"] for step in benchmarks["Status"]["steps"]] == ["✓", "OOM", "-", "-"]
+    assert benchmarks["Status"]["aggregate_value"] == {"value": "(1/4) ✗", "desirability": -1}
+    peptide_prophet = benchmarks["Memory usage"]["steps"][1]
+    assert (peptide_prophet["value"], peptide_prophet["desirability"], peptide_prophet["oom_kill"]) == (100, -1, "step_limit")
+
+
+def test_unlimited_steps_are_recorded(tmp_path, fake_cwltool, monkeypatch):
+    """Test whether the steps whose container could not be limited are recorded, and not counted as killed at the ceiling."""
+    for name in ["workflow.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+    monkeypatch.setenv("FAKE_CWLTOOL_OOM", "PeptideProphet")
+    monkeypatch.setattr(resource_accounting, "limit_container_memory", lambda container_id, limit, runtime: False)
+    monkeypatch.setattr(resource_accounting, "container_memory_limit", lambda container_id, runtime: None)
+
+    CWLToolRuntimeBenchmark(Namespace(workflows=str(tmp_path), memory_limit=64)).run_workflows()
+
+    with open(tmp_path / "benchmarks.json") as file:
+        [record] = json.load(file)
+    assert record["memory_limits"] == {"step": 64, "workflow": None, "unlimited_steps": ["Comet_01", "PeptideProphet_02"]}
+    status = next(benchmark for benchmark in record["benchmarks"] if benchmark["title"] == "Status")
+    assert [step["value"] for step in status["steps"]] == ["✓", "✗", "-", "-"]
+
@@ -0,0 +1,69 @@
+import json
+import shutil
+from argparse import Namespace
+from pathlib import Path
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.retention import RetentionPolicy, output_paths, parse_cwltool_outputs
+
+
+def test_parse_cwltool_outputs():
+    cwltool_output = (
+        "[2024-01-01 12:00:00] INFO [workflow ] completed success\n"
+        "{\n"
+        '    "output_1": {"class": "File", "location": "file:///out/StPeter_out.tsv",\n'
+        '        "secondaryFiles": [{"class": "File", "path": "/out/StPeter_out.tsv.idx"}]},\n'
+        '    "output_2": {"class": "File", "location": "file:///out/interact.prot.xml"}\n'
+        "}[2024-01-01 12:00:00] INFO Final process status is success\n"
+    )
+    outputs = parse_cwltool_outputs(cwltool_output)
+
+    assert set(outputs) == {"output_1", "output_2"}
+    assert output_paths(outputs, ["output_1"]) == {"/out/StPeter_out.tsv", "/out/StPeter_out.tsv.idx"}
+    assert parse_cwltool_outputs("[2024-01-01 12:00:00] ERROR Workflow error") is None
+
+
+def test_retention_policy(tmp_path):
+    (tmp_path / "final.tsv").write_text("x" * 5000)
+    (tmp_path / "interact.pep.xml").write_text("<x/>" * 1000)
+    (tmp_path / "small.log").write_text("done")
+    (tmp_path / "tmp").mkdir()
+    (tmp_path / "tmp" / "scratch.bin").write_bytes(b"\0" * 3000)
+
+    result = RetentionPolicy(keep_under=100).apply(str(tmp_path), {str((tmp_path / "final.tsv").resolve())})
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["final.tsv", "interact.pep.xml.gz", "small.log"]
+    assert (result["deleted"], result["compressed"]) == (1, 1)
+    assert result["reclaimed"] == 3000 + 4000 - (tmp_path / "interact.pep.xml.gz").stat().st_size
+
+
+def test_retention_keeps_link_targets(tmp_path):
+    """A link in the output directory to a file outside of it, e.g., a staged input, must not reclaim the file."""
+    outside = tmp_path / "inputs" / "input.mzML"
+    outside.parent.mkdir()
+    outside.write_text("<x/>" * 1000)
+    outdir = tmp_path / "output"
+    outdir.mkdir()
+    (outdir / "input.mzML").symlink_to(outside)
+    (outdir / "other.bin").symlink_to(outside)
+
+    result = RetentionPolicy(keep_under=100).apply(str(outdir), set())
+
+    assert outside.read_text() == "<x/>" * 1000
+    assert sorted(path.name for path in outdir.iterdir()) == ["input.mzML", "other.bin"]
+    assert result == {"reclaimed": 0, "deleted": 0, "compressed": 0}
+
+
+def test_retention_after_benchmarking(tmp_path, fake_cwltool):
+    for name in ["workflow.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+    args = Namespace(workflows=str(tmp_path), retention=True, retention_keep_under=0, retention_compress=["*.xml"])
+
+    CWLToolRuntimeBenchmark(args).run_workflows()
+
+    outdir = tmp_path / "workflow_output"
+    # the protXML was only added as an output to count the proteins, the final StPeter output is kept
+    assert sorted(path.name for path in outdir.iterdir()) == ["StPeter_04_out.txt", "interact.prot.xml.gz"]
+    with open(tmp_path / "benchmarks.json") as file:
+        benchmarks = {benchmark["title"]: benchmark for benchmark in json.load(file)[0]["benchmarks"]}
+    assert benchmarks["Proteins"]["aggregate_value"]["value"] == 250
@@ -0,0 +1,44 @@
+import json
+
+from workflomics_benchmarker.scheduling import load_tool_times, longest_first
+
+
+def execution_time_record(steps):
+    return {
+        "workflowName": "candidate_workflow.cwl",
+        "benchmarks": [
+            {
+                "title": "Execution time",
+                "steps": [
+                    {"label": label, "value": value, "desirability": -1 if failed else 1}
+                    for label, value, failed in steps
+                ],
+            }
+        ],
+    }
+
+
+def test_load_tool_times(tmp_path):
+    benchmarks = [
+        execution_time_record([("Comet", 100, False), ("ProteinProphet", 20, False)]),
+        execution_time_record([("Comet", 300, False), ("ProteinProphet", 2, True), ("gProfiler", "N/A", False)]),
+    ]
+    path = tmp_path / "benchmarks.json"
+    path.write_text(json.dumps({"inputs": {"human": benchmarks}, "aggregate": []}))
+
+    assert load_tool_times(str(path)) == {"Comet": 200, "ProteinProphet": 20}
+    assert load_tool_times(str(tmp_path / "missing.json")) == {}
+
+
+def test_longest_first():
+    tool_times = {"Comet": 300, "ProteinProphet": 20, "StPeter": 10}
+    runs_steps = [
+        ["ProteinProphet_01", "StPeter_02"],
+        ["Comet_01", "ProteinProphet_02"],
+        # MSAmanda has no history and is expected to take the median time of the known tools
+        ["MSAmanda_01", "StPeter_02"],
+        ["StPeter_01"],
+    ]
+    assert longest_first(runs_steps, tool_times) == [1, 0, 2, 3]
+    # without any history, the workflows with more steps are started first
+    assert longest_first(runs_steps, {}) == [0, 1, 2, 3]
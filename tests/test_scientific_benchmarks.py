@@ -0,0 +1,88 @@
+import io
+import json
+import tracemalloc
+
+import jsonpath_ng.ext
+import pytest
+
+from workflomics_benchmarker.scientific_benchmarks import benchmark_gProfiler, benchmark_goenrichment, iter_json_array
+
+GPROFILER_OUTPUT = {
+    "result": [
+        {"native": "GO:0000001", "p_value": 1e-8, "source": "GO:BP"},
+        {"native": "GO:0000001", "p_value": 1e-5, "source": "GO:BP"},
+        {"native": "GO:0000002", "p_value": 0.0009, "source": "GO:MF"},
+        {"native": "GO:0000003", "p_value": 0.001, "source": "GO:CC"},
+        {"native": "KEGG:00010", "p_value": 1e-9, "source": "KEGG"},
+        {"native": "GO:0000004", "source": "GO:BP"},
+        {"p_value": 1e-9, "source": "GO:BP"},
+    ],
+    "meta": {"query_metadata": {"organism": "hsapiens", "sources": ["GO:BP", "KEGG"]}, "version": 12345},
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_iter_json_array(chunk_size):
+    text = json.dumps({"meta": {"result": [0], "n": 1234567}, "count": 98765, "result": [1, {"a": "]"}, [2.5e-10]]}, indent=2)
+    assert list(iter_json_array(io.StringIO(text), "result", chunk_size)) == [1, {"a": "]"}, [2.5e-10]]
+    assert list(iter_json_array(io.StringIO('{"meta": {}}'), "result", chunk_size)) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"result": {"a": 1}}'), "result", chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_iter_json_array_escapes(chunk_size):
+    text = json.dumps({"a\\\"result": ["\\", "]\"}"], "n": -1.5e3, "t": [True, None], "result": ["\\\"", {"b": "\\"}]})
+    assert list(iter_json_array(io.StringIO(text), "result", chunk_size)) == ["\\\"", {"b": "\\"}]
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"meta": {"a": [1, 2}, "result": [1]}'), "result", chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7])
+def test_iter_json_array_numbers_across_chunks(chunk_size):
+    """A number split by the end of a chunk, e.g., `1.` of `1.5e-05`, is only decoded once it is complete."""
+    text = '{"n": 12.5e-3, "result": [1.5e-05, 2, -0.25, 1234567, 3E+2, true, null], "m": 7}'
+    assert list(iter_json_array(io.StringIO(text), "result", chunk_size)) == json.loads(text)["result"]
+
+
+def test_gprofiler_large_value_before_result(tmp_path):
+    """
+    The values before the results are skipped without being decoded, and dropped from the buffer as they are
+    scanned, so that a large value is neither decoded again for each chunk nor held in memory.
+    """
+    meta = {"genes": {f"ENSG{index:011d}": ["GO:0000001", "x" * 30, {"p": [index]}] for index in range(30000)}}
+    path = tmp_path / "output.json"
+    path.write_text(json.dumps({"meta": meta, "result": GPROFILER_OUTPUT["result"] * 1000}))
+    assert path.stat().st_size > 2 * 2**20
+
+    tracemalloc.start()
+    try:
+        assert benchmark_gProfiler(str(path)) == 2
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 2**19
+
+
+def test_gprofiler_matches_jsonpath(tmp_path):
+    """Test whether the streamed g:Profiler results count the same GO-terms as the jsonpath query did."""
+    path = tmp_path / "output.json"
+    path.write_text(json.dumps(GPROFILER_OUTPUT))
+    expected = {
+        match.value
+        for match in jsonpath_ng.ext.parse("$.result[?(@.p_value < 0.001)].native").find(GPROFILER_OUTPUT)
+        if "GO:" in str(match.value)
+    }
+
+    assert benchmark_gProfiler(str(path)) == len(expected) == 2
+
+
+def test_goenrichment(tmp_path):
+    paths = []
+    for ontology, rows in [("BP", ["GO:1\t1e-5\ta", "GO:2\t0.01\tb"]), ("MF", ["GO:1\t1e-4\tc", "GO:3\t0.0005\td"])]:
+        path = tmp_path / f"{ontology}_result.txt"
+        path.write_text("\n".join(["GO Term\tp-value\tName"] + rows) + "\n")
+        paths.append(str(path))
+
+    assert benchmark_goenrichment(paths) == 2
+    assert benchmark_goenrichment(paths[0]) == 1
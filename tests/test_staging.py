@@ -0,0 +1,54 @@
+import hashlib
+import os
+
+import yaml
+
+from workflomics_benchmarker.staging import InputStager
+
+
+def write_inputs(directory):
+    directory.mkdir()
+    directory.joinpath("spectra.mzML").write_bytes(b"<mzML/>" * 1000)
+    directory.joinpath("proteome.fasta").write_text(">sp|P1|SYN\nPEPTIDEK\n")
+    directory.joinpath("input.yml").write_text(
+        yaml.dump(
+            {
+                "input_1": {"class": "File", "format": "http://edamontology.org/format_3244", "path": "spectra.mzML"},
+                "input_2": {"class": "File", "location": f"file://{directory}/proteome.fasta"},
+            }
+        )
+    )
+    return directory.joinpath("input.yml")
+
+
+def test_stage_input_yaml(tmp_path):
+    input_yaml = write_inputs(tmp_path / "inputs")
+    stager = InputStager(str(tmp_path / "cache"))
+
+    staged_yaml = stager.stage_input_yaml(str(input_yaml), str(tmp_path / "staged_input.yml"))
+
+    with open(staged_yaml) as file:
+        staged = yaml.safe_load(file)
+    checksum = hashlib.sha1(b"<mzML/>" * 1000).hexdigest()
+    assert staged["input_1"]["path"] == str(tmp_path / "cache" / checksum / "spectra.mzML")
+    assert staged["input_1"]["checksum"] == "sha1$" + checksum
+    assert staged["input_1"]["format"] == "http://edamontology.org/format_3244"
+    assert "location" not in staged["input_2"]
+    assert open(staged["input_2"]["path"]).read() == ">sp|P1|SYN\nPEPTIDEK\n"
+    assert stager.staged_bytes == 7000 + 20
+
+
+def test_staged_files_are_reused_until_they_change(tmp_path):
+    input_yaml = write_inputs(tmp_path / "inputs")
+    InputStager(str(tmp_path / "cache")).stage_input_yaml(str(input_yaml), str(tmp_path / "staged.yml"))
+
+    stager = InputStager(str(tmp_path / "cache"))
+    stager.stage_input_yaml(str(input_yaml), str(tmp_path / "staged.yml"))
+    assert (stager.staged_bytes, stager.reused_bytes) == (0, 7020)
+
+    fasta = tmp_path / "inputs" / "proteome.fasta"
+    fasta.write_text(">sp|P2|SYN\nPEPTIDER\n")
+    os.utime(fasta, (0, 0))
+    stager = InputStager(str(tmp_path / "cache"))
+    stager.stage_input_yaml(str(input_yaml), str(tmp_path / "staged.yml"))
+    assert (stager.staged_bytes, stager.reused_bytes) == (20, 7000)
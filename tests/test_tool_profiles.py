@@ -0,0 +1,69 @@
+import json
+import shutil
+from argparse import Namespace
+from pathlib import Path
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.tool_profiles import build_tool_profiles, distribution, predict_workflow_cost
+
+
+def record(name, steps):
+    """A workflow record with the status, time (ms), memory and warnings of each step."""
+    def benchmark(title, values, key="value"):
+        return {"title": title, "steps": [{"label": label, key: value} for label, value in values]}
+
+    return {
+        "workflowName": name,
+        "benchmarks": [
+            benchmark("Status", [(label, status) for label, status, _, _, _ in steps]),
+            {
+                "title": "Execution time",
+                "steps": [
+                    {"label": label, "value": max(1, int(ms / 1000)) if ms != "-" else "-", **({"value_ms": ms} if ms != "-" else {})}
+                    for label, _, ms, _, _ in steps
+                ],
+            },
+            benchmark("Memory usage", [(label, memory) for label, _, _, memory, _ in steps]),
+            benchmark("Warnings", [(label, warnings) for label, _, _, _, warnings in steps]),
+        ],
+    }
+
+
+def test_distribution():
+    assert distribution([]) is None
+    assert distribution([4, 1, 3, 2, 10]) == {"count": 5, "min": 1, "median": 3, "p90": 10, "max": 10, "mean": 4.0}
+
+
+def test_build_tool_profiles():
+    benchmarks_by_input = {
+        "ecoli": [
+            record("a.cwl", [("Comet", "✓", 2000.0, 100, 0), ("PeptideProphet", "✓", 500.0, 50, 2)]),
+            record("b.cwl", [("Comet", "✓", 4000.0, 300, 1), ("ProteinProphet", "OOM", 100.0, 900, 0), ("StPeter", "-", "-", "-", 0)]),
+        ],
+        "human": [record("a.cwl", [("Comet", "✗", 1000.0, 10, 4), ("PeptideProphet", "-", "-", "-", 0)])],
+    }
+
+    profiles = build_tool_profiles(benchmarks_by_input)
+
+    assert list(profiles) == ["Comet", "PeptideProphet", "ProteinProphet"]
+    comet = profiles["Comet"]
+    assert (comet["runs"], comet["failures"], comet["failure_rate"], comet["workflows"]) == (3, 1, 0.333, ["a.cwl", "b.cwl"])
+    # the failed run only ran partially, it is left out of the time and memory distributions
+    assert comet["time"]["median"] == 3.0 and comet["memory"]["max"] == 300
+    assert comet["warnings"]["count"] == 3
+    assert profiles["ProteinProphet"]["oom_kills"] == 1 and profiles["ProteinProphet"]["time"] is None
+
+    prediction = predict_workflow_cost(["Comet_01", "PeptideProphet_02", "Mascot_03"], profiles)
+    assert prediction == {"time": 3.5, "memory": 200.0, "success_probability": 0.667, "unknown_tools": ["Mascot"]}
+
+
+def test_benchmark_stores_tool_profiles(tmp_path, fake_cwltool):
+    for name in ["workflow.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+
+    CWLToolRuntimeBenchmark(Namespace(workflows=str(tmp_path))).run_workflows()
+
+    with open(tmp_path / "tool_profiles.json") as file:
+        profiles = json.load(file)
+    assert set(profiles) == {"Comet", "PeptideProphet", "ProteinProphet", "StPeter"}
+    assert profiles["Comet"]["runs"] == 1 and profiles["Comet"]["memory"]["median"] == 100
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import sys
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.warm_pool import WarmWorkerPool
+
+SCRIPT = """#!/usr/bin/env python3
+import sys
+
+import json  # preloaded by the worker
+
+
+def main():
+    # module state changed by a run must not be seen by the next run
+    print("leaked" if getattr(json, "leaked", False) else "clean")
+    json.leaked = True
+    print(sys.argv[1:], flush=True)
+    return int(sys.argv[1])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+"""
+
+
+@pytest.fixture
+def tool_on_path(tmp_path, monkeypatch):
+    path = tmp_path / "bin"
+    path.mkdir()
+    path.joinpath("tool").write_text(SCRIPT)
+    path.joinpath("tool").chmod(0o755)
+    monkeypatch.setenv("PATH", str(path) + os.pathsep + os.environ["PATH"])
+
+
+def test_warm_pool_isolates_runs(tool_on_path):
+    pool = WarmWorkerPool(1, "tool")
+    try:
+        assert pool.interpreter == shutil.which("python3")  # the interpreter of the shebang line
+        for code in [0, 3]:
+            line_times = []
+            output, returncode, rusage = pool.run([str(code)], line_times=line_times)
+            assert output.splitlines() == ["clean", f"['{code}']"]
+            assert returncode == code
+            assert len(line_times) == 2 and rusage["elapsed"] > 0
+    finally:
+        pool.close()
+
+
+def test_warm_pool_rejects_binaries(monkeypatch):
+    monkeypatch.setenv("PATH", str(Path(sys.executable).parent))
+    with pytest.raises(ValueError):
+        WarmWorkerPool(1, Path(sys.executable).name)
+
+
+def test_warm_pool_rejects_other_environments(tmp_path, monkeypatch):
+    """A script run by the Python of another environment cannot import the worker, it is not preloaded."""
+    path = tmp_path / "bin"
+    path.mkdir()
+    path.joinpath("python3").write_text("#!/bin/sh\necho /opt/other-environment\n")
+    path.joinpath("tool").write_text(SCRIPT.replace("/usr/bin/env python3", str(path / "python3")))
+    for name in ["python3", "tool"]:
+        path.joinpath(name).chmod(0o755)
+    monkeypatch.setenv("PATH", str(path) + os.pathsep + os.environ["PATH"])
+
+    with pytest.raises(ValueError, match="not in the Python environment"):
+        WarmWorkerPool(1, "tool")
+
+
+def test_benchmark_with_warm_workers(tmp_path, fake_cwltool):
+    for name in ["workflow.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+
+    benchmarker = CWLToolRuntimeBenchmark(Namespace(workflows=str(tmp_path), warm_workers=True))
+    benchmarker.run_workflows()
+
+    assert benchmarker.warm_pool is None  # the workers were stopped
+    with open(tmp_path / "benchmarks.json") as file:
+        [record] = json.load(file)
+    status = next(benchmark for benchmark in record["benchmarks"] if benchmark["title"] == "Status")
+    assert [step["value"] for step in status["steps"]] == ["✓"] * 4
@@ -0,0 +1,65 @@
+import json
+import shutil
+import threading
+import time
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
+from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.watch import InotifyWatcher, PollingWatcher, WorkflowWatcher
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def read_workflow_names(directory):
+    path = directory / "benchmarks.json"
+    if not path.is_file():
+        return []
+    with open(path) as file:
+        return [record["workflowName"] for record in json.load(file)]
+
+
+@pytest.mark.parametrize("watcher_class", [PollingWatcher, InotifyWatcher])
+def test_watchers_report_new_workflows(tmp_path, watcher_class):
+    watcher = watcher_class(str(tmp_path))
+    watcher.changes(0.01)
+    shutil.copy("tests/data/workflow.cwl", tmp_path)
+    tmp_path.joinpath("input.yml").write_text("input_1: {}\n")
+    assert watcher.changes(1) == {str(tmp_path / "workflow.cwl")}
+    watcher.close()
+
+
+def test_watch_benchmarks_new_and_changed_workflows_once(tmp_path, fake_cwltool):
+    shutil.copy("tests/data/input.yml", tmp_path)
+    shutil.copy("tests/data/workflow.cwl", tmp_path)
+    watcher = WorkflowWatcher(CWLToolRuntimeBenchmark(Namespace(workflows=str(tmp_path), jobs=2)), polling=True, poll_interval=0.05, debounce=0.2)
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop,))
+    thread.start()
+    try:
+        wait_for(lambda: read_workflow_names(tmp_path) == ["workflow.cwl"])
+        # a new workflow, and a copy of an already benchmarked one
+        shutil.copy("tests/data/workflow_fail.cwl", tmp_path)
+        shutil.copy("tests/data/workflow.cwl", tmp_path / "workflow_copy.cwl")
+        wait_for(lambda: read_workflow_names(tmp_path) == ["workflow.cwl", "workflow_fail.cwl"])
+        time.sleep(0.5)
+        assert watcher.completed_runs == 2
+    finally:
+        stop.set()
+        thread.join()
+
+    with open(tmp_path / "watch_state.json") as file:
+        assert sorted(json.load(file).values()) == ["workflow.cwl", "workflow_fail.cwl"]
+    # a restarted watch does not benchmark the same workflows again
+    watcher = WorkflowWatcher(CWLToolRuntimeBenchmark(Namespace(workflows=str(tmp_path))), polling=True, poll_interval=0.05, debounce=0.2)
+    assert set(watcher.benchmarks_by_input["input"]) == {"workflow.cwl", "workflow_fail.cwl"}
+    watcher.notice({str(path) for path in Path(tmp_path).glob("*.cwl")})
+    time.sleep(0.3)
+    assert watcher.ready_workflows() == []
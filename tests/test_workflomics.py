@@ -1,13 +1,102 @@
+import json
+import shutil
+import sys
 from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
 from workflomics_benchmarker.cwltool_runtime_benchmark import CWLToolRuntimeBenchmark
+from workflomics_benchmarker.workflomics import main
 
 
-def test_benchmark_run():
+def test_benchmark_run(tmp_path):
     """Test whether the benchmark run works. """
-    # Simulate 'benchmark' command
+    # Simulate 'benchmark' command, storing the results outside of the test data
     
-    test_args = Namespace(workflows='tests/data/')
+    test_args = Namespace(workflows='tests/data/', outdir=str(tmp_path))
     
     runner  = CWLToolRuntimeBenchmark(test_args)
     runner.run_workflows()
-    assert True
\ No newline at end of file
+    assert True
+
+def test_benchmark_input_matrix(tmp_path, fake_cwltool):
+    """Test whether each workflow is benchmarked on each input and the results are keyed by input."""
+    for name in ["workflow.cwl", "workflow_fail.cwl"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+    inputs = tmp_path.joinpath("inputs")
+    inputs.mkdir()
+    for name in ["ecoli.yml", "human.yml"]:
+        shutil.copy("tests/data/input.yml", inputs.joinpath(name))
+
+    runner = CWLToolRuntimeBenchmark(Namespace(workflows=str(tmp_path), input=[str(inputs)], jobs=2))
+    runner.run_workflows()
+
+    with open(tmp_path.joinpath("benchmarks.json")) as f:
+        results = json.load(f)
+    assert list(results["inputs"]) == ["ecoli", "human"]
+    assert [record["workflowName"] for record in results["inputs"]["human"]] == ["workflow.cwl", "workflow_fail.cwl"]
+    assert tmp_path.joinpath("human", "workflow_output").is_dir()
+    aggregate = {record["workflowName"]: record for record in results["aggregate"]}
+    status = aggregate["workflow.cwl"]["benchmarks"][0]
+    assert set(status["per_input"]) == {"ecoli", "human"}
+    assert status["aggregate_value"]["desirability"] == 1
+
+
+def test_command_line_errors(tmp_path, monkeypatch, caplog):
+    """Test whether the command line reports invalid arguments and exits with status 1."""
+    monkeypatch.setattr(sys, "argv", ["workflomics", "benchmark", str(tmp_path / "missing")])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+    assert "is not a directory" in caplog.text
+    monkeypatch.setattr(sys, "argv", ["workflomics", "run", "--executor", "nextflow", str(tmp_path)])
+    with pytest.raises(SystemExit):
+        main()
+    assert "Unknown executor nextflow" in caplog.text
+
+
+def test_command_line_benchmark(tmp_path, fake_cwltool, monkeypatch):
+    """Test whether the benchmark command runs the benchmark through the API with the given options."""
+    for name in ["workflow.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+    monkeypatch.setattr(sys, "argv", ["workflomics", "benchmark", "--no-history", str(tmp_path), "--rank-by", "time", "memory"])
+
+    main()
+
+    with open(tmp_path.joinpath("benchmarks.json")) as f:
+        [record] = json.load(f)
+    assert record["workflowName"] == "workflow.cwl"
+    assert not tmp_path.joinpath("history.sqlite").exists()
+
+
+def test_benchmark_order(tmp_path, fake_cwltool):
+    """Test whether the benchmarks keep their original order, the timing benchmarks of the workflow coming last."""
+    for name in ["workflow.cwl", "input.yml"]:
+        shutil.copy(Path("tests/data").joinpath(name), tmp_path)
+
+    CWLToolRuntimeBenchmark(Namespace(workflows=str(tmp_path))).run_workflows()
+
+    with open(tmp_path.joinpath("benchmarks.json")) as f:
+        [record] = json.load(f)
+    titles = [benchmark["title"] for benchmark in record["benchmarks"]]
+    assert titles[:7] == ["Status", "Execution time", "Memory usage", "Warnings", "Errors", "Proteins", "GO-terms"]
+    assert titles[-2:] == ["Critical path", "Parallelism"]
+
+
+@pytest.mark.parametrize(
+    "benchmark_name, values, desirabilities",
+    [
+        ("time", [0, 150, 151, 300.5, 450, 600, 601, 10000], [1, 1, 0.75, 0.5, 0.5, 0.25, 0, 0]),
+        ("memory", [1, 250, 251, 750, 1000, 1001], [1, 1, 0.75, 0.5, 0.25, 0]),
+        ("warnings", [0, 1, ["warning"] * 4, 7, 8, ["warning"] * 20], [0, -0.25, -0.5, -0.75, -1, -1]),
+        ("cpu_efficiency", [10.5, 50, 89, 90, 100], [0, 0.5, 0.75, 1, 1]),
+    ],
+)
+def test_desirability_bins(tmp_path, benchmark_name, values, desirabilities):
+    """Test whether each value gets the desirability of its bin, up to the open-ended last one."""
+    runner = CWLToolRuntimeBenchmark(Namespace(workflows='tests/data/', outdir=str(tmp_path)))
+
+    assert [runner.calc_desirability(benchmark_name, value) for value in values] == desirabilities
+    if benchmark_name != "warnings":  # the values of a failed step are undesirable, whatever their bin
+        assert runner.calc_desirability(benchmark_name, values[0], status="✗") == -1